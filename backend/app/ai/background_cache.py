@@ -0,0 +1,158 @@
+"""
+PadaiSathi AI — Background clip cache
+backend/app/ai/background_cache.py
+
+Each theme background in ASSET_DIR is transcoded ONCE to exactly what the
+renderers output: ≤1080p, 24 fps, H.264 yuv420p, no audio, with a keyframe
+every second. Renders then loop that file as-is — no per-video resize, no
+concatenating copies in memory, no fps conversion.
+
+A keyframe index (seconds) is stored next to each cached clip, so a segment
+starting anywhere can be cut with an input seek (-ss to the keyframe at or
+before it) instead of decoding from the start.
+
+Entries are keyed on the source file's name, size and mtime plus the
+target settings, so replacing or adding a theme MP4 is picked up on the
+next render, and stale entries for that theme are removed.
+"""
+
+import os
+import re
+import json
+import bisect
+import hashlib
+import threading
+import subprocess
+from pathlib import Path
+
+from .ffmpeg_renderer import ffmpeg_binary, probe_size, output_size, OUTPUT_FPS
+
+# ── Config ────────────────────────────────────────────────────────────────────
+_HERE = Path(__file__).resolve().parent
+BACKGROUND_CACHE_DIR = Path(os.getenv(
+    "BACKGROUND_CACHE_DIR", str(_HERE.parent.parent / "temp_video" / "backgrounds")
+))
+KEYFRAME_INTERVAL = 1.0          # seconds between forced keyframes
+PREPARE_TIMEOUT   = float(os.getenv("BACKGROUND_PREPARE_TIMEOUT", "900"))
+CACHE_VERSION     = "bg-v1"      # bump when the transcode settings change
+
+_DURATION = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+_PTS_TIME = re.compile(r"pts_time:(\d+(?:\.\d+)?)")
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _cache_key(src: Path) -> str:
+    st = src.stat()
+    raw = f"{CACHE_VERSION}|{src.name}|{st.st_size}|{st.st_mtime_ns}|{OUTPUT_FPS}|{KEYFRAME_INTERVAL}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _duration(path: Path) -> float | None:
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", str(path)],
+                            capture_output=True, text=True, timeout=30)
+    m = _DURATION.search(result.stderr)
+    if not m:
+        return None
+    h, mi, s = m.groups()
+    return int(h) * 3600 + int(mi) * 60 + float(s)
+
+
+def _keyframes(path: Path) -> list:
+    """Keyframe times (s), read by decoding only the keyframes."""
+    result = subprocess.run(
+        [ffmpeg_binary(), "-hide_banner", "-skip_frame", "nokey", "-i", str(path),
+         "-vf", "showinfo", "-an", "-f", "null", "-"],
+        capture_output=True, text=True, timeout=PREPARE_TIMEOUT,
+    )
+    return sorted({round(float(t), 3) for t in _PTS_TIME.findall(result.stderr)})
+
+
+def _transcode(src: Path, dst: Path):
+    size = output_size(probe_size(str(src)))
+    tmp = dst.with_suffix(".part.mp4")
+    cmd = [
+        ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y", "-i", str(src),
+        "-vf", f"scale={size[0]}:{size[1]},setsar=1,fps={OUTPUT_FPS},format=yuv420p",
+        "-an",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18",
+        "-force_key_frames", f"expr:gte(t,n_forced*{KEYFRAME_INTERVAL})", "-sc_threshold", "0",
+        "-movflags", "+faststart",
+        str(tmp),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=PREPARE_TIMEOUT)
+    if result.returncode != 0:
+        tmp.unlink(missing_ok=True)
+        raise RuntimeError(f"ffmpeg exited {result.returncode}: {result.stderr.strip()[-300:]}")
+    os.replace(tmp, dst)          # atomic — other processes never see a half-written clip
+
+
+def _drop_stale(src: Path, keep: str):
+    for f in BACKGROUND_CACHE_DIR.glob(f"{src.stem}_*"):
+        if keep not in f.name:
+            f.unlink(missing_ok=True)
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+def prepare_background(src) -> dict | None:
+    """Cached, render-ready copy of a background clip.
+
+    Returns {"path", "source", "duration", "size", "keyframes"} or None when
+    ffmpeg isn't available or the transcode fails (callers then use src).
+    """
+    if not src or not ffmpeg_binary():
+        return None
+    src = Path(src)
+    try:
+        key = _cache_key(src)
+        clip = BACKGROUND_CACHE_DIR / f"{src.stem}_{key}.mp4"
+        index = BACKGROUND_CACHE_DIR / f"{src.stem}_{key}.json"
+        with _lock_for(key):
+            if index.exists() and clip.exists():
+                return json.loads(index.read_text())
+
+            BACKGROUND_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            print(f"[BGCache] Preparing {src.name} → {clip.name}")
+            _transcode(src, clip)
+            entry = {
+                "path":      str(clip),
+                "source":    str(src),
+                "duration":  _duration(clip),
+                "size":      list(probe_size(str(clip)) or output_size(None)),
+                "keyframes": _keyframes(clip) or [0.0],
+            }
+            index.write_text(json.dumps(entry))
+            _drop_stale(src, key)
+            print(f"[BGCache] {src.name}: {entry['duration']:.1f}s, "
+                  f"{len(entry['keyframes'])} keyframes, {entry['size'][0]}x{entry['size'][1]}")
+            return entry
+    except Exception as e:
+        print(f"[BGCache] Could not prepare {src.name}: {e}")
+        return None
+
+
+def keyframe_at_or_before(entry: dict, t: float) -> float:
+    """Latest keyframe ≤ t (wrapped into the clip) — a cheap, exact seek point."""
+    duration = entry.get("duration") or 0
+    if duration > 0:
+        t = t % duration
+    frames = entry["keyframes"]
+    i = bisect.bisect_right(frames, t) - 1
+    return frames[max(i, 0)]
+
+
+def warm_background_cache(asset_dir) -> threading.Thread:
+    """Prepare every theme in asset_dir in a daemon thread (e.g. at worker start)."""
+    def _run():
+        for src in sorted(Path(asset_dir).glob("*.mp4")):
+            prepare_background(src)
+
+    t = threading.Thread(target=_run, name="bg-cache-warmup", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,115 @@
+"""
+PadaiSathi AI — Caption renderer
+backend/app/ai/caption_renderer.py
+
+Rasterises caption cards with Pillow straight into RGBA NumPy arrays:
+ALL CAPS, white fill, thin black outline, word-wrapped and centred. No
+ImageMagick, no subprocesses.
+
+Rendered cards are kept in an LRU keyed by (text, font, size, stroke,
+width). Captions repeat a lot ("THE", "IS THE", the opener and closer
+lines), and every video of the same size reuses the same cache.
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# ── Config ────────────────────────────────────────────────────────────────────
+CAPTION_CACHE_SIZE = int(os.getenv("CAPTION_CACHE_SIZE", "1024"))
+# Explicit font file wins; otherwise the first of these that exists is used
+CAPTION_FONT_PATH = os.getenv("CAPTION_FONT_PATH", "")
+_FONT_CANDIDATES = [
+    "Impact.ttf", "impact.ttf",
+    "C:/Windows/Fonts/impact.ttf",
+    "/usr/share/fonts/truetype/msttcorefonts/Impact.ttf",
+    "/Library/Fonts/Impact.ttf",
+    "Arial Bold.ttf", "arialbd.ttf",
+    "C:/Windows/Fonts/arialbd.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "DejaVuSans-Bold.ttf",
+]
+CAPTION_COLOR  = (255, 255, 255, 255)
+CAPTION_STROKE = (0, 0, 0, 255)
+LINE_SPACING   = 1.1
+
+_font_path = None
+_font_lock = threading.Lock()
+
+
+def _resolve_font_path() -> str | None:
+    """First usable TrueType font, looked up once per process."""
+    global _font_path
+    with _font_lock:
+        if _font_path is None:
+            _font_path = ""
+            for candidate in ([CAPTION_FONT_PATH] if CAPTION_FONT_PATH else []) + _FONT_CANDIDATES:
+                try:
+                    ImageFont.truetype(candidate, 12)
+                except OSError:
+                    continue
+                _font_path = candidate
+                break
+            print(f"[Captions] Font: {_font_path or 'Pillow default'}")
+    return _font_path or None
+
+
+@lru_cache(maxsize=32)
+def _font(path: str | None, size: int):
+    if path:
+        return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size=size)
+
+
+def _wrap(draw, text: str, font, stroke: int, max_width: int) -> list:
+    """Greedy word wrap to max_width pixels."""
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}".strip()
+        if current and draw.textlength(candidate, font=font) + 2 * stroke > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+@lru_cache(maxsize=CAPTION_CACHE_SIZE)
+def _render(text: str, font_path: str | None, size: int, stroke: int, max_width: int) -> np.ndarray:
+    font = _font(font_path, size)
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    lines = _wrap(measure, text, font, stroke, max_width) or [""]
+
+    boxes = [measure.textbbox((0, 0), line, font=font, stroke_width=stroke) for line in lines]
+    line_h = int(size * LINE_SPACING) + 2 * stroke
+    width = max(b[2] - b[0] for b in boxes) + 2 * stroke
+    height = line_h * len(lines)
+
+    image = Image.new("RGBA", (max(width, 1), max(height, 1)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for i, (line, box) in enumerate(zip(lines, boxes)):
+        x = (width - (box[2] - box[0])) // 2 - box[0]
+        draw.text((x, i * line_h + stroke), line, font=font, fill=CAPTION_COLOR,
+                  stroke_width=stroke, stroke_fill=CAPTION_STROKE)
+    frame = np.asarray(image)
+    frame.flags.writeable = False           # shared by every caller via the cache
+    return frame
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+def render_caption(text: str, fontsize: int, stroke_width: int, max_width: int) -> np.ndarray:
+    """(h, w, 4) uint8 RGBA card for text — upper-cased, wrapped, centred.
+
+    The array is cached and read-only; copy it before drawing on it.
+    """
+    return _render(text.upper(), _resolve_font_path(), fontsize, stroke_width, max_width)
+
+
+def caption_cache_stats() -> dict:
+    info = _render.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
@@ -0,0 +1,139 @@
+"""
+PadaiSathi AI — Token-budget chunker
+backend/app/ai/chunker.py
+
+Splits text into sentence-aligned chunks measured in real model tokens, so
+every Flan-T5 / Primary AI Engine / AI Engine call can be packed close to
+its context limit instead of guessing with character counts.
+
+Token counts come from the PadaiSathi Flan-T5 tokenizer shipped in
+app/ai/model/tokenizer.json (HuggingFace `tokenizers`, no torch needed).
+If that library isn't installed, a word/punctuation regex stands in —
+slightly different counts, same behaviour.
+
+Chunks are returned as (start, end) character offsets into the original
+text; slice only what you need. Packing is one linear pass: sentences are
+tokenized in a single batch, and a sentence longer than the budget is
+split on token boundaries.
+"""
+
+import os
+import re
+import threading
+
+# ── Config ────────────────────────────────────────────────────────────────────
+TOKENIZER_PATH = os.getenv(
+    "CHUNKER_TOKENIZER_PATH",
+    os.path.join(os.path.dirname(__file__), "model", "tokenizer.json"),
+)
+# Flan-T5 truncates its input at 256 tokens — leave room for the "[QUIZ_MCQ] " tag
+STUDY_CHUNK_TOKENS = int(os.getenv("STUDY_CHUNK_TOKENS", "240"))
+
+_SENTENCE = re.compile(r"(?:[^.!?\n]|\n(?!\s*\n))*(?:[.!?]+|\n\s*\n|$)")
+_TOKEN    = re.compile(r"\w+|[^\w\s]")
+
+_tokenizer = None              # tokenizers.Tokenizer, False = unavailable
+_tokenizer_lock = threading.Lock()
+
+
+def _get_tokenizer():
+    global _tokenizer
+    if _tokenizer is None:
+        with _tokenizer_lock:
+            if _tokenizer is None:
+                try:
+                    from tokenizers import Tokenizer
+                    _tokenizer = Tokenizer.from_file(TOKENIZER_PATH)
+                    print(f"[Chunker] Tokenizer loaded from {TOKENIZER_PATH}")
+                except Exception as e:
+                    print(f"[Chunker] Tokenizer unavailable ({e}) — using regex token counts")
+                    _tokenizer = False
+    return _tokenizer or None
+
+
+def _token_offsets(pieces: list) -> list:
+    """Per piece, the (start, end) of each of its tokens (piece-relative)."""
+    tokenizer = _get_tokenizer()
+    if tokenizer is not None:
+        return [
+            [(a, b) for a, b in enc.offsets if b > a]
+            for enc in tokenizer.encode_batch(pieces, add_special_tokens=False)
+        ]
+    return [[m.span() for m in _TOKEN.finditer(p)] for p in pieces]
+
+
+def count_tokens(text: str) -> int:
+    return len(_token_offsets([text])[0]) if text else 0
+
+
+def count_tokens_batch(texts: list) -> list:
+    return [len(offsets) for offsets in _token_offsets(texts)] if texts else []
+
+
+def _sentence_spans(text: str) -> list:
+    spans = []
+    for m in _SENTENCE.finditer(text):
+        start, end = m.start(), m.end()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            spans.append((start, end))
+    return spans
+
+
+def chunk_spans(text: str, max_tokens: int, overlap_tokens: int = 0) -> list:
+    """(start, end) offsets of sentence-aligned chunks of ≤ max_tokens tokens.
+
+    overlap_tokens: trailing whole sentences (up to that many tokens) of one
+    chunk are repeated at the start of the next, to keep context across the
+    boundary. No cap on the number of chunks.
+    """
+    if not text or max_tokens <= 0:
+        return []
+    sentences = _sentence_spans(text)
+    token_offsets = _token_offsets([text[a:b] for a, b in sentences])
+
+    # Sentences over budget are cut on token boundaries into pieces that fit
+    units = []                                   # (start, end, tokens)
+    for (a, b), offsets in zip(sentences, token_offsets):
+        if len(offsets) <= max_tokens:
+            units.append((a, b, len(offsets)))
+            continue
+        for i in range(0, len(offsets), max_tokens):
+            window = offsets[i:i + max_tokens]
+            end = offsets[i + max_tokens][0] if i + max_tokens < len(offsets) else b - a
+            units.append((a + window[0][0], a + end, len(window)))
+
+    chunks, first, used = [], 0, 0
+    for i, (a, b, tokens) in enumerate(units):
+        if i > first and used + tokens > max_tokens:
+            chunks.append((units[first][0], units[i - 1][1]))
+            # Step back over up to overlap_tokens of trailing sentences
+            new_first, carried = i, 0
+            while (new_first - 1 > first
+                   and carried + units[new_first - 1][2] <= overlap_tokens
+                   and carried + units[new_first - 1][2] + tokens <= max_tokens):
+                new_first -= 1
+                carried += units[new_first][2]
+            first, used = new_first, carried
+        used += tokens
+    if units:
+        chunks.append((units[first][0], units[-1][1]))
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int, overlap_tokens: int = 0) -> list:
+    """chunk_spans(), sliced into strings."""
+    return [text[a:b] for a, b in chunk_spans(text, max_tokens, overlap_tokens)]
+
+
+def pick_chunks(chunks: list, n: int) -> list:
+    """n chunks for n generations: spread over the document when there are
+    enough, otherwise each chunk reused in turn."""
+    if not chunks or n <= 0:
+        return []
+    if len(chunks) >= n:
+        return [chunks[round(i * (len(chunks) - 1) / max(n - 1, 1))] for i in range(n)]
+    return [chunks[i % len(chunks)] for i in range(n)]
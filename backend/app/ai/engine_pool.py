@@ -0,0 +1,280 @@
+"""
+PadaiSathi AI — AI Engine client pool
+backend/app/ai/engine_pool.py
+
+One persistent Groq client (and so one keep-alive HTTP connection pool) per
+PADAISATHI_AI_ENGINE_* key, shared by every summary / quiz / flashcard call
+in the process.
+
+Each key is a token bucket fed by the rate-limit headers Groq sends back
+(x-ratelimit-remaining-requests / -tokens and their reset times, plus
+retry-after on 429). Every call goes to the key with the most quota left, so
+load spreads across keys. Keys that are known to be empty or cooling down
+are skipped locally instead of costing a failed round trip.
+
+Set PADAISATHI_AI_ENGINE_BASE_URL to point every client at a local stub
+server (anything speaking the OpenAI-style /openai/v1/chat/completions API).
+"""
+
+import os
+import re
+import time
+import threading
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# PadaiSathi AI Engine keys — spread across, and rotated past when rate limited
+_PADAISATHI_AI_KEYS = [
+    os.getenv("PADAISATHI_AI_ENGINE_1", ""),
+    os.getenv("PADAISATHI_AI_ENGINE_2", ""),
+    os.getenv("PADAISATHI_AI_ENGINE_3", ""),
+    os.getenv("PADAISATHI_AI_ENGINE_4", ""),
+    os.getenv("PADAISATHI_AI_ENGINE_5", ""),
+]
+_PADAISATHI_AI_KEYS = [k for k in _PADAISATHI_AI_KEYS if k]  # remove empty ones
+AI_ENGINE_MODEL    = "llama-3.3-70b-versatile"
+AI_ENGINE_BASE_URL = os.getenv("PADAISATHI_AI_ENGINE_BASE_URL", "")
+AI_ENGINE_TIMEOUT  = float(os.getenv("PADAISATHI_AI_ENGINE_TIMEOUT", "60"))
+# How long a call may wait for a key to come off cooldown before giving up
+AI_ENGINE_MAX_WAIT = float(os.getenv("PADAISATHI_AI_ENGINE_MAX_WAIT", "20"))
+# Cooldown after a connection error / 5xx when the server gave no hint
+AI_ENGINE_ERROR_COOLDOWN = float(os.getenv("PADAISATHI_AI_ENGINE_ERROR_COOLDOWN", "5"))
+
+
+class AIEngineUnavailable(Exception):
+    """Every key failed or is cooling down for longer than AI_ENGINE_MAX_WAIT."""
+
+
+def _build_slots() -> list:
+    slots = []
+    for i, key in enumerate(_PADAISATHI_AI_KEYS):
+        slots.append({
+            "index":              i + 1,
+            "key":                key,
+            "client":             None,   # created on first use
+            # Token buckets — None = not yet reported by the server
+            "limit_requests":     None,
+            "remaining_requests": None,
+            "reset_requests_at":  0.0,
+            "limit_tokens":       None,
+            "remaining_tokens":   None,
+            "reset_tokens_at":    0.0,
+            "cooldown_until":     0.0,
+            "in_flight":          0,
+            "calls":              0,
+            "failures":           0,
+            "rate_limited":       0,
+        })
+    return slots
+
+
+_lock  = threading.Lock()
+_slots = _build_slots()   # one dict per key; clients are created on first use
+
+
+def _client(slot: dict):
+    if slot["client"] is None:
+        from groq import Groq
+        kwargs = {"api_key": slot["key"], "timeout": AI_ENGINE_TIMEOUT,
+                  "max_retries": 0}          # the pool retries on another key instead
+        if AI_ENGINE_BASE_URL:
+            kwargs["base_url"] = AI_ENGINE_BASE_URL
+        slot["client"] = Groq(**kwargs)
+    return slot["client"]
+
+
+# ── Rate-limit header parsing ─────────────────────────────────────────────────
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def _parse_duration(value) -> float | None:
+    """'2m59.56s' / '7.66s' / '120ms' / '30' → seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total, matched = 0.0, False
+    for num, unit in _DURATION_PART.findall(value):
+        matched = True
+        total += float(num) * {"h": 3600, "m": 60, "s": 1, "ms": 0.001}[unit]
+    return total if matched else None
+
+
+def _parse_int(value) -> int | None:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _update_from_headers(slot: dict, headers):
+    """Refill the key's buckets from what the server just told us."""
+    if not headers:
+        return
+    now = time.monotonic()
+    for kind in ("requests", "tokens"):
+        limit     = _parse_int(headers.get(f"x-ratelimit-limit-{kind}"))
+        remaining = _parse_int(headers.get(f"x-ratelimit-remaining-{kind}"))
+        reset     = _parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+        if limit is not None:
+            slot[f"limit_{kind}"] = limit
+        if remaining is not None:
+            slot[f"remaining_{kind}"] = remaining
+        if reset is not None:
+            slot[f"reset_{kind}_at"] = now + reset
+    retry_after = _parse_duration(headers.get("retry-after"))
+    if retry_after:
+        slot["cooldown_until"] = max(slot["cooldown_until"], now + retry_after)
+
+
+def _refill(slot: dict, now: float):
+    """A bucket whose reset time has passed is full again.
+
+    Until the next response brings fresh headers, assume another minute-long
+    window so the refill isn't applied over and over.
+    """
+    for kind in ("requests", "tokens"):
+        if slot[f"remaining_{kind}"] is not None and now >= slot[f"reset_{kind}_at"]:
+            slot[f"remaining_{kind}"] = slot[f"limit_{kind}"]
+            slot[f"reset_{kind}_at"] = now + 60
+
+
+def _ready_at(slot: dict, cost_tokens: int, now: float) -> float:
+    """Monotonic time this key can take a request costing cost_tokens."""
+    at = slot["cooldown_until"]
+    if slot["remaining_requests"] is not None and slot["remaining_requests"] <= 0:
+        at = max(at, slot["reset_requests_at"])
+    # A request bigger than the whole bucket can still go once the bucket is full
+    needed = min(cost_tokens, slot["limit_tokens"] or cost_tokens)
+    if slot["remaining_tokens"] is not None and slot["remaining_tokens"] < needed:
+        at = max(at, slot["reset_tokens_at"])
+    return max(at, now)
+
+
+def _score(slot: dict) -> tuple:
+    """Higher is better: fraction of quota left, then least busy / least used."""
+    fractions = []
+    for kind in ("requests", "tokens"):
+        limit, remaining = slot[f"limit_{kind}"], slot[f"remaining_{kind}"]
+        fractions.append(1.0 if remaining is None or not limit else remaining / limit)
+    return (min(fractions), -slot["in_flight"], -slot["calls"])
+
+
+def _acquire(cost_tokens: int, tried: set) -> dict | None:
+    """Reserve the best key for a call, waiting out a short cooldown if needed."""
+    deadline = time.monotonic() + AI_ENGINE_MAX_WAIT
+    while True:
+        with _lock:
+            now = time.monotonic()
+            candidates = [s for s in _slots if s["index"] not in tried]
+            if not candidates:
+                return None
+            for s in candidates:
+                _refill(s, now)
+            ready = [s for s in candidates if _ready_at(s, cost_tokens, now) <= now]
+            if ready:
+                slot = max(ready, key=_score)
+                slot["in_flight"] += 1
+                slot["calls"] += 1
+                # Reserve quota up front so parallel callers spread out
+                if slot["remaining_requests"] is not None:
+                    slot["remaining_requests"] -= 1
+                if slot["remaining_tokens"] is not None:
+                    slot["remaining_tokens"] -= cost_tokens
+                return slot
+            wait = min(_ready_at(s, cost_tokens, now) for s in candidates) - now
+        if time.monotonic() + wait > deadline:
+            return None
+        print(f"[AIEnginePool] All keys cooling down — waiting {wait:.1f}s")
+        time.sleep(wait)
+
+
+def _release(slot: dict, headers=None, failed: bool = False, rate_limited: bool = False):
+    with _lock:
+        slot["in_flight"] -= 1
+        _update_from_headers(slot, headers)
+        if failed:
+            slot["failures"] += 1
+            if rate_limited:
+                slot["rate_limited"] += 1
+                if slot["remaining_requests"] is not None:
+                    slot["remaining_requests"] = min(slot["remaining_requests"], 0)
+            now = time.monotonic()
+            if slot["cooldown_until"] <= now:
+                slot["cooldown_until"] = now + AI_ENGINE_ERROR_COOLDOWN
+
+
+def _estimate_tokens(messages: list, max_tokens: int) -> int:
+    """Rough prompt + completion cost — ~4 chars per token."""
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + max_tokens
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+def chat_completion(messages: list, max_tokens: int = 1000, temperature: float = 0.7,
+                    model: str = AI_ENGINE_MODEL, label: str = "AI Engine") -> str:
+    """Run one chat completion on the best available key; return the text.
+
+    Tries each key at most once — an error or an empty completion moves on
+    to the next key. Raises AIEngineUnavailable when none succeed.
+    """
+    if not _PADAISATHI_AI_KEYS:
+        raise AIEngineUnavailable("No PadaiSathi AI Engine keys configured")
+
+    cost = _estimate_tokens(messages, max_tokens)
+    tried, last_error = set(), None
+    while True:
+        slot = _acquire(cost, tried)
+        if slot is None:
+            raise AIEngineUnavailable(last_error or "All PadaiSathi AI Engine keys are rate limited")
+        tried.add(slot["index"])
+        print(f"[AIEnginePool] {label} → key {slot['index']}/{len(_PADAISATHI_AI_KEYS)}")
+        try:
+            raw = _client(slot).chat.completions.with_raw_response.create(
+                model=model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        except Exception as e:
+            response = getattr(e, "response", None)
+            status = getattr(e, "status_code", None) or getattr(response, "status_code", None)
+            _release(slot, getattr(response, "headers", None), failed=True,
+                     rate_limited=(status == 429))
+            last_error = f"key {slot['index']}: {e}"
+            print(f"[AIEnginePool] Key {slot['index']} failed ({status or type(e).__name__}): {e}")
+            continue
+
+        try:
+            completion = raw.parse()
+            content = completion.choices[0].message.content if completion.choices else None
+        except Exception as e:
+            content, last_error = None, f"key {slot['index']}: unreadable response ({e})"
+        if not (content or "").strip():
+            # An empty completion is as useless as an error — try the next key
+            _release(slot, raw.headers, failed=True)
+            last_error = last_error or f"key {slot['index']}: empty completion"
+            print(f"[AIEnginePool] Key {slot['index']} returned an empty completion")
+            continue
+
+        _release(slot, raw.headers)
+        return content
+
+
+def pool_stats() -> list:
+    """Per-key scheduler state for /api/health (never includes the key itself)."""
+    with _lock:
+        now = time.monotonic()
+        return [{
+            "key":                s["index"],
+            "connected":          s["client"] is not None,
+            "remaining_requests": s["remaining_requests"],
+            "remaining_tokens":   s["remaining_tokens"],
+            "cooldown_seconds":   round(max(s["cooldown_until"] - now, 0.0), 1),
+            "in_flight":          s["in_flight"],
+            "calls":              s["calls"],
+            "failures":           s["failures"],
+            "rate_limited":       s["rate_limited"],
+        } for s in _slots]
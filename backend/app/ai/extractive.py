@@ -0,0 +1,158 @@
+"""
+PadaiSathi AI — Extractive sentence ranker
+backend/app/ai/extractive.py
+
+Picks the most informative sentences of a lecture, up to a token budget,
+before the text goes to the Primary AI Engine or the AI Engine pool.
+
+Sentences become TF-IDF rows (NumPy, float32 — kept sparse until long
+lectures are cut to MAX_RANKED_SENTENCES). Each one is scored with TextRank
+over their cosine-similarity graph — how central it is to the rest of the
+lecture — plus a small bonus for the opening sentences, where slides
+usually state the topic. The best sentences are then kept greedily until
+the budget is spent and returned in reading order, so the LLM gets a
+shorter, denser prompt instead of a blind head/tail cut.
+"""
+
+import re
+import numpy as np
+
+# ── Config ────────────────────────────────────────────────────────────────────
+TEXTRANK_DAMPING    = 0.85
+TEXTRANK_ITERATIONS = 30
+# Above this many sentences the n×n graph gets expensive — pre-filter by
+# similarity to the document centroid (linear) and rank only the survivors
+MAX_RANKED_SENTENCES = 600
+# Short fragments (slide titles, page numbers) carry too little to rank
+MIN_SENTENCE_WORDS = 4
+LEAD_BONUS = 0.15                 # decays over the first few sentences
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+_WORD           = re.compile(r"[a-z][a-z0-9\-]+")
+
+_STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before
+being below between both but by can could did do does doing down during each few for from
+further had has have having he her here hers herself him himself his how i if in into is it
+its itself just let me more most my myself no nor not now of off on once only or other our
+ours ourselves out over own same she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up very was we were
+what when where which while who whom why will with would you your yours yourself yourselves
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 chars per token — the same estimate the AI Engine pool budgets with."""
+    return (len(text) + 3) // 4
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in _SENTENCE_BREAK.split(text) if s and s.strip()]
+
+
+def _tfidf(sentences: list) -> tuple | None:
+    """L2-normalised TF-IDF, kept sparse: (rows, cols, values) with one entry
+    per distinct (sentence, term) pair, or None if no terms."""
+    vocab, rows, cols = {}, [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if word in _STOPWORDS:
+                continue
+            rows.append(i)
+            cols.append(vocab.setdefault(word, len(vocab)))
+    if not vocab:
+        return None
+
+    pairs, counts = np.unique(np.array([rows, cols]), axis=1, return_counts=True)
+    rows, cols = pairs
+    df = np.bincount(cols, minlength=len(vocab))
+    idf = np.log((1 + len(sentences)) / (1 + df)).astype(np.float32) + 1.0
+    values = np.log1p(counts).astype(np.float32) * idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=len(sentences)))
+    norms[norms == 0] = 1.0
+    return rows, cols, (values / norms[rows]).astype(np.float32)
+
+
+def _dense(rows: np.ndarray, cols: np.ndarray, values: np.ndarray, n_rows: int) -> np.ndarray:
+    """Densify TF-IDF entries over just the terms they use."""
+    terms, cols = np.unique(cols, return_inverse=True)
+    matrix = np.zeros((n_rows, len(terms)), dtype=np.float32)
+    matrix[rows, cols] = values
+    return matrix
+
+
+def _textrank(vectors: np.ndarray) -> np.ndarray:
+    """PageRank over the cosine-similarity graph of the sentence vectors."""
+    n = vectors.shape[0]
+    sim = vectors @ vectors.T
+    np.fill_diagonal(sim, 0.0)
+    out_weight = sim.sum(axis=1, keepdims=True)
+    out_weight[out_weight == 0] = 1.0
+    transition = (sim / out_weight).T            # column-stochastic
+    scores = np.full(n, 1.0 / n, dtype=np.float32)
+    for _ in range(TEXTRANK_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (transition @ scores)
+        if np.abs(updated - scores).sum() < 1e-6:
+            scores = updated
+            break
+        scores = updated
+    return scores
+
+
+def rank_sentences(sentences: list) -> np.ndarray:
+    """Importance score per sentence (same order as the input)."""
+    n = len(sentences)
+    scores = np.zeros(n, dtype=np.float32)
+    eligible = np.array([len(s.split()) >= MIN_SENTENCE_WORDS for s in sentences])
+    idx = np.flatnonzero(eligible)
+    if idx.size == 0:
+        return scores
+
+    entries = _tfidf([sentences[i] for i in idx])
+    if entries is None:
+        return scores
+    rows, cols, values = entries
+
+    if idx.size > MAX_RANKED_SENTENCES:
+        # Still sparse: nothing sentences × vocabulary is built for the cut
+        centroid = np.bincount(cols, weights=values) / idx.size
+        closeness = np.bincount(rows, weights=values * centroid[cols], minlength=idx.size)
+        keep = np.sort(np.argsort(closeness)[-MAX_RANKED_SENTENCES:])
+        position = np.full(idx.size, -1)
+        position[keep] = np.arange(keep.size)
+        kept = position[rows] >= 0
+        rows, cols, values = position[rows[kept]], cols[kept], values[kept]
+        idx = idx[keep]
+
+    ranked = _textrank(_dense(rows, cols, values, idx.size))
+    ranked = ranked / (ranked.max() or 1.0)
+    scores[idx] = ranked
+    lead = np.arange(n, dtype=np.float32)
+    scores += np.where(eligible, LEAD_BONUS / (1.0 + lead), 0.0).astype(np.float32)
+    return scores
+
+
+def select_sentences(text: str, max_tokens: int) -> str:
+    """Best sentences of text that fit in max_tokens, in original order.
+
+    Returns text unchanged when it already fits.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = split_sentences(text)
+    if not sentences:
+        return text[:max_tokens * 4]
+
+    scores = rank_sentences(sentences)
+    chosen, used = [], 0
+    for i in np.argsort(-scores, kind="stable"):
+        cost = estimate_tokens(sentences[i] + " ")      # + the joining space
+        if used + cost > max_tokens:
+            continue
+        chosen.append(int(i))
+        used += cost
+        if max_tokens - used < 8:
+            break
+    if not chosen:                                # one huge "sentence"
+        return sentences[int(np.argmax(scores))][:max_tokens * 4]
+    return " ".join(sentences[i] for i in sorted(chosen))
@@ -0,0 +1,181 @@
+"""
+PadaiSathi AI — ffmpeg render backend
+backend/app/ai/ffmpeg_renderer.py
+
+Renders the final video in ONE ffmpeg process instead of compositing every
+frame in Python with moviepy:
+
+    background ─ loop ─ scale ─┐
+    caption PNG ──────────────── overlay enable='between(t,start,end)' ─ … ─ libx264
+    narration MP3 ───────────────────────────────────────────────────────── aac
+
+Caption cards are the same Pillow renders the moviepy path uses
+(caption_renderer.py), written once per unique card as PNGs. Layout
+(size, centre line, timings, fps, codec, preset) matches
+video_generator.generate_video, so both backends produce the same video.
+
+The binary is FFMPEG_BINARY, else the one bundled with imageio-ffmpeg
+(a moviepy dependency), else `ffmpeg` on PATH.
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import subprocess
+
+from PIL import Image
+
+from .caption_renderer import render_caption
+
+# ── Config ────────────────────────────────────────────────────────────────────
+FFMPEG_BINARY  = os.getenv("FFMPEG_BINARY", "")
+FFMPEG_THREADS = int(os.getenv("FFMPEG_THREADS", "4"))
+FFMPEG_TIMEOUT = float(os.getenv("FFMPEG_TIMEOUT", "600"))
+OUTPUT_FPS     = 24
+MAX_HEIGHT     = 1080
+
+_STREAM_SIZE = re.compile(r"Video:.*?(\d{2,5})x(\d{2,5})")
+
+_ffmpeg_path = None
+
+
+def ffmpeg_binary() -> str | None:
+    """Path to a usable ffmpeg, or None if there isn't one."""
+    global _ffmpeg_path
+    if _ffmpeg_path is None:
+        path = FFMPEG_BINARY
+        if not path:
+            try:
+                import imageio_ffmpeg
+                path = imageio_ffmpeg.get_ffmpeg_exe()
+            except Exception:
+                path = shutil.which("ffmpeg") or ""
+        _ffmpeg_path = path
+        print(f"[FFmpeg] Binary: {path or 'not found'}")
+    return _ffmpeg_path or None
+
+
+def probe_size(path: str) -> tuple | None:
+    """(width, height) of the first video stream, parsed from `ffmpeg -i`."""
+    result = subprocess.run([ffmpeg_binary(), "-hide_banner", "-i", str(path)],
+                            capture_output=True, text=True, timeout=30)
+    m = _STREAM_SIZE.search(result.stderr)
+    return (int(m.group(1)), int(m.group(2))) if m else None
+
+
+def output_size(bg_size: tuple | None) -> tuple:
+    """Same rule as the moviepy path: anything over 1920×1080 is scaled to 1080p height."""
+    if not bg_size:
+        return 1920, 1080
+    w, h = bg_size
+    if w > 1920 or h > MAX_HEIGHT:
+        w, h = round(w * MAX_HEIGHT / h), MAX_HEIGHT
+    return w - w % 2, h - h % 2                      # libx264 + yuv420p need even sizes
+
+
+def _write_cards(timings: list, layout: dict, workdir: str) -> tuple:
+    """One PNG per unique caption text → (paths, [(card_index, timing)])."""
+    paths, index, uses = [], {}, []
+    for t in timings:
+        if t["end"] - t["start"] <= 0:
+            continue
+        key = t["text"].upper()
+        if key not in index:
+            card = render_caption(t["text"], layout["fontsize"], layout["stroke_w"],
+                                  layout["max_width"])
+            path = os.path.join(workdir, f"card_{len(paths)}.png")
+            Image.fromarray(card).save(path)
+            index[key] = len(paths)
+            paths.append(path)
+        uses.append((index[key], t))
+    return paths, uses
+
+
+def _filter_graph(size: tuple, n_cards: int, uses: list, layout: dict, has_bg: bool) -> str:
+    w, h = size
+    first_card = 2                                   # inputs: background, narration, cards…
+    lines = [
+        f"[0:v]scale={w}:{h},setsar=1,fps={OUTPUT_FPS},format=yuv420p[base0]"
+        if has_bg else f"[0:v]format=yuv420p[base0]"
+    ]
+
+    # A card used N times is split into N copies — an input pad feeds one overlay
+    counts = {}
+    for card, _ in uses:
+        counts[card] = counts.get(card, 0) + 1
+    copies = {}
+    for card in range(n_cards):
+        n = counts.get(card, 0)
+        if not n:
+            continue
+        labels = [f"c{card}_{k}" for k in range(n)]
+        copies[card] = labels
+        src = f"[{first_card + card}:v]"
+        lines.append(f"{src}{'split=' + str(n) if n > 1 else 'null'}" + "".join(f"[{l}]" for l in labels))
+
+    current = "base0"
+    for i, (card, t) in enumerate(uses):
+        nxt = f"base{i + 1}"
+        label = copies[card].pop()
+        lines.append(
+            f"[{current}][{label}]overlay=x=(W-w)/2:y={layout['caption_y']}-h/2:"
+            f"enable='between(t,{t['start']:.3f},{t['end']:.3f})'[{nxt}]"
+        )
+        current = nxt
+    lines.append(f"[{current}]null[vout]")
+    return ";\n".join(lines)
+
+
+def render(bg_path: str | None, audio_path: str, timings: list, duration: float,
+           out_path: str, layout_for, bg_start: float = 0.0, size: tuple | None = None) -> str:
+    """Compose background + captions + narration into out_path with one ffmpeg run.
+
+    layout_for: (width, height) → {"fontsize", "stroke_w", "max_width", "caption_y"},
+    so caption geometry is decided by video_generator exactly as for moviepy.
+    bg_start: where in the (looped) background to begin — pass a keyframe
+    (background_cache.keyframe_at_or_before) so the seek needs no decoding.
+    size: output (width, height) if the caller already knows it — skips the probe.
+    """
+    ffmpeg = ffmpeg_binary()
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg not available")
+
+    if size is None:
+        size = output_size(probe_size(bg_path) if bg_path else None)
+    layout = layout_for(size)
+    workdir = tempfile.mkdtemp(prefix="padaisathi_ffmpeg_")
+    try:
+        cards, uses = _write_cards(timings, layout, workdir)
+        graph_path = os.path.join(workdir, "graph.txt")
+        with open(graph_path, "w", encoding="utf-8") as f:
+            f.write(_filter_graph(size, len(cards), uses, layout, has_bg=bool(bg_path)))
+
+        cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y"]
+        if bg_path:
+            if bg_start > 0:
+                cmd += ["-ss", f"{bg_start:.3f}"]
+            cmd += ["-stream_loop", "-1", "-i", str(bg_path)]
+        else:
+            cmd += ["-f", "lavfi", "-i", f"color=c=black:s={size[0]}x{size[1]}:r={OUTPUT_FPS}"]
+        cmd += ["-i", str(audio_path)]
+        for card in cards:
+            cmd += ["-i", card]
+        cmd += [
+            "-filter_complex_script", graph_path,
+            "-map", "[vout]", "-map", "1:a",
+            "-t", f"{duration:.3f}",
+            "-r", str(OUTPUT_FPS),
+            "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+            "-threads", str(FFMPEG_THREADS),
+            "-c:a", "aac",
+            "-movflags", "+faststart",
+            str(out_path),
+        ]
+        print(f"[FFmpeg] Rendering {len(uses)} captions ({len(cards)} unique) at {size[0]}x{size[1]} → {out_path}")
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=FFMPEG_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited {result.returncode}: {result.stderr.strip()[-500:]}")
+        return out_path
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,90 @@
+"""
+PadaiSathi AI — Keyword / distractor index
+backend/app/ai/keywords.py
+
+One vectorised pass over a lecture that yields everything the quiz fallback
+needs: the top terms (same scoring as the old dict loop — one point per
+occurrence, 1.3 when capitalised) and, for each term, its closest terms by
+sentence co-occurrence. Those neighbours make much better MCQ distractors
+than random keywords: "mitochondria" gets "chloroplast" and "ribosome", not
+"homework".
+
+The index is a plain JSON-able dict, built once per document at upload
+(document_index.store_document_index) and reused by every quiz request.
+"""
+
+import re
+import numpy as np
+
+# ── Config ────────────────────────────────────────────────────────────────────
+KEYWORD_INDEX_TERMS = 60      # terms kept per document
+KEYWORD_NEIGHBOURS  = 10      # close terms stored per term
+CAPITALISED_BONUS   = 0.3
+
+STOPWORDS = {
+    "the","a","an","is","are","was","were","be","been","being","have","has","had",
+    "do","does","did","will","would","could","should","may","might","shall","can",
+    "of","in","on","at","to","for","with","by","from","up","about","into","through",
+    "that","this","these","those","it","its","they","them","their","he","she","we",
+    "you","i","me","my","your","our","his","her","also","which","when","where","how",
+    "what","who","as","or","and","but","if","then","than","so","not","no","nor",
+    "each","all","both","such","more","most","other","same","only","just","very",
+}
+
+_WORD           = re.compile(r"[^\W\d_]+")
+_SENTENCE_BREAK = re.compile(r"[.!?]+\s+|\n\s*\n")
+
+
+def build_keyword_index(text: str, top_n: int = KEYWORD_INDEX_TERMS,
+                        neighbours: int = KEYWORD_NEIGHBOURS) -> dict:
+    """{"terms": [...ranked...], "neighbours": {term: [close terms]}}."""
+    empty = {"terms": [], "neighbours": {}}
+    if not text:
+        return empty
+
+    words, capitalised, sentence_ids = [], [], []
+    for sid, sentence in enumerate(_SENTENCE_BREAK.split(text)):
+        for w in _WORD.findall(sentence):
+            words.append(w.lower())
+            capitalised.append(w[0].isupper())
+            sentence_ids.append(sid)
+    if not words:
+        return empty
+
+    vocab, inverse = np.unique(np.array(words), return_inverse=True)
+    keep = np.array([len(w) > 3 and w not in STOPWORDS for w in vocab])
+    weights = 1.0 + CAPITALISED_BONUS * np.array(capitalised, dtype=np.float32)
+    scores = np.bincount(inverse, weights=weights, minlength=len(vocab))
+    scores[~keep] = 0.0
+
+    ranked = [i for i in np.argsort(-scores, kind="stable")[:top_n] if scores[i] > 0]
+    if not ranked:
+        return empty
+    terms = [str(vocab[i]) for i in ranked]
+
+    # Sentence × term incidence for the kept terms → cosine of co-occurrence
+    column = np.full(len(vocab), -1)
+    column[ranked] = np.arange(len(ranked))
+    cols = column[inverse]
+    mask = cols >= 0
+    incidence = np.zeros((max(sentence_ids) + 1, len(ranked)), dtype=np.float32)
+    incidence[np.array(sentence_ids)[mask], cols[mask]] = 1.0
+    cooc = incidence.T @ incidence
+    np.fill_diagonal(cooc, 0.0)
+    norms = np.linalg.norm(cooc, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    profiles = cooc / norms
+    similarity = profiles @ profiles.T
+    np.fill_diagonal(similarity, -1.0)
+
+    close = {}
+    for i, term in enumerate(terms):
+        order = np.argsort(-similarity[i], kind="stable")[:neighbours]
+        close[term] = [terms[j] for j in order if similarity[i, j] > 0]
+    return {"terms": terms, "neighbours": close}
+
+
+def chunk_keywords(chunk: str, index: dict, top_n: int = 8) -> list:
+    """Index terms that occur in chunk, best first — no re-scoring of the text."""
+    present = {w.lower() for w in _WORD.findall(chunk)}
+    return [t for t in index.get("terms", []) if t in present][:top_n]
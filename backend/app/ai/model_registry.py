@@ -0,0 +1,116 @@
+"""
+PadaiSathi AI — Model Registry
+backend/app/ai/model_registry.py
+
+One place that owns every heavyweight model in the process.
+
+Models are registered with a loader function and only loaded the first
+time something asks for them (or by warm_up() in a background thread).
+Each model is loaded at most once per process, however many request
+threads ask for it at the same time, and its load time is recorded so
+/api/health and /api/ready can report it. A model that fails to load is not
+retried for MODEL_RETRY_SECONDS — until then get() re-raises the error at
+once instead of stalling every request on another multi-hundred-MB load.
+"""
+
+import os
+import threading
+import time
+
+MODEL_RETRY_SECONDS = float(os.getenv("MODEL_RETRY_SECONDS", "300"))
+
+_registry = {}                 # name → {"loader", "lock", "model", "status", "load_seconds", "error", "failed_at"}
+_registry_lock = threading.Lock()
+
+
+def register(name: str, loader):
+    """Register a zero-arg loader. Nothing is loaded until get()/warm_up()."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = {
+                "loader":       loader,
+                "lock":         threading.Lock(),
+                "model":        None,
+                "status":       "not_loaded",   # not_loaded | loading | ready | failed
+                "load_seconds": None,
+                "error":        None,
+                "failed_at":    None,           # time.monotonic() of the last failed load
+            }
+
+
+def _retry_in(entry: dict) -> float:
+    """Seconds until a failed model may be loaded again (0 = now)."""
+    if entry["status"] != "failed" or entry["failed_at"] is None:
+        return 0.0
+    return max(entry["failed_at"] + MODEL_RETRY_SECONDS - time.monotonic(), 0.0)
+
+
+def _raise_failed(name: str, entry: dict):
+    raise RuntimeError(f"Model '{name}' failed to load ({entry['error']}); "
+                       f"next retry in {_retry_in(entry):.0f}s")
+
+
+def get(name: str):
+    """Return the loaded model, loading it on first use. Raises if loading
+    fails, and keeps raising without retrying for MODEL_RETRY_SECONDS."""
+    entry = _registry[name]
+    if entry["status"] == "ready":
+        return entry["model"]
+    if _retry_in(entry) > 0:
+        _raise_failed(name, entry)
+    with entry["lock"]:
+        if entry["status"] == "ready":          # another thread finished first
+            return entry["model"]
+        if _retry_in(entry) > 0:                # another thread just failed
+            _raise_failed(name, entry)
+        entry["status"] = "loading"
+        print(f"[ModelRegistry] Loading '{name}'...")
+        started = time.time()
+        try:
+            entry["model"] = entry["loader"]()
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+            entry["failed_at"] = time.monotonic()
+            print(f"[ModelRegistry] '{name}' failed to load: {e} — retrying in {MODEL_RETRY_SECONDS:.0f}s at the earliest")
+            raise
+        entry["load_seconds"] = round(time.time() - started, 2)
+        entry["status"] = "ready"
+        entry["error"] = None
+        entry["failed_at"] = None
+        print(f"[ModelRegistry] '{name}' ready in {entry['load_seconds']}s ✅")
+        return entry["model"]
+
+
+def is_ready(name: str) -> bool:
+    entry = _registry.get(name)
+    return bool(entry) and entry["status"] == "ready"
+
+
+def warm_up(names: list) -> threading.Thread:
+    """Load the given models in a daemon thread so startup isn't blocked."""
+    def _run():
+        for name in names:
+            if name not in _registry:
+                print(f"[ModelRegistry] Unknown model '{name}' — skipping warm-up")
+                continue
+            try:
+                get(name)
+            except Exception:
+                pass                            # already logged; status says failed
+
+    t = threading.Thread(target=_run, name="model-warmup", daemon=True)
+    t.start()
+    return t
+
+
+def status() -> dict:
+    return {
+        name: {
+            "status":       e["status"],
+            "load_seconds": e["load_seconds"],
+            "error":        e["error"],
+            "retry_in":     round(_retry_in(e), 1) if e["status"] == "failed" else None,
+        }
+        for name, e in _registry.items()
+    }
@@ -4,36 +4,162 @@ Place at:  backend/app/ai/pdf_extractor.py
 
 Supports PDF, PPTX, and TXT files.
 Tries PyMuPDF first (better quality), falls back to PyPDF2 for PDFs.
+
+Extraction is CPU-bound and holds the GIL, so the API runs it through
+submit_extraction(): a coordinator thread splits big PDFs into page ranges
+and fans them out over a process pool, each worker opening the file itself.
+Results come back per page, so later steps never need to re-extract.
 """
 
 import os
 import re
-
-
-def extract_text_from_pdf(filepath: str) -> str:
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+
+# ── Config ────────────────────────────────────────────────────────────────────
+EXTRACT_PROCESSES = int(os.getenv("EXTRACT_PROCESSES", "2"))
+# Below this many pages a PDF is extracted by one worker — not worth the fan-out
+EXTRACT_MIN_PAGES_PER_TASK = int(os.getenv("EXTRACT_MIN_PAGES_PER_TASK", "16"))
+
+_pool = None
+_coordinator = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork — the API process is full of threads
+            _pool = ProcessPoolExecutor(
+                max_workers=max(EXTRACT_PROCESSES, 1),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _get_coordinator() -> ThreadPoolExecutor:
+    global _coordinator
+    with _pool_lock:
+        if _coordinator is None:
+            _coordinator = ThreadPoolExecutor(max_workers=4, thread_name_prefix="extract")
+        return _coordinator
+
+
+def submit_extraction(filepath: str, postprocess=None) -> Future:
+    """Run extract_document(filepath, postprocess) off the request path. Future → dict."""
+    return _get_coordinator().submit(extract_document, filepath, postprocess)
+
+
+def shutdown_extraction_pool():
+    global _pool, _coordinator
+    with _pool_lock:
+        if _coordinator is not None:
+            _coordinator.shutdown(wait=False, cancel_futures=True)
+            _coordinator = None
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ── Page-parallel extraction ──────────────────────────────────────────────────
+def extract_document(filepath: str, postprocess=None) -> dict:
     """
-    Extract and clean text from a PDF, PPTX or TXT file.
-    Returns cleaned string ready for summarization.
+    Extract a PDF, PPTX or TXT file page by page using the process pool.
+    Returns {"text": cleaned full text, "pages": [cleaned text per page]}.
+    PPTX pages are slides; a TXT file is a single page.
+
+    postprocess: optional module-level function of the pages, also run in the
+    pool; its return value is added as result["index"] (None if it raised —
+    the text is still good without it).
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"File not found: {filepath}")
 
     ext = os.path.splitext(filepath)[1].lower()
+    pool = _get_pool()
 
-    if ext == ".txt":
-        raw = _extract_txt(filepath)
-    elif ext == ".pptx":
-        raw = _extract_pptx(filepath)
+    if ext in (".txt", ".pptx"):
+        raw_pages = pool.submit(_extract_raw_pages, filepath).result()
     else:
-        raw = _try_pymupdf(filepath) or _try_pypdf2(filepath)
-
-    if not raw or not raw.strip():
+        page_count = _pdf_page_count(filepath)
+        tasks = min(max(EXTRACT_PROCESSES, 1), max(page_count // EXTRACT_MIN_PAGES_PER_TASK, 1))
+        step = -(-page_count // tasks) if page_count else 0
+        ranges = [(i, min(i + step, page_count)) for i in range(0, page_count, step or 1)]
+        futures = [pool.submit(_pdf_page_range, filepath, a, b) for a, b in ranges]
+        raw_pages = [page for fut in futures for page in fut.result()]
+        print(f"[PDFExtractor] {page_count} pages in {len(ranges)} parallel range(s)")
+
+    result = _assemble(raw_pages)
+    if postprocess is not None:
+        try:
+            result["index"] = pool.submit(postprocess, result["pages"]).result()
+        except Exception as e:
+            print(f"[PDFExtractor] Post-processing failed for {os.path.basename(filepath)}: {e}")
+            result["index"] = None
+    return result
+
+
+def extract_pages(filepath: str) -> list:
+    """Cleaned text of every page, extracted in this process."""
+    return _assemble(_extract_raw_pages(filepath))["pages"]
+
+
+def _assemble(raw_pages: list) -> dict:
+    pages = [_clean(p) for p in raw_pages]
+    text = "\n\n".join(p for p in pages if p)
+    if not text.strip():
         raise ValueError(
             "Could not extract text from this file. "
             "It may be empty or in an unsupported format."
         )
+    return {"text": text, "pages": pages}
 
-    return _clean(raw)
+
+def _extract_raw_pages(filepath: str) -> list:
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".txt":
+        return [_extract_txt(filepath)]
+    if ext == ".pptx":
+        return _extract_pptx_slides(filepath)
+    return _pdf_page_range(filepath, 0, _pdf_page_count(filepath))
+
+
+def _pdf_page_count(filepath: str) -> int:
+    try:
+        import fitz
+        with fitz.open(filepath) as doc:
+            return doc.page_count
+    except ImportError:
+        pass
+    except Exception as e:
+        print(f"[PDFExtractor] PyMuPDF page count error: {e}")
+    try:
+        import PyPDF2
+        with open(filepath, "rb") as f:
+            return len(PyPDF2.PdfReader(f).pages)
+    except Exception as e:
+        print(f"[PDFExtractor] PyPDF2 page count error: {e}")
+    return 0
+
+
+def _pdf_page_range(filepath: str, start: int, stop: int) -> list:
+    """Raw text of pages [start, stop). Runs inside a pool worker."""
+    pages = _try_pymupdf_pages(filepath, start, stop)
+    if not any(p.strip() for p in pages):
+        pages = _try_pypdf2_pages(filepath, start, stop)
+    return pages
+
+
+def extract_text_from_pdf(filepath: str) -> str:
+    """
+    Extract and clean text from a PDF, PPTX or TXT file.
+    Returns cleaned string ready for summarization.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"File not found: {filepath}")
+    return _assemble(_extract_raw_pages(filepath))["text"]
 
 
 def _extract_txt(filepath: str) -> str:
@@ -46,63 +172,65 @@ def _extract_txt(filepath: str) -> str:
 
 def _extract_pptx(filepath: str) -> str:
     """Extract text from a .pptx file (all slides, all shapes)."""
+    return "\n".join(s for s in _extract_pptx_slides(filepath) if s)
+
+
+def _extract_pptx_slides(filepath: str) -> list:
+    """Text of each slide of a .pptx file, one string per slide."""
     try:
         from pptx import Presentation
         prs = Presentation(filepath)
-        parts = []
+        slides = []
         for slide in prs.slides:
+            parts = []
             for shape in slide.shapes:
                 if shape.has_text_frame:
                     for para in shape.text_frame.paragraphs:
                         line = " ".join(run.text for run in para.runs).strip()
                         if line:
                             parts.append(line)
-        text = "\n".join(parts)
-        print(f"[Extractor] PPTX: {len(text)} chars")
-        return text
+            slides.append("\n".join(parts))
+        print(f"[Extractor] PPTX: {len(slides)} slides, {sum(len(t) for t in slides)} chars")
+        return slides
     except ImportError:
         raise ImportError("python-pptx is required for PPTX support. Run: pip install python-pptx")
     except Exception as e:
         print(f"[Extractor] PPTX error: {e}")
-        return ""
+        return []
 
 
-def _try_pymupdf(filepath: str) -> str:
+def _try_pymupdf_pages(filepath: str, start: int, stop: int) -> list:
     """Best quality extractor. pip install pymupdf"""
     try:
         import fitz
-        parts = []
         with fitz.open(filepath) as doc:
-            for page in doc:
-                parts.append(page.get_text("text"))
-        text = "\n".join(parts)
-        if text.strip():
-            print(f"[PDFExtractor] PyMuPDF: {len(text)} chars")
-            return text
+            pages = [doc[i].get_text("text") for i in range(start, min(stop, doc.page_count))]
+        if any(p.strip() for p in pages):
+            print(f"[PDFExtractor] PyMuPDF: pages {start}-{stop}, {sum(len(p) for p in pages)} chars")
+        return pages
     except ImportError:
         pass
     except Exception as e:
         print(f"[PDFExtractor] PyMuPDF error: {e}")
-    return ""
+    return []
 
 
-def _try_pypdf2(filepath: str) -> str:
+def _try_pypdf2_pages(filepath: str, start: int, stop: int) -> list:
     """Fallback — uses your existing PyPDF2 install."""
     try:
         import PyPDF2
-        text = ""
         with open(filepath, "rb") as f:
             reader = PyPDF2.PdfReader(f)
-            for page in reader.pages:
-                text += (page.extract_text() or "") + "\n"
-        if text.strip():
-            print(f"[PDFExtractor] PyPDF2: {len(text)} chars")
-            return text
+            pages = [(reader.pages[i].extract_text() or "")
+                     for i in range(start, min(stop, len(reader.pages)))]
+        if any(p.strip() for p in pages):
+            print(f"[PDFExtractor] PyPDF2: pages {start}-{stop}, {sum(len(p) for p in pages)} chars")
+        return pages
     except ImportError:
         pass
     except Exception as e:
         print(f"[PDFExtractor] PyPDF2 error: {e}")
-    return ""
+    return []
 
 
 def _clean(text: str) -> str:
@@ -2,17 +2,21 @@
 PadaiSathi AI — Flashcard & Quiz Generator
 backend/app/ai/quiz_generator.py
 
-Uses the fine-tuned Flan-T5 model (via summarizer._generate) for
+Uses the fine-tuned Flan-T5 model (via summarizer._generate_batch) for
 all flashcard and MCQ generation instead of the old rule-based pipeline.
 """
 
 import re
 import random
 from typing import List
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# Import the model's generate function and chunker from summarizer
-# _generate() runs your Flan-T5 with whatever prefix you pass
-from .summarizer import _generate, _chunk_text, _PADAISATHI_AI_KEYS
+# Import the model's generate function from summarizer
+# _generate_batch() runs your Flan-T5 on a list of prompts in padded batches
+from .summarizer import _generate_batch
+from .chunker import chunk_text, pick_chunks, STUDY_CHUNK_TOKENS
+from .keywords import build_keyword_index, chunk_keywords
+from .engine_pool import chat_completion, _PADAISATHI_AI_KEYS
 
 
 def _ai_engine_flashcards(text: str, n: int = 8) -> list:
@@ -20,50 +24,38 @@ def _ai_engine_flashcards(text: str, n: int = 8) -> list:
     if not _PADAISATHI_AI_KEYS:
         return []
     try:
-        from groq import Groq
-        for key in _PADAISATHI_AI_KEYS:
-            try:
-                client = Groq(api_key=key)
-                prompt = f"""Generate {n} flashcards from the following text.
+        prompt = f"""Generate {n} flashcards from the following text.
 For each flashcard use exactly this format:
 Q: [question]
 A: [answer]
 
 Text:
 {text[:3000]}"""
-                response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=1000,
-                    temperature=0.7,
-                )
-                raw = response.choices[0].message.content
-                print(f"[QuizGen] PadaiSathi AI Engine flashcard response: {len(raw)} chars")
-                cards = []
-                for block in re.split(r'\n(?=Q:)', raw.strip()):
-                    m = re.search(r'Q:\s*(.+?)\s*A:\s*(.+)', block, re.DOTALL)
-                    if m:
-                        cards.append({"question": m.group(1).strip(), "answer": m.group(2).strip()})
-                if cards:
-                    return cards[:n]
-            except Exception as e:
-                print(f"[QuizGen] PadaiSathi AI Engine flashcard attempt failed: {e}")
-                continue
+        raw = chat_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=1000,
+            temperature=0.7,
+            label="flashcard",
+        )
+        print(f"[QuizGen] PadaiSathi AI Engine flashcard response: {len(raw)} chars")
+        cards = []
+        for block in re.split(r'\n(?=Q:)', raw.strip()):
+            m = re.search(r'Q:\s*(.+?)\s*A:\s*(.+)', block, re.DOTALL)
+            if m:
+                cards.append({"question": m.group(1).strip(), "answer": m.group(2).strip()})
+        if cards:
+            return cards[:n]
     except Exception as e:
         print(f"[QuizGen] PadaiSathi AI Engine flashcard fallback failed: {e}")
     return []
 
 
-def _ai_engine_quiz(text: str, n: int = 8) -> list:
+def _ai_engine_quiz(text: str, n: int = 8, keyword_index: dict = None) -> list:
     """Fallback: generate MCQ quiz using PadaiSathi AI Engine if Flan-T5 fails."""
     if not _PADAISATHI_AI_KEYS:
         return []
     try:
-        from groq import Groq
-        for key in _PADAISATHI_AI_KEYS:
-            try:
-                client = Groq(api_key=key)
-                prompt = f"""You are a professional exam question writer. Generate {n} high-quality multiple choice questions from the following text.
+        prompt = f"""You are a professional exam question writer. Generate {n} high-quality multiple choice questions from the following text.
 
 Rules:
 - Each question must be a proper exam-style question (e.g. "Which of the following...", "What is the primary purpose of...", "How does X work?")
@@ -81,25 +73,21 @@ Answer: [A/B/C/D]
 
 Text:
 {text[:3000]}"""
-                response = client.chat.completions.create(
-                    model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=1000,
-                    temperature=0.7,
-                )
-                raw = response.choices[0].message.content
-                print(f"[QuizGen] PadaiSathi AI Engine quiz response: {len(raw)} chars")
-                questions = []
-                all_keywords = _extract_keywords(text, top_n=30)
-                for block in re.split(r'\n(?=Question:)', raw.strip()):
-                    q = _parse_mcq(block, text[:200], all_keywords)
-                    if q:
-                        questions.append(q)
-                if questions:
-                    return questions[:n]
-            except Exception as e:
-                print(f"[QuizGen] PadaiSathi AI Engine quiz attempt failed: {e}")
-                continue
+        raw = chat_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=1000,
+            temperature=0.7,
+            label="quiz",
+        )
+        print(f"[QuizGen] PadaiSathi AI Engine quiz response: {len(raw)} chars")
+        questions = []
+        keyword_index = keyword_index or build_keyword_index(text)
+        for block in re.split(r'\n(?=Question:)', raw.strip()):
+            q = _parse_mcq(block, text[:200], keyword_index)
+            if q:
+                questions.append(q)
+        if questions:
+            return questions[:n]
     except Exception as e:
         print(f"[QuizGen] PadaiSathi AI Engine quiz fallback failed: {e}")
     return []
@@ -146,7 +134,7 @@ def _parse_flashcard(raw: str, fallback_chunk: str) -> dict:
 
 # ─── Parse MCQ output ─────────────────────────────────────────────────────────
 
-def _parse_mcq(raw: str, fallback_chunk: str, all_keywords: List[str]) -> dict:
+def _parse_mcq(raw: str, fallback_chunk: str, keyword_index: dict) -> dict:
     """
     Try to extract MCQ from model output.
     Expected formats:
@@ -178,17 +166,17 @@ def _parse_mcq(raw: str, fallback_chunk: str, all_keywords: List[str]) -> dict:
         }
 
     # Fallback — build from keywords
-    return _keyword_mcq_fallback(fallback_chunk, all_keywords)
+    return _keyword_mcq_fallback(fallback_chunk, keyword_index)
 
 
-def _keyword_mcq_fallback(chunk: str, all_keywords: List[str]) -> dict:
+def _keyword_mcq_fallback(chunk: str, keyword_index: dict) -> dict:
     """Last-resort MCQ built from keyword extraction when model output can't be parsed."""
     sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', chunk) if len(s.strip()) > 40]
     sentence  = sentences[0] if sentences else chunk[:150]
 
-    keywords = _extract_keywords(chunk, top_n=8)
+    keywords = chunk_keywords(chunk, keyword_index)
     if not keywords:
-        keywords = all_keywords[:8]
+        keywords = keyword_index["terms"][:8]
 
     keyword = keywords[0] if keywords else "this concept"
     pattern = re.compile(re.escape(keyword), re.IGNORECASE)
@@ -196,7 +184,7 @@ def _keyword_mcq_fallback(chunk: str, all_keywords: List[str]) -> dict:
     if "__________" not in stem:
         stem = f"Which term best fits: '{sentence[:80]}...'"
 
-    distractors = _generate_distractors(keyword, all_keywords, num=3)
+    distractors = _generate_distractors(keyword, keyword_index, num=3, stem=sentence)
     correct_pos = random.randint(0, 3)
     options = distractors[:3]
     options.insert(correct_pos, keyword.capitalize())
@@ -210,41 +198,50 @@ def _keyword_mcq_fallback(chunk: str, all_keywords: List[str]) -> dict:
 
 # ─── Helpers (kept lean — only used for fallback) ────────────────────────────
 
-STOPWORDS = {
-    "the","a","an","is","are","was","were","be","been","being","have","has","had",
-    "do","does","did","will","would","could","should","may","might","shall","can",
-    "of","in","on","at","to","for","with","by","from","up","about","into","through",
-    "that","this","these","those","it","its","they","them","their","he","she","we",
-    "you","i","me","my","your","our","his","her","also","which","when","where","how",
-    "what","who","as","or","and","but","if","then","than","so","not","no","nor",
-    "each","all","both","such","more","most","other","same","only","just","very",
-}
-
-def _extract_keywords(text: str, top_n: int = 8) -> List[str]:
-    text_clean = re.sub(r'[^\w\s]', ' ', text)
-    words = text_clean.split()
-    scored = {}
-    for w in words:
-        w_low = w.lower()
-        if w_low not in STOPWORDS and len(w_low) > 3 and w_low.isalpha():
-            bonus = 1.3 if w[0].isupper() else 1.0
-            scored[w_low] = scored.get(w_low, 0) + bonus
-    return [w for w, _ in sorted(scored.items(), key=lambda x: -x[1])[:top_n]]
-
-def _generate_distractors(correct: str, pool: List[str], num: int = 3) -> List[str]:
-    pool = [k for k in pool if k.lower() != correct.lower()]
+def _generate_distractors(correct: str, keyword_index: dict, num: int = 3, stem: str = "") -> List[str]:
+    """Closest co-occurring terms first, then other document keywords.
+
+    Terms already in the question stem are skipped — they would give the answer away.
+    """
+    skip = {correct.lower()} | set(chunk_keywords(stem, keyword_index, top_n=len(keyword_index["terms"])))
+    close = [k for k in keyword_index["neighbours"].get(correct.lower(), []) if k not in skip]
+    pool = [k for k in keyword_index["terms"][:30] if k not in skip and k not in close]
     random.shuffle(pool)
-    distractors = pool[:num]
+    distractors = (close[:num] + pool)[:num]
     fillers = ["None of the above", "All of the above", "Cannot be determined"]
     while len(distractors) < num:
         distractors.append(fillers[len(distractors) % len(fillers)])
     return [d.capitalize() for d in distractors[:num]]
 
 
+def _generate_each(prompts: list, label: str) -> list:
+    """_generate_batch() with a per-prompt fallback.
+
+    One bad input (or an OOM on the padded batch) shouldn't cost every item
+    in it, so if the batch fails each prompt is retried on its own. Prompts
+    that still fail come back as None.
+    """
+    try:
+        return _generate_batch(prompts)
+    except Exception as e:
+        print(f"[QuizGen] {label} batch error: {e} — retrying one at a time")
+    raws = []
+    for prompt in prompts:
+        try:
+            raws.append(_generate_batch([prompt])[0])
+        except Exception as e:
+            print(f"[QuizGen] {label} error: {e}")
+            raws.append(None)
+    return raws
+
+
 # ─── Flashcards-only pipeline ─────────────────────────────────────────────────
 
-def generate_only_flashcards(text: str, n: int = 8) -> list:
-    """Runs ONLY flashcard generation — tries AI Engine first, then Flan-T5 fallback."""
+def generate_only_flashcards(text: str, n: int = 8, prepared: dict = None) -> list:
+    """Runs ONLY flashcard generation — tries AI Engine first, then Flan-T5 fallback.
+
+    prepared: output of prepare_study_text(), to reuse an existing chunking pass.
+    """
     print("[QuizGen] Flashcard-only pipeline starting...")
 
     # Try AI Engine first
@@ -256,23 +253,18 @@ def generate_only_flashcards(text: str, n: int = 8) -> list:
 
     # Fallback to Flan-T5
     print("[QuizGen] Falling back to Flan-T5...")
-    chunks = _chunk_text(text, chunk_size=400)
-    if not chunks:
-        chunks = [text[:400]]
+    chunks = (prepared or prepare_study_text(text))["chunks"]
 
     flashcards = []
-    chunk_cycle = chunks * 4
+    chunk_cycle = pick_chunks(chunks, n)
 
-    for i, chunk in enumerate(chunk_cycle):
-        if len(flashcards) >= n:
-            break
-        print(f"[QuizGen] FC chunk {i+1}...")
-        try:
-            raw = _generate(f"[FLASHCARD] {chunk}")
-            print(f"[QuizGen] raw: {raw[:80]}")
-            flashcards.append(_parse_flashcard(raw, chunk))
-        except Exception as e:
-            print(f"[QuizGen] FC error: {e}")
+    print(f"[QuizGen] FC batch of {len(chunk_cycle)} chunks...")
+    raws = _generate_each([f"[FLASHCARD] {chunk}" for chunk in chunk_cycle], "FC")
+    for chunk, raw in zip(chunk_cycle, raws):
+        if raw is None:
+            continue
+        print(f"[QuizGen] raw: {raw[:80]}")
+        flashcards.append(_parse_flashcard(raw, chunk))
 
     print(f"[QuizGen] Done: {len(flashcards)} flashcards")
     return flashcards[:n]
@@ -280,57 +272,99 @@ def generate_only_flashcards(text: str, n: int = 8) -> list:
 
 # ─── Quiz-only pipeline ────────────────────────────────────────────────────────
 
-def generate_only_quiz(text: str, n: int = 8) -> list:
-    """Runs ONLY MCQ generation — tries AI Engine first, then Flan-T5 fallback."""
+def generate_only_quiz(text: str, n: int = 8, prepared: dict = None) -> list:
+    """Runs ONLY MCQ generation — tries AI Engine first, then Flan-T5 fallback.
+
+    prepared: output of prepare_study_text(), to reuse an existing chunking pass.
+    """
     print("[QuizGen] Quiz-only pipeline starting...")
+    prepared = prepared or prepare_study_text(text)
+    keyword_index = prepared["keyword_index"]
 
     # Try AI Engine first
     print("[QuizGen] Trying PadaiSathi AI Engine for quiz...")
-    ai_quiz = _ai_engine_quiz(text, n)
+    ai_quiz = _ai_engine_quiz(text, n, keyword_index)
     if ai_quiz:
         print(f"[QuizGen] PadaiSathi AI Engine returned {len(ai_quiz)} questions")
         return ai_quiz[:n]
 
     # Fallback to Flan-T5
     print("[QuizGen] Falling back to Flan-T5...")
-    chunks = _chunk_text(text, chunk_size=400)
-    if not chunks:
-        chunks = [text[:400]]
+    chunks = prepared["chunks"]
 
-    all_keywords = _extract_keywords(text, top_n=30)
     quiz = []
-    chunk_cycle = chunks * 4
+    chunk_cycle = pick_chunks(chunks, n)
 
-    for i, chunk in enumerate(chunk_cycle):
-        if len(quiz) >= n:
-            break
-        print(f"[QuizGen] MCQ chunk {i+1}...")
-        try:
-            raw = _generate(f"[QUIZ_MCQ] {chunk}")
-            print(f"[QuizGen] raw: {raw[:80]}")
-            quiz.append(_parse_mcq(raw, chunk, all_keywords))
-        except Exception as e:
-            print(f"[QuizGen] MCQ error: {e}")
+    print(f"[QuizGen] MCQ batch of {len(chunk_cycle)} chunks...")
+    raws = _generate_each([f"[QUIZ_MCQ] {chunk}" for chunk in chunk_cycle], "MCQ")
+    for chunk, raw in zip(chunk_cycle, raws):
+        if raw is None:
+            continue
+        print(f"[QuizGen] raw: {raw[:80]}")
+        quiz.append(_parse_mcq(raw, chunk, keyword_index))
 
     if len(quiz) < n:
         print("[QuizGen] Flan-T5 insufficient, trying PadaiSathi AI Engine...")
-        ai_quiz = _ai_engine_quiz(text, n - len(quiz))
+        ai_quiz = _ai_engine_quiz(text, n - len(quiz), keyword_index)
         quiz.extend(ai_quiz)
 
     if len(quiz) < n:
         print("[QuizGen] Using keyword fallback for remaining questions...")
         while len(quiz) < n:
-            quiz.append(_keyword_mcq_fallback(text, all_keywords))
+            quiz.append(_keyword_mcq_fallback(text, keyword_index))
 
     print(f"[QuizGen] Done: {len(quiz)} quiz questions")
     return quiz[:n]
 
 
+# ─── Study pack (parallel fan-out) ────────────────────────────────────────────
+
+def prepare_study_text(text: str = None, chunks: list = None, keyword_index: dict = None) -> dict:
+    """One chunking + keyword pass shared by every generator in a study pack.
+
+    Pass chunks and keyword_index (e.g. from the document index) to skip
+    re-chunking and re-scanning the text.
+    """
+    if chunks is None:
+        chunks = chunk_text(text, STUDY_CHUNK_TOKENS) or [text[:1000]]
+    if keyword_index is None:
+        keyword_index = build_keyword_index(text if text is not None else " ".join(chunks))
+    return {
+        "chunks":        chunks,
+        "keyword_index": keyword_index,
+    }
+
+
+def iter_study_pack(text: str, n_flashcards: int = 8, n_quiz: int = 8, extra_parts: dict = None,
+                    prepared: dict = None):
+    """Run flashcards, MCQs and any extra_parts ({name: zero-arg fn}) at once.
+
+    Yields (part, result, error) in the order the parts finish, so callers can
+    hand each one to the student as soon as it is ready. Total time is roughly
+    the slowest part instead of the sum of all of them.
+    """
+    prepared = prepared or prepare_study_text(text)
+    tasks = {
+        "flashcards": lambda: generate_only_flashcards(text, n_flashcards, prepared),
+        "quiz":       lambda: generate_only_quiz(text, n_quiz, prepared),
+        **(extra_parts or {}),
+    }
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="study-pack") as pool:
+        futures = {pool.submit(fn): part for part, fn in tasks.items()}
+        for fut in as_completed(futures):
+            part = futures[fut]
+            try:
+                yield part, fut.result(), None
+            except Exception as e:
+                print(f"[QuizGen] Study pack part '{part}' failed: {e}")
+                yield part, None, str(e)
+
+
 # ─── Combined (kept for backward compatibility) ───────────────────────────────
 
 def generate_flashcards_and_quiz(text: str, n_flashcards: int = 8, n_quiz: int = 8) -> dict:
-    """Kept so nothing breaks if called elsewhere. Prefer the split functions."""
-    return {
-        "flashcards": generate_only_flashcards(text, n_flashcards),
-        "quiz":       generate_only_quiz(text, n_quiz),
-    }
\ No newline at end of file
+    """Kept so nothing breaks if called elsewhere. Runs both parts in parallel."""
+    pack = {"flashcards": [], "quiz": []}
+    for part, result, _ in iter_study_pack(text, n_flashcards, n_quiz):
+        pack[part] = result or []
+    return pack
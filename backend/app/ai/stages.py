@@ -0,0 +1,102 @@
+"""
+PadaiSathi AI — Stage DAG runner
+backend/app/ai/stages.py
+
+Runs a pipeline declared as named stages with dependencies, starting every
+stage as soon as the stages it needs have finished:
+
+    run_stages({
+        "tts":        ((),                     lambda r: ...),
+        "background": ((),                     lambda r: ...),
+        "timings":    (("tts",),               lambda r: ... r["tts"] ...),
+        "render":     (("timings", "background"), lambda r: ...),
+    })
+
+Stages run on a thread pool — the heavy ones (edge-tts, ffmpeg, Whisper)
+spend their time waiting on the network, a subprocess or the transcription
+worker, so threads are enough to overlap them.
+
+Every stage's start offset and duration is recorded, so callers can report
+where a render spent its time (see /api/video-status).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def _check(stages: dict):
+    for name, (deps, _) in stages.items():
+        missing = [d for d in deps if d not in stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {missing}")
+    # Cycle check — repeatedly peel off stages whose deps are all resolved
+    resolved, pending = set(), dict(stages)
+    while pending:
+        ready = [n for n, (deps, _) in pending.items() if set(deps) <= resolved]
+        if not ready:
+            raise ValueError(f"Stage dependency cycle among: {sorted(pending)}")
+        for n in ready:
+            resolved.add(n)
+            del pending[n]
+
+
+def run_stages(stages: dict, on_stage=None, timings: dict | None = None) -> tuple:
+    """Run name → (deps, fn) stages; fn(results) gets every finished stage's value.
+
+    Returns (results, timings) where timings[name] is
+    {"start": s, "seconds": s, "status": "done"|"error"|"skipped"}, offsets
+    relative to the start of the run, plus timings["total"]. Pass a dict as
+    timings to watch it fill in while the run is in progress.
+    on_stage(name, timing) is called (from the calling thread) as each
+    stage finishes. If a stage raises, no new stages are started, running
+    ones are allowed to finish, and the first error is re-raised.
+    """
+    _check(stages)
+    started = time.monotonic()
+    timings = {} if timings is None else timings
+    results, running, error = {}, {}, None
+
+    def _timed(name, fn):
+        t0 = time.monotonic()
+        timings[name]["start"] = round(t0 - started, 3)
+        try:
+            return fn(results)
+        finally:
+            timings[name]["seconds"] = round(time.monotonic() - t0, 3)
+
+    # One thread per stage: a ready stage never queues behind another one
+    with ThreadPoolExecutor(max_workers=max(len(stages), 1), thread_name_prefix="stage") as pool:
+        waiting = dict(stages)
+        while waiting or running:
+            if error is None:
+                for name in [n for n, (deps, _) in waiting.items() if all(d in results for d in deps)]:
+                    # Entries are only ever added from this thread
+                    timings[name] = {"start": round(time.monotonic() - started, 3),
+                                     "seconds": None, "status": "running"}
+                    running[pool.submit(_timed, name, waiting.pop(name)[1])] = name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                    timings[name]["status"] = "done"
+                except Exception as e:
+                    timings[name]["status"] = "error"
+                    if error is None:
+                        error = e
+                print(f"[Stages] {name}: {timings[name]['seconds']:.2f}s ({timings[name]['status']})")
+                if on_stage:
+                    try:
+                        on_stage(name, dict(timings[name]))
+                    except Exception as e:
+                        print(f"[Stages] on_stage callback failed: {e}")
+
+    for name in stages:
+        timings.setdefault(name, {"start": None, "seconds": None, "status": "skipped"})
+    timings["total"] = {"start": 0.0, "seconds": round(time.monotonic() - started, 3),
+                        "status": "error" if error else "done"}
+    if error is not None:
+        raise error
+    return results, timings
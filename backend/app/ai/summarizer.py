@@ -6,7 +6,15 @@ Primary  : PadaiSathi fine-tuned model (GPU accelerated)
 import re
 import os
 import time
+import hashlib
 import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from . import model_registry
+from .extractive import select_sentences
+from .chunker import chunk_text
+from .engine_pool import chat_completion, AI_ENGINE_MODEL, _PADAISATHI_AI_KEYS
+
 try:
     import torch
     from transformers import (
@@ -22,74 +30,64 @@ except ImportError:
 HF_TOKEN       = os.getenv("HF_TOKEN", "")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 KAGGLE_API_URL = os.getenv("KAGGLE_API_URL", "")
+# SSE endpoint on the same HF Space (…/summarize → …/summarize/stream)
+KAGGLE_STREAM_URL = os.getenv(
+    "KAGGLE_STREAM_URL",
+    KAGGLE_API_URL.rstrip("/") + "/stream" if KAGGLE_API_URL.rstrip("/").endswith("/summarize") else "",
+)
 
-# PadaiSathi AI Engine keys — automatically rotates if one hits rate limit
-_PADAISATHI_AI_KEYS = [
-    os.getenv("PADAISATHI_AI_ENGINE_1", ""),
-    os.getenv("PADAISATHI_AI_ENGINE_2", ""),
-    os.getenv("PADAISATHI_AI_ENGINE_3", ""),
-    os.getenv("PADAISATHI_AI_ENGINE_4", ""),
-    os.getenv("PADAISATHI_AI_ENGINE_5", ""),
-]
-_PADAISATHI_AI_KEYS = [k for k in _PADAISATHI_AI_KEYS if k]  # remove empty ones
 MISTRAL_REPO   = "jeshmin/padaisathi-mistral-7b"
 FLAN_REPO      = "jeshmin/padaisathi-flan-t5"
 BASE_MODEL     = "mistralai/Mistral-7B-Instruct-v0.2"
 
+# Prompt budgets — longer inputs are cut down by the extractive ranker
+PRIMARY_INPUT_TOKENS   = int(os.getenv("PRIMARY_INPUT_TOKENS", "750"))      # ≈ 3000 chars
+AI_ENGINE_INPUT_TOKENS = int(os.getenv("AI_ENGINE_INPUT_TOKENS", "1500"))   # ≈ 6000 chars
+
+# Bump whenever a prompt or model above changes — cached summaries keyed on
+# the old version are then simply never hit again and age out of the cache.
+SUMMARY_ENGINE_VERSION = f"v5|{MISTRAL_REPO}|{AI_ENGINE_MODEL}"
+
 _device = "cuda" if (TORCH_AVAILABLE and torch.cuda.is_available()) else "cpu"
 
-# ── Load Flan-T5 (quiz + flashcards only) ─────────────────────────────────────
-if TORCH_AVAILABLE:
-    print("[Summarizer] Loading Flan-T5 for quiz/flashcards...")
-    _flan_tokenizer = AutoTokenizer.from_pretrained(FLAN_REPO, token=HF_TOKEN)
-    _flan_model     = T5ForConditionalGeneration.from_pretrained(
+# ── Flan-T5 (quiz + flashcards only) ──────────────────────────────────────────
+# Loaded lazily through the model registry — importing this module (and so
+# starting the API) no longer waits on a model download.
+def _load_flan():
+    if not TORCH_AVAILABLE:
+        raise RuntimeError("torch not available — Flan-T5 disabled, using AI Engine fallback")
+    tokenizer = AutoTokenizer.from_pretrained(FLAN_REPO, token=HF_TOKEN)
+    model     = T5ForConditionalGeneration.from_pretrained(
         FLAN_REPO, token=HF_TOKEN
     ).to(_device)
-    _flan_model.eval()
-    _tokenizer = _flan_tokenizer
-    _model     = _flan_model
+    model.eval()
     print(f"[Summarizer] Flan-T5 ready on {_device.upper()}")
-else:
-    print("[Summarizer] torch not available — skipping Flan-T5, using Groq fallback")
-    _flan_tokenizer = None
-    _flan_model     = None
-    _tokenizer      = None
-    _model          = None
+    return tokenizer, model
+
+
+model_registry.register("flan", _load_flan)
 
 # ── Local Mistral globals ──────────────────────────────────────────────────────
 _mistral_model     = None
 _mistral_tokenizer = None
 
+def _select_primary_input(lecture_text: str) -> str:
+    """Trim the lecture to what the Primary AI Engine can take in one prompt."""
+    total_len = len(lecture_text)
+    text_to_send = select_sentences(lecture_text, PRIMARY_INPUT_TOKENS)
+    if len(text_to_send) == total_len:
+        print(f"[Summarizer] Short PDF — sending full text ({total_len} chars)")
+    else:
+        print(f"[Summarizer] Extractive pre-selection — {total_len} → {len(text_to_send)} chars")
+
+    return text_to_send
+
+
 def _mistral_kaggle_api(lecture_text: str) -> dict | None:
     if not KAGGLE_API_URL:
         return None
     try:
-        # Smart text extraction based on length
-        total_len = len(lecture_text)
-        
-        if total_len <= 3000:
-            # Short PDF — send everything
-            text_to_send = lecture_text
-            print(f"[Summarizer] Short PDF — sending full text ({total_len} chars)")
-            
-        elif total_len <= 8000:
-            # Medium PDF — first 1500 + last 1500
-            text_to_send = (
-                lecture_text[:1500] +
-                "\n\n[...middle section...]\n\n" +
-                lecture_text[-1500:]
-            )
-            print(f"[Summarizer] Medium PDF — sending first+last ({len(text_to_send)} chars)")
-            
-        else:
-            # Long PDF — extract key sentences evenly from whole doc
-            sentences = re.split(r'(?<=[.!?])\s+', lecture_text)
-            total_sentences = len(sentences)
-            # Pick ~40 sentences evenly spread across the whole doc
-            step = max(1, total_sentences // 40)
-            selected = sentences[::step][:40]
-            text_to_send = " ".join(selected)
-            print(f"[Summarizer] Long PDF — extracted {len(selected)} sentences ({len(text_to_send)} chars)")
+        text_to_send = _select_primary_input(lecture_text)
 
         print("[Summarizer] Calling Primary AI Engine...")
         response = requests.post(
@@ -198,38 +196,43 @@ def _mistral_local(lecture_text: str) -> dict | None:
     except Exception as e:
         print(f"[Summarizer] Local Mistral error: {e}")
         return None
-# ── Text chunker ──────────────────────────────────────────────────────────────
-def _chunk_text(text: str, chunk_size: int = 800) -> list:
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    chunks, current = [], ""
-    for sentence in sentences:
-        if len(current) + len(sentence) < chunk_size:
-            current += " " + sentence
-        else:
-            if current.strip():
-                chunks.append(current.strip())
-            current = sentence
-    if current.strip():
-        chunks.append(current.strip())
-    return chunks[:8]
+# ── Flan-T5 generate (quiz/flashcards only) ───────────────────────────────────
+# Prompts per forward pass. Beam search on CPU is far cheaper as one padded
+# batch than as N separate batch-size-1 calls.
+FLAN_MAX_BATCH = int(os.getenv("FLAN_MAX_BATCH", "8"))
+
+
+def _generate_batch(prompts: list, max_batch_size: int = FLAN_MAX_BATCH) -> list:
+    """Run Flan-T5 on many prompts, padded into batches of max_batch_size.
+
+    Returns one decoded string per prompt, in order. Identical prompts are
+    generated once (decoding is deterministic beam search).
+    """
+    flan_tokenizer, flan_model = model_registry.get("flan")
+    unique = list(dict.fromkeys(prompts))
+    decoded = {}
+    for i in range(0, len(unique), max(max_batch_size, 1)):
+        batch = unique[i : i + max_batch_size]
+        inputs = flan_tokenizer(
+            batch, return_tensors="pt", max_length=256, truncation=True, padding=True
+        ).to(_device)
+        with torch.no_grad():
+            outputs = flan_model.generate(
+                **inputs,
+                max_new_tokens=200,
+                num_beams=4,
+                early_stopping=True,
+                repetition_penalty=2.5,
+                no_repeat_ngram_size=3,
+                length_penalty=1.5,
+            )
+        for prompt, text in zip(batch, flan_tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+            decoded[prompt] = text
+    return [decoded[p] for p in prompts]
 
 
-# ── Flan-T5 generate (quiz/flashcards only) ───────────────────────────────────
 def _generate(prompt: str) -> str:
-    inputs = _flan_tokenizer(
-        prompt, return_tensors="pt", max_length=256, truncation=True
-    ).to(_device)
-    with torch.no_grad():
-        outputs = _flan_model.generate(
-            **inputs,
-            max_new_tokens=200,
-            num_beams=4,
-            early_stopping=True,
-            repetition_penalty=2.5,
-            no_repeat_ngram_size=3,
-            length_penalty=1.5,
-        )
-    return _flan_tokenizer.decode(outputs[0], skip_special_tokens=True)
+    return _generate_batch([prompt])[0]
 
 
 # ── Output parser ─────────────────────────────────────────────────────────────
@@ -283,12 +286,8 @@ def _cloud_ai_summarize(text: str) -> dict | None:
     if not _PADAISATHI_AI_KEYS:
         print("[Summarizer] No PadaiSathi AI Engine keys found — skipping")
         return None
-    from groq import Groq
-    for i, key in enumerate(_PADAISATHI_AI_KEYS):
-        try:
-            print(f"[Summarizer] Trying PadaiSathi AI Engine {i+1}/{len(_PADAISATHI_AI_KEYS)}...")
-            client = Groq(api_key=key)
-            prompt = f"""You are PadaiSathi, a fun and smart AI study assistant.
+    try:
+        prompt = f"""You are PadaiSathi, a fun and smart AI study assistant.
 Summarize the following lecture notes in EXACTLY this format with these EXACT headers:
 
 PART 1 — FORMAL SUMMARY
@@ -313,33 +312,29 @@ Video Script:
    MUST end with one of: "Now go ace that exam!", "That's the tea fam!", "You got this bestie!", "Go slay that paper!", "Stay curious, stay winning!"]
 
 Lecture Notes:
-{text[:6000]}"""
-
-            response = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.7,
-            )
-            raw = response.choices[0].message.content
-            print(f"[Summarizer] PadaiSathi AI Engine response: {len(raw)} chars")
+{select_sentences(text, AI_ENGINE_INPUT_TOKENS)}"""
 
-            formal_m   = re.search(r"PART\s*1[^:\n]*[:\-—][^\n]*\n(.*?)(?=PART\s*2|$)", raw, re.DOTALL | re.IGNORECASE)
-            creative_m = re.search(r"PART\s*2[^:\n]*[:\-—][^\n]*\n(.*?)(?=Video Script:|$)", raw, re.DOTALL | re.IGNORECASE)
-            video_m    = re.search(r"Video Script:\s*(.*?)$", raw, re.DOTALL | re.IGNORECASE)
+        raw = chat_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=1000,
+            temperature=0.7,
+            label="summary",
+        )
+        print(f"[Summarizer] PadaiSathi AI Engine response: {len(raw)} chars")
 
-            formal   = formal_m.group(1).strip()   if formal_m   else raw[:600]
-            creative = creative_m.group(1).strip() if creative_m else raw
-            video    = video_m.group(1).strip()    if video_m    else creative[:250]
+        formal_m   = re.search(r"PART\s*1[^:\n]*[:\-—][^\n]*\n(.*?)(?=PART\s*2|$)", raw, re.DOTALL | re.IGNORECASE)
+        creative_m = re.search(r"PART\s*2[^:\n]*[:\-—][^\n]*\n(.*?)(?=Video Script:|$)", raw, re.DOTALL | re.IGNORECASE)
+        video_m    = re.search(r"Video Script:\s*(.*?)$", raw, re.DOTALL | re.IGNORECASE)
 
-            return {"formal_summary": formal, "genz_summary": creative, "video_script": video}
+        formal   = formal_m.group(1).strip()   if formal_m   else raw[:600]
+        creative = creative_m.group(1).strip() if creative_m else raw
+        video    = video_m.group(1).strip()    if video_m    else creative[:250]
 
-        except Exception as e:
-            print(f"[Summarizer] PadaiSathi AI Engine {i+1} failed: {e}")
-            continue
+        return {"formal_summary": formal, "genz_summary": creative, "video_script": video}
 
-    print("[Summarizer] PadaiSathi AI Engine unavailable")
-    return None
+    except Exception as e:
+        print(f"[Summarizer] PadaiSathi AI Engine unavailable: {e}")
+        return None
 
 
 # ── Simple fallback ───────────────────────────────────────────────────────────
@@ -349,18 +344,102 @@ def _simple_fallback(text: str) -> str:
 
 
 # ── Main public API ───────────────────────────────────────────────────────────
-def summarize(text: str, genz_style: bool = True,
-              max_length: int = 60, min_length: int = 20) -> dict:
-    text = text[:15000]
-    print(f"[Summarizer] Input: {len(text)} chars")
+# ── Map-reduce for long documents ─────────────────────────────────────────────
+# Past MAP_REDUCE_MIN_CHARS the Primary AI Engine would only see a sample of
+# the lecture. Instead each ~MAP_SECTION_TOKENS section is condensed into study
+# notes in parallel (alternating Primary AI Engine / AI Engine pool), and the
+# notes — reduced again if still too long — go through the normal three-part
+# prompt. Coverage grows with the document; wall-clock time with parallelism.
+MAP_REDUCE_MIN_CHARS = int(os.getenv("MAP_REDUCE_MIN_CHARS", "8000"))
+# Sections fit the Primary AI Engine's input budget, so none of them is trimmed
+MAP_SECTION_TOKENS   = int(os.getenv("MAP_SECTION_TOKENS", "700"))
+REDUCE_TARGET_CHARS  = int(os.getenv("REDUCE_TARGET_CHARS", "3000"))
+MAP_REDUCE_WORKERS   = int(os.getenv("MAP_REDUCE_WORKERS", "6"))
+MAP_REDUCE_MAX_ROUNDS = 3
+# Bump when the map prompt changes — cached section notes are keyed on it
+MAP_NOTES_VERSION = f"map-v1|{MISTRAL_REPO}|{AI_ENGINE_MODEL}"
+
+
+def _ai_engine_notes(section: str, part: int, total: int) -> str | None:
+    if not _PADAISATHI_AI_KEYS:
+        return None
+    try:
+        prompt = f"""Condense this part of a lecture into concise bullet-point study notes.
+Keep every definition, key term, process, formula and number. Use "• " before each bullet.
+Do NOT add anything that is not in the text.
+
+Lecture part {part} of {total}:
+{section}"""
+        return chat_completion(
+            [{"role": "user", "content": prompt}],
+            max_tokens=400,
+            temperature=0.3,
+            label=f"map {part}/{total}",
+        ).strip() or None
+    except Exception as e:
+        print(f"[Summarizer] Map {part}/{total} AI Engine failed: {e}")
+        return None
+
 
+def _primary_notes(section: str, part: int, total: int) -> str | None:
+    result = _mistral_kaggle_api(section)
+    return result["formal_summary"].strip() if result and result.get("formal_summary") else None
+
+
+def _map_section(section: str, part: int, total: int, chunk_cache=None) -> str:
+    """Study notes for one section — cached, engine-alternating, never fails."""
+    key = hashlib.sha256(f"{MAP_NOTES_VERSION}\x00{section}".encode("utf-8")).hexdigest()
+    if chunk_cache is not None:
+        cached = chunk_cache.get(key)
+        if cached:
+            return cached
+
+    engines = [_primary_notes, _ai_engine_notes] if part % 2 else [_ai_engine_notes, _primary_notes]
+    for engine in engines:
+        notes = engine(section, part, total)
+        if notes:
+            if chunk_cache is not None:
+                chunk_cache.set(key, notes)
+            return notes
+    return _simple_fallback(section)    # not cached — a later run may do better
+
+
+def _map_notes(text: str, chunk_cache=None, on_progress=None) -> str:
+    """Map (and re-map) the text down to notes of about REDUCE_TARGET_CHARS."""
+    for round_no in range(1, MAP_REDUCE_MAX_ROUNDS + 1):
+        if len(text) <= REDUCE_TARGET_CHARS:
+            break
+        sections = chunk_text(text, MAP_SECTION_TOKENS)
+        total = len(sections)
+        if total <= 1:
+            break
+        print(f"[Summarizer] Map round {round_no}: {total} sections of ≤{MAP_SECTION_TOKENS} tokens")
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=max(MAP_REDUCE_WORKERS, 1),
+                                thread_name_prefix="summary-map") as pool:
+            futures = [pool.submit(_map_section, sec, i + 1, total, chunk_cache)
+                       for i, sec in enumerate(sections)]
+            notes = []
+            for i, fut in enumerate(futures):
+                notes.append(fut.result())
+                if on_progress:
+                    on_progress(round_no, i + 1, total)
+        text = "\n\n".join(notes)
+        print(f"[Summarizer] Map round {round_no} done in {time.time() - started:.1f}s → {len(text)} chars")
+    return text
+
+
+def _summarize_direct(text: str) -> dict:
+    """Primary AI Engine → AI Engine pool → extractive fallback, on text that fits."""
     # 1. Primary AI Engine (fine-tuned PadaiSathi model — FAST!)
     result = _mistral_kaggle_api(text)
+    engine = "primary"
 
     # 2. PadaiSathi AI Engine fallback
     if not result:
         print("[Summarizer] Primary AI failed — trying PadaiSathi AI Engine...")
         result = _cloud_ai_summarize(text)
+        engine = "ai_engine"
 
     # 3. Last resort
     if not result:
@@ -370,12 +449,208 @@ def summarize(text: str, genz_style: bool = True,
             "genz_summary":   formal,
             "video_script":   formal[:250],
         }
+        engine = "fallback"
+
+    result["engine"] = engine
+    return result
+
+
+def summarize(text: str, genz_style: bool = True,
+              max_length: int = 60, min_length: int = 20, chunk_cache=None) -> dict:
+    """Three-part summary of a lecture of any length.
+
+    chunk_cache: optional object with get(key) / set(key, notes) used to reuse
+    section notes across documents that share sections (see summary_cache.py).
+    """
+    print(f"[Summarizer] Input: {len(text)} chars")
+    if len(text) > MAP_REDUCE_MIN_CHARS:
+        result = _summarize_direct(_map_notes(text, chunk_cache))
+        if result["engine"] != "fallback":
+            result["engine"] = f"map_reduce+{result['engine']}"
+    else:
+        result = _summarize_direct(text)
 
     result["word_count"] = len(text.split())
     print(f"[Summarizer] Done ✅ formal={len(result['formal_summary'])} chars")
     return result
 
 
+# ── Streaming summaries (SSE from the HF Space) ───────────────────────────────
+# Section headers in the order the model writes them. A header is only
+# recognised once its whole line has arrived, so the parser holds back the
+# last few characters of the current section until it can be sure they
+# aren't the start of the next header.
+_STREAM_SECTIONS = [
+    ("formal",       re.compile(r"PART\s*1[^\n]*\n", re.IGNORECASE)),
+    ("breakdown",    re.compile(r"PART\s*2[^\n]*\n", re.IGNORECASE)),
+    ("video_script", re.compile(r"Video Script:[ \t]*", re.IGNORECASE)),
+]
+_STREAM_HOLDBACK = 64
+_STREAM_HEADER_START = re.compile(r"[ \t]*(?:#+\s*|\*\*)?(?:PART|Video)", re.IGNORECASE)
+
+
+class _SectionStreamParser:
+    """Incrementally splits streamed model output into formal / breakdown /
+    video_script sections, emitting only text that is final."""
+
+    def __init__(self):
+        self.buf = ""
+        self.section = None          # current section name (None = preamble)
+        self.section_start = 0       # buf index where current section content starts
+        self.emitted = 0             # buf index up to which content has been emitted
+        self.next_idx = 0            # index into _STREAM_SECTIONS of the next header
+        self.sections = {}           # section name → accumulated text
+
+    def feed(self, text: str, final: bool = False) -> list:
+        self.buf += text
+        events = []
+        while self.next_idx < len(_STREAM_SECTIONS):
+            name, pattern = _STREAM_SECTIONS[self.next_idx]
+            m = pattern.search(self.buf, self.emitted)
+            if not m:
+                break
+            events += self._emit_until(m.start())
+            self.section, self.section_start = name, m.end()
+            self.emitted = m.end()
+            self.next_idx += 1
+            events.append({"type": "section", "section": name})
+
+        limit = len(self.buf)
+        if not final:
+            limit -= _STREAM_HOLDBACK
+            # An unfinished line that looks like a header is never emitted early
+            line_start = self.buf.rfind("\n") + 1
+            if _STREAM_HEADER_START.match(self.buf, line_start):
+                limit = min(limit, line_start)
+        events += self._emit_until(limit)
+        return events
+
+    def _emit_until(self, end: int) -> list:
+        if end <= self.emitted:
+            return []
+        chunk = self.buf[self.emitted:end]
+        self.emitted = end
+        if self.section is None:
+            return []                # chatter before PART 1 is dropped
+        self.sections[self.section] = self.sections.get(self.section, "") + chunk
+        return [{"type": "delta", "section": self.section, "text": chunk}]
+
+    def result(self) -> dict | None:
+        """Sections as a summarize()-style dict, or None if PART 1 never showed up."""
+        formal = self.sections.get("formal", "").strip()
+        if not formal:
+            return None
+        creative = self.sections.get("breakdown", "").strip() or formal
+        video    = self.sections.get("video_script", "").strip() or creative[:250]
+        return {"formal_summary": formal, "genz_summary": creative, "video_script": video}
+
+
+def _stream_primary(text_to_send: str):
+    """Read the HF Space SSE endpoint.
+
+    Yields ("token", str) per generated piece and finally ("done", dict)
+    with the Space's own parsed sections, when it sends them.
+    """
+    import json
+    with requests.post(
+        KAGGLE_STREAM_URL,
+        json={"text": text_to_send, "max_tokens": 800},
+        stream=True,
+        timeout=(10, 180),
+    ) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if not line:
+                event = None
+                continue
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[5:].strip())
+                if event == "error":
+                    raise RuntimeError(data.get("error", "stream error"))
+                if event == "done":
+                    yield "done", data
+                elif "text" in data:
+                    yield "token", data["text"]
+
+
+def stream_summarize(text: str, genz_style: bool = True, chunk_cache=None):
+    """Streaming counterpart of summarize().
+
+    Yields {"type": "section"|"delta", ...} events as the Primary AI Engine
+    produces tokens, then one {"type": "result", "result": {...}} with the
+    same shape summarize() returns. If streaming isn't available, falls back
+    to summarize() and emits the finished sections in one go. A stream that
+    breaks off part-way is never used as the result: a {"type": "reset"}
+    event tells the client to discard what it has shown, then the fallback
+    runs. Long documents are mapped to notes first, with
+    {"type": "progress", ...} events.
+    """
+    word_count = len(text.split())
+    map_reduce = len(text) > MAP_REDUCE_MIN_CHARS
+    if map_reduce:
+        progress = []
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            fut = runner.submit(_map_notes, text, chunk_cache,
+                                lambda r, d, t: progress.append((r, d, t)))
+            sent = 0
+            while not fut.done() or sent < len(progress):
+                if sent < len(progress):
+                    r, d, t = progress[sent]
+                    sent += 1
+                    yield {"type": "progress", "stage": "map", "round": r, "done": d, "total": t}
+                else:
+                    time.sleep(0.2)
+            text = fut.result()
+    raw, done, interrupted = "", None, False
+    parser = _SectionStreamParser()
+    if KAGGLE_STREAM_URL:
+        started = time.time()
+        first_token = None
+        try:
+            print("[Summarizer] Streaming from Primary AI Engine...")
+            for kind, data in _stream_primary(_select_primary_input(text)):
+                if kind == "done":
+                    done = data
+                    continue
+                if first_token is None:
+                    first_token = time.time() - started
+                    print(f"[Summarizer] First token after {first_token:.2f}s")
+                raw += data
+                yield from parser.feed(data)
+            yield from parser.feed("", final=True)
+        except Exception as e:
+            interrupted = True
+            print(f"[Summarizer] Primary AI Engine stream failed after {len(raw)} chars: {e}")
+
+    if done and (done.get("formal_summary") or done.get("genz_summary")):
+        result = {
+            "formal_summary": done.get("formal_summary", ""),
+            "genz_summary":   done.get("genz_summary", ""),
+            "video_script":   done.get("video_script", ""),
+            "engine":         "primary",
+        }
+    elif raw.strip() and not interrupted:
+        result = parser.result() or _parse_output(raw)
+        result["engine"] = "primary"
+    else:
+        if raw:
+            yield {"type": "reset"}          # partial output already sent — drop it
+        result = _summarize_direct(text)
+        for name, key in (("formal", "formal_summary"),
+                          ("breakdown", "genz_summary"),
+                          ("video_script", "video_script")):
+            yield {"type": "section", "section": name}
+            yield {"type": "delta", "section": name, "text": result[key]}
+
+    if map_reduce and result["engine"] != "fallback":
+        result["engine"] = f"map_reduce+{result['engine']}"
+    result["word_count"] = word_count
+    yield {"type": "result", "result": result}
+
+
 # ── Quiz/Flashcard — Flan-T5 (unchanged) ──────────────────────────────────────
 def generate_quiz_mcq(text: str) -> str:
     return _generate(f"[QUIZ_MCQ] {text}")
@@ -0,0 +1,159 @@
+"""
+PadaiSathi AI — Whisper transcription service
+backend/app/ai/transcriber.py
+
+Word-level timestamps for the narration MP3s, from one long-lived Whisper
+model (stable-ts) per process.
+
+The model is registered as "whisper" with the model registry, so it is
+loaded once — on the first video, or at startup with MODEL_WARMUP=whisper —
+instead of being reloaded from disk for every render. Requests go onto a
+queue served by a single worker thread that transcribes them one at a time
+on the loaded model (stable-ts has no batched call), so concurrent renders
+never load or run Whisper twice at the same time. A render that gives up
+waiting cancels its request, and the worker skips it. Load time is in
+model_registry.status(); queue depth and per-job timings are in
+transcriber_stats(), both on /api/health.
+"""
+
+import os
+import re
+import time
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from . import model_registry
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# "base" = fast, ~140MB download, good enough for TTS audio (it's clean speech)
+# "small" = better accuracy, ~460MB
+WHISPER_MODEL      = os.getenv("WHISPER_MODEL", "small")
+# How long a render waits for its turn + transcription before falling back
+TRANSCRIBE_TIMEOUT = float(os.getenv("TRANSCRIBE_TIMEOUT", "300"))
+
+
+def _load_whisper():
+    import stable_whisper as stable_ts
+    print(f"[Whisper] Loading model: {WHISPER_MODEL}")
+    return stable_ts.load_model(WHISPER_MODEL)
+
+
+model_registry.register("whisper", _load_whisper)
+
+_queue  = queue.Queue()          # (mp3_path, Future, enqueued_at)
+_worker = None
+_worker_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "jobs": 0, "failures": 0, "cancelled": 0,
+    "total_seconds": 0.0, "last_seconds": None,
+    "total_wait_seconds": 0.0, "max_queued": 0,
+}
+
+
+def _words_from_result(result) -> list:
+    """[{"word", "start", "end"}] from a stable-ts result."""
+    word_times = []
+    for segment in result.segments:
+        for word in segment.words:
+            w = re.sub(r'[^\w\s\'-]', '', word.word).strip()
+            if w:
+                word_times.append({
+                    "word":  w,
+                    "start": round(word.start, 4),
+                    "end":   round(word.end,   4),
+                })
+    return word_times
+
+
+def _transcribe_one(model, mp3_path: str) -> list:
+    result = model.transcribe(
+        mp3_path,
+        language="en",
+        word_timestamps=True,
+        vad=False,           # VAD off — TTS audio has no silence gaps to skip
+    )
+    return _words_from_result(result)
+
+
+def _run_one(mp3_path: str, fut: Future, enqueued_at: float):
+    if not fut.set_running_or_notify_cancel():
+        # The render timed out waiting and cancelled — don't spend Whisper on it
+        with _stats_lock:
+            _stats["cancelled"] += 1
+        return
+    started = time.time()
+    try:
+        words = _transcribe_one(model_registry.get("whisper"), mp3_path)
+    except Exception as e:
+        with _stats_lock:
+            _stats["failures"] += 1
+        fut.set_exception(e)
+        return
+    seconds = round(time.time() - started, 2)
+    with _stats_lock:
+        _stats["jobs"] += 1
+        _stats["total_seconds"] += seconds
+        _stats["last_seconds"] = seconds
+        _stats["total_wait_seconds"] += started - enqueued_at
+    print(f"[Whisper] {len(words)} words in {seconds}s "
+          f"(waited {started - enqueued_at:.1f}s, {_queue.qsize()} still queued)")
+    fut.set_result(words)
+
+
+def _serve():
+    while True:
+        mp3_path, fut, enqueued_at = _queue.get()
+        try:
+            _run_one(mp3_path, fut, enqueued_at)
+        except Exception as e:                       # never let the worker die
+            print(f"[Whisper] Worker error: {e}")
+            if not fut.done():
+                fut.set_exception(e)
+
+
+def _ensure_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_serve, name="whisper", daemon=True)
+            _worker.start()
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+def submit_transcription(mp3_path: str) -> Future:
+    """Queue an MP3; the Future resolves to [{"word", "start", "end"}]."""
+    _ensure_worker()
+    fut = Future()
+    _queue.put((mp3_path, fut, time.time()))
+    with _stats_lock:
+        _stats["max_queued"] = max(_stats["max_queued"], _queue.qsize())
+    return fut
+
+
+def transcribe_words(mp3_path: str, timeout: float = TRANSCRIBE_TIMEOUT) -> list:
+    """Blocking helper — word timestamps for one MP3. Raises on failure.
+
+    On timeout the queued request is cancelled, so the worker skips it
+    instead of transcribing audio nobody is waiting for.
+    """
+    fut = submit_transcription(mp3_path)
+    try:
+        return fut.result(timeout=timeout)
+    except FutureTimeout:
+        fut.cancel()                 # no-op if Whisper is already running it
+        raise
+
+
+def transcriber_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["model"] = WHISPER_MODEL
+    stats["queued"] = _queue.qsize()
+    stats["avg_seconds"] = round(stats["total_seconds"] / stats["jobs"], 2) if stats["jobs"] else None
+    stats["avg_wait_seconds"] = round(stats["total_wait_seconds"] / stats["jobs"], 2) if stats["jobs"] else None
+    stats["total_seconds"] = round(stats["total_seconds"], 2)
+    stats["total_wait_seconds"] = round(stats["total_wait_seconds"], 2)
+    return stats
@@ -0,0 +1,217 @@
+"""
+PadaiSathi AI — Sentence-level TTS cache
+backend/app/ai/tts_cache.py
+
+Narration is synthesised one sentence at a time and every sentence is
+cached on disk, keyed by (voice, sentence text):
+
+    <key>.mp3   — the edge-tts audio for that sentence
+    <key>.json  — {"duration", "words": [{"word", "start", "end"}]}
+
+A script is assembled by concatenating the cached MP3s (edge-tts emits
+plain MPEG frames, so the bytes can simply be joined) and shifting each
+sentence's word timings by the audio before it. Only the sentences that
+aren't cached yet are synthesised — concurrently. The openers and closers
+("Hey besties!", "Now go ace that exam!") are therefore synthesised once
+per voice rather than once per video.
+
+The directory is capped at TTS_CACHE_MAX_MB; least-recently-used sentences
+(by file mtime, refreshed on every hit) are evicted first. A script pins its
+sentences from lookup until its MP3 is written, and anything used in the
+last TTS_EVICT_GRACE_SECONDS is kept too (covers renders in other worker
+processes), so eviction never deletes a file a render is about to read.
+"""
+
+import os
+import re
+import json
+import asyncio
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+# ── Config ────────────────────────────────────────────────────────────────────
+_HERE = Path(__file__).resolve().parent
+TTS_CACHE_DIR         = Path(os.getenv("TTS_CACHE_DIR", str(_HERE.parent.parent / "temp_video" / "tts_cache")))
+TTS_CACHE_MAX_MB      = float(os.getenv("TTS_CACHE_MAX_MB", "500"))     # 0 disables the cache
+TTS_SYNTH_CONCURRENCY = int(os.getenv("TTS_SYNTH_CONCURRENCY", "4"))
+TTS_EVICT_GRACE_SECONDS = float(os.getenv("TTS_EVICT_GRACE_SECONDS", "600"))
+TTS_CACHE_VERSION     = "tts-v1"        # bump if the synthesis settings change
+
+# A sentence ends at . ! ? (plus closing quotes / brackets) followed by
+# whitespace and a capital letter, or by the end of the script — so "3.14",
+# "e.g. mitosis" and "U.S.A" stay in one piece
+_TERMINAL      = re.compile(r"[.!?]+[\"')\]]*(?=\s+[\"'(\[]?[A-Z]|\s*$)")
+_LAST_WORD     = re.compile(r"\w[\w.]*$")
+_ABBREVIATIONS = frozenset({"e.g", "i.e", "etc", "vs", "approx", "fig", "eq", "dr", "mr", "mrs", "ms", "prof"})
+
+_evict_lock = threading.Lock()
+_pins = {}                       # key -> number of scripts being assembled from it
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _bump(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def split_sentences(script: str) -> list:
+    """Speakable sentences of the script, punctuation kept, whitespace trimmed."""
+    script = script or ""
+    sentences, start = [], 0
+    for end in _TERMINAL.finditer(script):
+        word = _LAST_WORD.search(script, start, end.start())
+        if end.group().startswith(".") and word and word.group().lower() in _ABBREVIATIONS:
+            continue                     # "Dr. Rao", "approx. Ten"
+        sentences.append(script[start:end.end()])
+        start = end.end()
+    sentences.append(script[start:])
+    return [s.strip() for s in sentences if re.search(r"\w", s)]
+
+
+def _key(voice: str, sentence: str) -> str:
+    raw = f"{TTS_CACHE_VERSION}|{voice}|{sentence}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _lookup(key: str) -> dict | None:
+    mp3, meta = TTS_CACHE_DIR / f"{key}.mp3", TTS_CACHE_DIR / f"{key}.json"
+    try:
+        entry = json.loads(meta.read_text())
+        if not mp3.exists():
+            return None
+        os.utime(meta)                   # LRU: mtime = last use
+        entry["mp3"] = str(mp3)
+        return entry
+    except (OSError, ValueError):
+        return None
+
+
+def _mp3_duration(path: str) -> float:
+    from pydub import AudioSegment
+    return len(AudioSegment.from_mp3(path)) / 1000.0
+
+
+async def _synthesise(key: str, sentence: str, voice: str, synth, gate) -> dict:
+    """synth(text, mp3_path, voice) is an async edge-tts call returning word timings."""
+    mp3, meta = TTS_CACHE_DIR / f"{key}.mp3", TTS_CACHE_DIR / f"{key}.json"
+    tmp = TTS_CACHE_DIR / f"{key}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        async with gate:
+            words = await synth(sentence, str(tmp), voice) or []
+        entry = {"duration": await asyncio.to_thread(_mp3_duration, str(tmp)), "words": words}
+        os.replace(tmp, mp3)             # atomic — readers never see half a file
+    finally:
+        tmp.unlink(missing_ok=True)
+    meta.write_text(json.dumps(entry))
+    entry["mp3"] = str(mp3)
+    return entry
+
+
+def _pin(keys, delta: int):
+    with _evict_lock:
+        for key in keys:
+            _pins[key] = _pins.get(key, 0) + delta
+            if _pins[key] <= 0:
+                del _pins[key]
+
+
+def _evict():
+    """Trim the directory to TTS_CACHE_MAX_MB, least recently used first."""
+    limit = TTS_CACHE_MAX_MB * 1024 * 1024
+    with _evict_lock:
+        in_use = time.time() - TTS_EVICT_GRACE_SECONDS
+        entries, total = [], 0
+        for meta in TTS_CACHE_DIR.glob("*.json"):
+            mp3 = meta.with_suffix(".mp3")
+            try:
+                size = meta.stat().st_size + (mp3.stat().st_size if mp3.exists() else 0)
+                entries.append((meta.stat().st_mtime, size, meta, mp3))
+            except OSError:
+                continue
+            total += size
+        if total <= limit:
+            return
+        removed = 0
+        for mtime, size, meta, mp3 in sorted(entries, key=lambda e: e[0]):
+            if total <= limit or mtime >= in_use:
+                break                    # the rest were used recently
+            if meta.stem in _pins:
+                continue                 # a render here is about to read it
+            meta.unlink(missing_ok=True)
+            mp3.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        _bump("evictions", removed)
+        print(f"[TTSCache] Evicted {removed} sentences (now {total / 1024 / 1024:.1f} MB)")
+
+
+# ── Public API ────────────────────────────────────────────────────────────────
+async def assemble_script(script: str, voice: str, out_path: str, synth) -> tuple:
+    """Write the narration for script to out_path from cached sentences,
+    synthesising the missing ones concurrently.
+
+    Returns (duration in seconds, word timings over the whole script).
+    """
+    TTS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    sentences = split_sentences(script)
+    keys = [_key(voice, s) for s in sentences]
+    pinned = set(keys)
+    _pin(pinned, 1)              # from lookup until the bytes are read
+    try:
+        return await _assemble(sentences, keys, out_path, synth, voice)
+    finally:
+        _pin(pinned, -1)
+
+
+async def _assemble(sentences: list, keys: list, out_path: str, synth, voice: str) -> tuple:
+    entries, missing = {}, {}
+    for key, sentence in zip(keys, sentences):
+        if key in entries or key in missing:
+            continue
+        entry = _lookup(key)
+        if entry:
+            entries[key] = entry
+        else:
+            missing[key] = sentence
+    _bump("hits", len(sentences) - len(missing))
+    _bump("misses", len(missing))
+    print(f"[TTSCache] {len(sentences)} sentences — {len(sentences) - len(missing)} cached, "
+          f"{len(missing)} to synthesise")
+
+    if missing:
+        gate = asyncio.Semaphore(max(TTS_SYNTH_CONCURRENCY, 1))
+        made = await asyncio.gather(*(_synthesise(k, s, voice, synth, gate) for k, s in missing.items()))
+        entries.update(zip(missing, made))
+
+    offset, word_times = 0.0, []
+    with open(out_path, "wb") as out:
+        for key in keys:
+            entry = entries[key]
+            with open(entry["mp3"], "rb") as f:
+                out.write(f.read())
+            for w in entry["words"]:
+                word_times.append({
+                    "word":  w["word"],
+                    "start": round(w["start"] + offset, 4),
+                    "end":   round(w["end"] + offset, 4),
+                })
+            offset += entry["duration"]
+
+    if missing:
+        _evict()
+    return round(offset, 3), word_times
+
+
+def tts_cache_enabled() -> bool:
+    return TTS_CACHE_MAX_MB > 0
+
+
+def tts_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
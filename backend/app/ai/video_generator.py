@@ -4,30 +4,36 @@ Place at:  backend/app/ai/video_generator.py
 
 How it works
 ────────────
-1. edge-tts generates the MP3  (this already works perfectly)
-2. stable-ts (Whisper) listens to that MP3 and returns EXACT word timestamps
-3. Captions are built from those timestamps — perfectly synced, no guessing
+1. edge-tts generates the MP3 and reports a WordBoundary event (exact
+   offset + duration) for every word it speaks
+2. Captions are built straight from those timings — perfectly synced, and
+   no speech recognition needed
+3. Only when edge-tts isn't used (gTTS fallback), or CAPTION_TIMING=whisper,
+   does stable-ts (Whisper) listen to the MP3 to recover word timestamps
+4. Stages that don't depend on each other run at the same time — the
+   background clip is prepared and caption cards are rasterised while the
+   narration is still being synthesised — and each stage is timed
 
 Install once:
     pip install stable-ts
 
-On first run, Whisper downloads the 'base' model (~140MB) automatically.
-Subsequent runs use the cached model — fast.
+On first run, Whisper downloads the model automatically. It is then kept
+loaded by the transcription service (transcriber.py) for every later video.
 
-If you want even more accuracy at the cost of speed, change:
-    WHISPER_MODEL = "small"   # ~460MB, noticeably better
-    WHISPER_MODEL = "medium"  # ~1.5GB, very accurate
+If you want even more accuracy at the cost of speed, set:
+    WHISPER_MODEL=small   # ~460MB, noticeably better (default)
+    WHISPER_MODEL=medium  # ~1.5GB, very accurate
 """
 
 import os
 import re
 import json
 import asyncio
+import hashlib
+import threading
 import contextlib
 from pathlib import Path
 
-os.environ['IMAGEMAGICK_BINARY'] = r"C:\Program Files\ImageMagick-7.1.2-Q16-HDRI\magick.exe"
-
 try:
     from moviepy.editor import *
     import PIL.Image
@@ -48,16 +54,31 @@ TEMP_DIR   = _ROOT / "backend" / "temp_video"
 # ── Caption style ─────────────────────────────────────────────────────────────
 BASE_WIDTH       = 1920
 CAPTION_FONTSIZE = 120
-CAPTION_STROKE_W = 4      # thin clean outline, no box
-CAPTION_COLOR    = "white"
-CAPTION_STROKE   = "black"
+CAPTION_STROKE_W = 4      # thin clean outline, no box (colours: caption_renderer.py)
 WORDS_PER_CARD   = 2      # max 2 words at a time
 CAPTION_Y_RATIO  = 0.50   # dead centre of frame
 
+# ── Caption timing ────────────────────────────────────────────────────────────
+# "edge"    = use edge-tts WordBoundary timings, Whisper only as a fallback
+# "whisper" = always transcribe the MP3 with Whisper
+CAPTION_TIMING = os.getenv("CAPTION_TIMING", "edge").lower()
+
 # ── Whisper model ─────────────────────────────────────────────────────────────
-# "base" = fast, ~140MB download, good enough for TTS audio (it's clean speech)
-# "small" = better accuracy, ~460MB — upgrade if you want
-WHISPER_MODEL = "small"
+# Loaded once and served from a queue — see transcriber.py
+from .transcriber import WHISPER_MODEL, transcribe_words
+from .caption_renderer import render_caption, caption_cache_stats, CAPTION_FONT_PATH
+
+# ── Render backend ────────────────────────────────────────────────────────────
+# "ffmpeg"  = one ffmpeg process composes and encodes (ffmpeg_renderer.py)
+# "moviepy" = composite frame by frame in Python (also the fallback)
+VIDEO_RENDERER = os.getenv("VIDEO_RENDERER", "ffmpeg").lower()
+from .ffmpeg_renderer import ffmpeg_binary, probe_size, output_size, render as render_with_ffmpeg
+from .background_cache import prepare_background, keyframe_at_or_before
+from .stages import run_stages
+
+# ── Narration cache ───────────────────────────────────────────────────────────
+# Sentences are synthesised once per voice and reused — see tts_cache.py
+from .tts_cache import assemble_script, split_sentences, tts_cache_enabled
 
 # ── Voice map ─────────────────────────────────────────────────────────────────
 THEME_VOICES = {
@@ -80,14 +101,20 @@ VIDEO_CLOSERS = [
 ]
 MAX_TTS_CHARS = 1500
 
+def _pick(options: list, text: str, salt: str) -> str:
+    """Stable choice for this text — the same summary always gets the same
+    opener/closer, so its script (and render cache key) never changes."""
+    digest = hashlib.sha256(f"{salt}|{text}".encode("utf-8")).digest()
+    return options[int.from_bytes(digest[:4], "big") % len(options)]
+
+
 def _ensure_video_script(text: str) -> str:
-    import random
     text = text.strip()
     if not text:
         return text
     has_opener = any(text.lower().startswith(o.lower()) or o.lower() in text[:80].lower() for o in VIDEO_OPENERS)
     if not has_opener:
-        text = random.choice(VIDEO_OPENERS) + " " + text
+        text = _pick(VIDEO_OPENERS, text, "opener") + " " + text
     if len(text) > MAX_TTS_CHARS:
         truncated = text[:MAX_TTS_CHARS]
         last_end = max(truncated.rfind('.'), truncated.rfind('!'), truncated.rfind('?'))
@@ -98,7 +125,7 @@ def _ensure_video_script(text: str) -> str:
             last_end = max(text.rfind('.'), text.rfind('!'), text.rfind('?'))
             if last_end > len(text) // 2:
                 text = text[:last_end + 1]
-        text = text + " " + random.choice(VIDEO_CLOSERS)
+        text = text + " " + _pick(VIDEO_CLOSERS, text, "closer")
     return text
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
@@ -135,17 +162,38 @@ def _clean_text(text: str) -> str:
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# TTS  — edge-tts, just audio (no WordBoundary needed anymore)
+# TTS  — edge-tts audio + WordBoundary word timings
 # ─────────────────────────────────────────────────────────────────────────────
 
-async def _tts_edge_async(text: str, mp3_path: str, voice: str):
-    """Generate MP3 via edge-tts. Whisper handles timestamps separately."""
+_TICKS_PER_SECOND = 10_000_000      # edge-tts offsets are in 100 ns units
+
+
+async def _tts_edge_async(text: str, mp3_path: str, voice: str) -> list:
+    """Generate MP3 via edge-tts; return its WordBoundary timings.
+
+    Returns [ {"word": str, "start": float, "end": float} ] — the same shape
+    Whisper produces, so captions can be built without transcribing.
+    """
     import edge_tts
-    communicate = edge_tts.Communicate(text, voice)
+    try:
+        communicate = edge_tts.Communicate(text, voice, boundary="WordBoundary")
+    except TypeError:                # edge-tts < 7 always sends WordBoundary
+        communicate = edge_tts.Communicate(text, voice)
+    word_times = []
     with open(mp3_path, "wb") as f:
         async for chunk in communicate.stream():
             if chunk["type"] == "audio":
                 f.write(chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                w = re.sub(r'[^\w\s\'-]', '', chunk.get("text", "")).strip()
+                if w:
+                    start = chunk["offset"] / _TICKS_PER_SECOND
+                    word_times.append({
+                        "word":  w,
+                        "start": round(start, 4),
+                        "end":   round(start + chunk["duration"] / _TICKS_PER_SECOND, 4),
+                    })
+    return word_times
 
 
 def _run_async(coro):
@@ -154,35 +202,50 @@ def _run_async(coro):
         if loop.is_running():
             import concurrent.futures
             with concurrent.futures.ThreadPoolExecutor() as pool:
-                pool.submit(asyncio.run, coro).result()
+                return pool.submit(asyncio.run, coro).result()
         else:
-            loop.run_until_complete(coro)
+            return loop.run_until_complete(coro)
     except RuntimeError:
-        asyncio.run(coro)
+        return asyncio.run(coro)
 
 
-def _tts(text: str, mp3_path: str, theme: str = "subway") -> float:
-    """Generate MP3, return duration in seconds."""
-    clean = _clean_text(text)
-    clean = _ensure_video_script(clean)
-    print(f"[TTS] Script ({len(clean)} chars): {clean}")
+def _video_script(text: str) -> str:
+    """The exact narration: cleaned text with an opener and closer."""
+    return _ensure_video_script(_clean_text(text))
+
+
+def _tts(text: str, mp3_path: str, theme: str = "subway") -> tuple:
+    """Generate MP3, return (duration in seconds, word timings)."""
+    return _speak(_video_script(text), mp3_path, theme=theme)
+
 
+def _speak(clean: str, mp3_path: str, theme: str = "subway") -> tuple:
+    """Narrate an already-built script, return (duration in seconds, word timings).
+
+    Word timings come from edge-tts WordBoundary events; they are [] when
+    the gTTS fallback was used.
+    """
+    print(f"[TTS] Script ({len(clean)} chars): {clean}")
 
     voice = THEME_VOICES.get(theme, DEFAULT_VOICE)
     print(f"[TTS]   {voice}")
 
     try:
         from pydub import AudioSegment
-        _run_async(_tts_edge_async(clean, mp3_path, voice))
-        duration = len(AudioSegment.from_mp3(mp3_path)) / 1000.0
-        print(f"[TTS]  {duration:.3f}s")
-        return duration
+        if tts_cache_enabled() and split_sentences(clean):
+            # Cached sentences + concurrent synthesis of the new ones
+            duration, word_times = _run_async(assemble_script(clean, voice, mp3_path, _tts_edge_async))
+        else:
+            word_times = _run_async(_tts_edge_async(clean, mp3_path, voice)) or []
+            duration = len(AudioSegment.from_mp3(mp3_path)) / 1000.0
+        print(f"[TTS]  {duration:.3f}s, {len(word_times)} word boundaries")
+        return duration, word_times
     except ImportError:
         print("[TTS]   edge-tts not installed, falling back to gTTS")
-        return _tts_gtts(clean, mp3_path)
+        return _tts_gtts(clean, mp3_path), []
     except Exception as e:
         print(f"[TTS]  {e} : falling back to gTTS")
-        return _tts_gtts(clean, mp3_path)
+        return _tts_gtts(clean, mp3_path), []
 
 
 def _tts_gtts(text: str, mp3_path: str) -> float:
@@ -202,33 +265,12 @@ def _transcribe_words(mp3_path: str) -> list:
     Returns [ {"word": str, "start": float, "end": float} ]
 
     stable-ts is purpose-built for accurate subtitle timing — it refines
-    Whisper's segment boundaries down to individual words.
+    Whisper's segment boundaries down to individual words. The model stays
+    loaded in the transcription service between videos.
     """
     try:
-        import stable_whisper as stable_ts
-
-        print(f"[Whisper] Loading model: {WHISPER_MODEL}")
-        model = stable_ts.load_model(WHISPER_MODEL)
-
-        print(f"[Whisper] Transcribing: {mp3_path}")
-        result = model.transcribe(
-            mp3_path,
-            language="en",
-            word_timestamps=True,
-            vad=False,           # VAD off — TTS audio has no silence gaps to skip
-        )
-
-        # Extract all words from all segments
-        word_times = []
-        for segment in result.segments:
-            for word in segment.words:
-                w = re.sub(r'[^\w\s\'-]', '', word.word).strip()
-                if w:
-                    word_times.append({
-                        "word":  w,
-                        "start": round(word.start, 4),
-                        "end":   round(word.end,   4),
-                    })
+        print(f"[Whisper] Queueing transcription: {mp3_path}")
+        word_times = transcribe_words(mp3_path)
 
         print(f"[Whisper]  {len(word_times)} words transcribed")
         if word_times:
@@ -296,134 +338,213 @@ def _build_timings_fallback(text: str, audio_duration: float, words_per_card: in
 # Background
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _background(theme: str, duration: float):
-    print(f"[VideoGen] Background: {theme}.mp4")
-
-    def _load_and_loop(path: Path):
-        clip = VideoFileClip(str(path))
-        if clip.duration < duration:
-            loops = int(duration / clip.duration) + 1
-            clip  = concatenate_videoclips([clip] * loops)
-        return clip.subclip(0, duration)
-
+def _background_path(theme: str) -> Path | None:
+    """Theme MP4 in ASSET_DIR (exact name, then case-insensitive, then any)."""
     exact = ASSET_DIR / f"{theme}.mp4"
     if exact.exists():
-        return _load_and_loop(exact)
+        return exact
     for f in ASSET_DIR.glob("*.mp4"):
         if f.stem.lower() == theme.lower():
-            return _load_and_loop(f)
+            return f
     candidates = list(ASSET_DIR.glob("*.mp4"))
     if candidates:
         print(f"[VideoGen]   Fallback → {candidates[0].name}")
-        return _load_and_loop(candidates[0])
+        return candidates[0]
+    return None
+
+
+def _prepared_background(theme: str, script: str) -> tuple:
+    """(path, start) — the render-ready cached copy of the theme clip (see
+    background_cache.py) and where in it this video begins, or the original
+    file from 0s if it can't be prepared.
+
+    The start is a keyframe picked from the script hash, so videos on the
+    same theme don't all open on the same frame, a re-render of the same
+    script gets the same one, and the seek needs no decoding.
+    """
+    path = _background_path(theme)
+    if path is None:
+        return None, 0.0
+    entry = prepare_background(path)
+    if not entry:
+        return path, 0.0
+    digest = hashlib.sha256(f"background|{script}".encode("utf-8")).digest()
+    offset = int.from_bytes(digest[:4], "big") / 2 ** 32 * (entry.get("duration") or 0)
+    return Path(entry["path"]), keyframe_at_or_before(entry, offset)
+
+
+def _background(bg_path: Path | None, duration: float, start: float = 0.0):
+    if bg_path:
+        print(f"[VideoGen] Background: {Path(bg_path).name} from {start:.2f}s")
+        clip  = VideoFileClip(str(bg_path))
+        parts = [clip.subclip(start) if start > 0 else clip]
+        while sum(p.duration for p in parts) < duration:
+            parts.append(clip)
+        if len(parts) > 1:
+            return concatenate_videoclips(parts).subclip(0, duration)
+        return parts[0].subclip(0, duration)
 
     print("[VideoGen]  No background  black screen")
     return ColorClip(size=(1920, 1080), color=(0, 0, 0)).set_duration(duration)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+# Render cache key — identical inputs always produce an identical video
+# ─────────────────────────────────────────────────────────────────────────────
+
+RENDER_CACHE_VERSION = "render-v4"   # bump when the output changes for the same inputs
+
+_asset_digests = {}
+_asset_digest_lock = threading.Lock()
+
+
+def _asset_digest(path: Path | None) -> str:
+    """sha256 of a theme clip's bytes, hashed once per (path, size, mtime)."""
+    if path is None:
+        return "none"
+    st = path.stat()
+    memo = (str(path), st.st_size, st.st_mtime_ns)
+    with _asset_digest_lock:
+        if memo in _asset_digests:
+            return _asset_digests[memo]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    with _asset_digest_lock:
+        _asset_digests[memo] = h.hexdigest()
+    return _asset_digests[memo]
+
+
+def render_cache_key(summary_text: str, theme: str) -> str:
+    """Hash of everything that decides the rendered video (see render_cache.py)."""
+    inputs = {
+        "version":  RENDER_CACHE_VERSION,
+        "script":   _video_script(summary_text),
+        "voice":    THEME_VOICES.get(theme, DEFAULT_VOICE),
+        "theme":    _asset_digest(_background_path(theme)),
+        "captions": [CAPTION_FONTSIZE, CAPTION_STROKE_W, WORDS_PER_CARD, CAPTION_Y_RATIO,
+                     CAPTION_TIMING, CAPTION_FONT_PATH],
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode("utf-8")).hexdigest()
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Captions — ALL CAPS, white, thin outline, centred, NO box
+# Rasterised with Pillow (caption_renderer.py) — no ImageMagick subprocesses
 # ─────────────────────────────────────────────────────────────────────────────
 
-def _captions(timings: list, video_size: tuple) -> list:
-    clips = []
+def _caption_layout(video_size: tuple) -> dict:
+    """Caption geometry for a frame size — shared by both render backends."""
     video_w, video_h = video_size
+    scale  = video_w / BASE_WIDTH
+    margin = max(int(140 * scale), 30)
+    layout = {
+        "fontsize":  max(int(CAPTION_FONTSIZE * scale), 20),
+        "stroke_w":  max(int(CAPTION_STROKE_W * scale), 1),
+        "max_width": video_w - margin,
+        "caption_y": int(video_h * CAPTION_Y_RATIO),
+    }
+    print(f"[VideoGen] Captions — font={layout['fontsize']}px | stroke={layout['stroke_w']}px "
+          f"| y={layout['caption_y']}px")
+    return layout
 
-    scale     = video_w / BASE_WIDTH
-    fontsize  = max(int(CAPTION_FONTSIZE * scale), 20)
-    stroke_w  = max(int(CAPTION_STROKE_W * scale), 1)
-    margin    = max(int(140 * scale), 30)
-    caption_y = int(video_h * CAPTION_Y_RATIO)
 
-    print(f"[VideoGen] Captions — font={fontsize}px | stroke={stroke_w}px | y={caption_y}px")
+def _captions(timings: list, video_size: tuple) -> list:
+    clips = []
+    layout = _caption_layout(video_size)
 
     ok = 0
     for t in timings:
         dur = t["end"] - t["start"]
         if dur <= 0:
             continue
+        try:
+            card = render_caption(t["text"], layout["fontsize"], layout["stroke_w"], layout["max_width"])
+            mask = ImageClip(card[:, :, 3] / 255.0, ismask=True)
+            clips.append(
+                ImageClip(card[:, :, :3])
+                .set_mask(mask)
+                .set_start(t["start"])
+                .set_duration(dur)
+                .set_position(("center", layout["caption_y"] - card.shape[0] // 2))
+            )
+            ok += 1
+        except Exception as e:
+            print(f"[VideoGen] Caption failed '{t['text']}': {e}")
 
-        for font in ("Impact", "Arial-Bold"):
-            try:
-                txt = TextClip(
-                    txt=t["text"].upper(),
-                    fontsize=fontsize,
-                    color=CAPTION_COLOR,
-                    stroke_color=CAPTION_STROKE,
-                    stroke_width=stroke_w,
-                    font=font,
-                    method="caption",
-                    size=(video_w - margin, None),
-                    align="center",
-                )
-                clips.append(
-                    txt
-                    .set_start(t["start"])
-                    .set_duration(dur)
-                    .set_position(("center", caption_y - txt.h // 2))
-                )
-                ok += 1
-                break
-            except Exception as e:
-                if font == "Arial-Bold":
-                    print(f"[VideoGen] Caption failed '{t['text']}': {e}")
-
-    print(f"[VideoGen] Built {ok}/{len(timings)} caption cards")
+    print(f"[VideoGen] Built {ok}/{len(timings)} caption cards (cache: {caption_cache_stats()})")
     return clips
 
 
-# ─────────────────────────────────────────────────────────────────────────────
-# Main
-# ─────────────────────────────────────────────────────────────────────────────
+def _script_cards(script: str, words_per_card: int = WORDS_PER_CARD) -> list:
+    """Caption texts the narration should produce — the script's words,
+    stripped like WordBoundary/Whisper words and grouped into cards."""
+    words = [w for w in (re.sub(r'[^\w\s\'-]', '', w).strip() for w in script.split()) if w]
+    return [" ".join(words[i : i + words_per_card]) for i in range(0, len(words), words_per_card)]
 
-def generate_video(
-    summary_text: str,
-    output_filename: str = "output.mp4",
-    theme: str = "subway",
-) -> str:
-    _setup()
-    print(f"[VideoGen] 🎬 Starting (theme={theme})")
 
-    import uuid, time
-    uid      = str(uuid.uuid4())[:8]
-    temp_mp3 = str(TEMP_DIR / f"narration_{uid}.mp3")
-    temp_m4a = str(TEMP_DIR / f"temp_audio_{uid}.m4a")
+def _prerender_captions(texts: list, video_size: tuple) -> int:
+    """Rasterise cards into the caption cache ahead of the real timings."""
+    layout = _caption_layout(video_size)
+    unique = list(dict.fromkeys(t.upper() for t in texts))
+    for text in unique:
+        render_caption(text, layout["fontsize"], layout["stroke_w"], layout["max_width"])
+    return len(unique)
 
-    audio, bg, final, cap_clips = None, None, None, []
 
-    try:
-        # 1. Generate audio
-        audio_duration = _tts(summary_text, temp_mp3, theme=theme)
-        print(f"[VideoGen] Audio: {audio_duration:.3f}s")
+# ─────────────────────────────────────────────────────────────────────────────
+# Main — a small stage DAG (stages.py); independent stages run concurrently
+#
+#   tts ──────────► transcribe ─────────┐
+#   background ──► captions (pre-render)├──► render
+#   background ─────────────────────────┘
+# ─────────────────────────────────────────────────────────────────────────────
 
-        # 2. Get EXACT word timestamps via Whisper
+def _timings_for(summary_text: str, audio_duration: float, word_times: list, temp_mp3: str) -> list:
+    """Caption cards from WordBoundary timings, else Whisper, else proportional."""
+    sync = "WordBoundary"
+    if not word_times or CAPTION_TIMING == "whisper":
         word_times = _transcribe_words(temp_mp3)
+        sync = "Whisper"
+
+    if word_times:
+        timings = _build_timings_from_words(word_times, WORDS_PER_CARD)
+        print(f"[VideoGen]  {sync} sync: {len(timings)} cards "
+              f"| first='{timings[0]['text']}' @ {timings[0]['start']:.3f}s")
+    else:
+        print("[VideoGen]   No word timings — proportional fallback")
+        timings = _build_timings_fallback(summary_text, audio_duration, WORDS_PER_CARD)
+
+    for t in timings:
+        t["start"] = max(t["start"], 0.0)
+        t["end"]   = min(t["end"],   audio_duration - 0.03)
+    return timings
 
-        # 3. Build caption cards
-        if word_times:
-            timings = _build_timings_from_words(word_times, WORDS_PER_CARD)
-            print(f"[VideoGen]  Whisper sync: {len(timings)} cards "
-                  f"| first='{timings[0]['text']}' @ {timings[0]['start']:.3f}s")
-        else:
-            print("[VideoGen]   Whisper unavailable — proportional fallback")
-            timings = _build_timings_fallback(summary_text, audio_duration, WORDS_PER_CARD)
 
-        for t in timings:
-            t["start"] = max(t["start"], 0.0)
-            t["end"]   = min(t["end"],   audio_duration - 0.03)
+def _prepare_background_stage(theme: str, script: str) -> dict:
+    """Cached background clip, its start keyframe and the output size both
+    renderers will use."""
+    path, start = _prepared_background(theme, script)
+    size = None
+    if path and ffmpeg_binary():
+        size = output_size(probe_size(str(path)))
+    return {"path": path, "start": start, "size": size or output_size(None)}
 
-        # 4. Background
-        bg = _background(theme, audio_duration)
+
+def _render_moviepy(bg_path, temp_mp3: str, timings: list, audio_duration: float,
+                    out_path: str, temp_m4a: str, bg_start: float = 0.0):
+    audio, bg, final, cap_clips = None, None, None, []
+    try:
+        bg = _background(bg_path, audio_duration, bg_start)
         video_size = bg.size
         if video_size[0] > 1920 or video_size[1] > 1080:
             bg = bg.resize(height=1080)
             video_size = bg.size
         print(f"[VideoGen] Video size: {video_size}")
 
-        # 5. Captions
         cap_clips = _captions(timings, video_size)
 
-        # 6. Composite
         final = CompositeVideoClip([bg] + cap_clips, size=video_size).set_duration(audio_duration)
         try:
             audio = AudioFileClip(temp_mp3).subclip(0, audio_duration)
@@ -431,22 +552,75 @@ def generate_video(
         except Exception as e:
             print(f"[VideoGen] Audio attach warning: {e}")
 
-        # 7. Render
-        out_path = str(OUTPUT_DIR / output_filename)
         print(f"[VideoGen] Rendering → {out_path}")
         final.write_videofile(
             out_path, fps=24, codec="libx264", audio_codec="aac",
             preset="ultrafast", threads=4,
             temp_audiofile=temp_m4a, remove_temp=True, verbose=False, logger=None,
         )
-        print(f"[VideoGen]  Done: {out_path}")
-
     finally:
-        time.sleep(0.3)
         for clip in [audio, bg, final] + cap_clips:
             with contextlib.suppress(Exception):
                 if clip is not None:
                     clip.close()
+
+
+def generate_video(
+    summary_text: str,
+    output_filename: str = "output.mp4",
+    theme: str = "subway",
+    stage_timings: dict | None = None,
+    on_stage=None,
+) -> str:
+    """Render the narrated, captioned video; returns its absolute path.
+
+    stage_timings (optional dict) is filled with each stage's start offset
+    and duration as the render progresses; on_stage(name, timing) is called
+    as each one finishes — the job handler uses both for the job status.
+    """
+    _setup()
+    print(f"[VideoGen] 🎬 Starting (theme={theme})")
+
+    import uuid, time
+    uid      = str(uuid.uuid4())[:8]
+    temp_mp3 = str(TEMP_DIR / f"narration_{uid}.mp3")
+    temp_m4a = str(TEMP_DIR / f"temp_audio_{uid}.m4a")
+    out_path = str(OUTPUT_DIR / output_filename)
+    script   = _video_script(summary_text)
+
+    def _render(r):
+        (audio_duration, _), timings, bg = r["tts"], r["transcribe"], r["background"]
+        print(f"[VideoGen] Audio: {audio_duration:.3f}s")
+        # One ffmpeg process does background, captions, audio and encode
+        if VIDEO_RENDERER == "ffmpeg" and ffmpeg_binary():
+            try:
+                render_with_ffmpeg(str(bg["path"]) if bg["path"] else None, temp_mp3, timings,
+                                   audio_duration, out_path, layout_for=_caption_layout,
+                                   bg_start=bg["start"], size=bg["size"])
+                print(f"[VideoGen]  Done (ffmpeg): {out_path}")
+                return out_path
+            except Exception as e:
+                print(f"[VideoGen] ffmpeg render failed ({e}) — falling back to moviepy")
+        _render_moviepy(bg["path"], temp_mp3, timings, audio_duration, out_path, temp_m4a,
+                        bg_start=bg["start"])
+        print(f"[VideoGen]  Done: {out_path}")
+        return out_path
+
+    stages = {
+        "tts":        ((), lambda r: _speak(script, temp_mp3, theme=theme)),
+        "background": ((), lambda r: _prepare_background_stage(theme, script)),
+        "transcribe": (("tts",), lambda r: _timings_for(summary_text, r["tts"][0], r["tts"][1], temp_mp3)),
+        "captions":   (("background",), lambda r: _prerender_captions(_script_cards(script),
+                                                                      r["background"]["size"])),
+        "render":     (("tts", "transcribe", "background", "captions"), _render),
+    }
+
+    try:
+        _, timings = run_stages(stages, on_stage=on_stage, timings=stage_timings)
+        print("[VideoGen] Stage timings: " + ", ".join(
+            f"{name}={t['seconds']:.2f}s" for name, t in timings.items() if t["seconds"] is not None))
+    finally:
+        time.sleep(0.3)
         with contextlib.suppress(Exception):
             if os.path.exists(temp_mp3):
                 os.remove(temp_mp3)
@@ -454,7 +628,6 @@ def generate_video(
     return os.path.abspath(out_path)
 
 
-# ── Self-test ─────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     sample = (
         "Mitosis is when a cell splits into two identical copies. "
@@ -1,5 +1,5 @@
 # database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -19,4 +19,20 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def ensure_columns(table: str, columns: dict):
+    """Add columns that create_all() can't add to an existing table.
+
+    columns maps name → SQL type, e.g. {"content_hash": "VARCHAR(64)"}.
+    Safe to call on every start; existing columns are left alone.
+    """
+    existing = {c["name"] for c in inspect(engine).get_columns(table)}
+    missing = {name: ddl for name, ddl in columns.items() if name not in existing}
+    if not missing:
+        return
+    with engine.begin() as conn:
+        for name, ddl in missing.items():
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+            print(f"[DB] Added column {table}.{name}")
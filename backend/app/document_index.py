@@ -0,0 +1,234 @@
+"""
+PadaiSathi — document_index.py
+Per-page and per-chunk index of a document's extracted text.
+
+Built once when extraction finishes (in the extraction process pool, see
+build_index_rows). DocumentPage and DocumentChunk rows
+hold character offsets into Document.extracted_text, plus token counts and
+sentence boundaries, so generation pipelines can pull just the slices they
+need with SQL substr() instead of loading and regex-splitting the whole
+text on every request. DocumentKeywordIndex holds the document's top terms
+and their neighbours for quiz distractors.
+"""
+import os
+import re
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from . import models
+from .ai.chunker import count_tokens, count_tokens_batch, STUDY_CHUNK_TOKENS
+from .ai.keywords import build_keyword_index
+
+# ── Config ────────────────────────────────────────────────────────────────────
+# Chunk budget in Flan-T5 tokens — one chunk per quiz / flashcard prompt
+DOCUMENT_CHUNK_TOKENS = int(os.getenv("DOCUMENT_CHUNK_TOKENS", str(STUDY_CHUNK_TOKENS)))
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+def _sentence_spans(page: str) -> list:
+    """[start, end] of each sentence in page (page-relative offsets)."""
+    spans, pos = [], 0
+    for m in _SENTENCE_BREAK.finditer(page):
+        if m.start() > pos:
+            spans.append([pos, m.start()])
+        pos = m.end()
+    if pos < len(page):
+        spans.append([pos, len(page)])
+    return spans
+
+
+def build_document_index(pages: list, chunk_tokens: int = DOCUMENT_CHUNK_TOKENS) -> tuple:
+    """(page_rows, chunk_rows) for a text that is "\\n\\n".join(non-empty pages).
+
+    That join is exactly what pdf_extractor.extract_document() stores as the
+    document text, so every offset here can be fed straight to substr().
+    """
+    page_rows, chunk_rows = [], []
+    offset, first = 0, True
+    chunk = None
+
+    def _close(c):
+        if c:
+            c["chunk_index"] = len(chunk_rows)
+            chunk_rows.append(c)
+
+    for number, page in enumerate(pages, start=1):
+        if page:
+            if not first:
+                offset += 2                       # the "\n\n" between pages
+            first = False
+        start = offset
+        sentences = []
+        spans = _sentence_spans(page)
+        for (a, b), tokens in zip(spans, count_tokens_batch([page[a:b] for a, b in spans])):
+            sentences.append([start + a, start + b])
+            if chunk and chunk["token_count"] + tokens > chunk_tokens:
+                _close(chunk)
+                chunk = None
+            if chunk is None:
+                chunk = {"page_start": number, "char_start": start + a,
+                         "token_count": 0, "sentence_count": 0}
+            chunk["page_end"] = number
+            chunk["char_end"] = start + b
+            chunk["token_count"] += tokens
+            chunk["sentence_count"] += 1
+        offset = start + len(page)
+        page_rows.append({
+            "page_number": number,
+            "char_start":  start,
+            "char_end":    offset,
+            "token_count": count_tokens(page),
+            "sentences":   sentences,
+        })
+    _close(chunk)
+    return page_rows, chunk_rows
+
+
+def build_index_rows(pages: list) -> dict:
+    """Page, chunk and keyword rows for a document, with no database access.
+
+    Tokenizing and the keyword build are CPU-bound, so uploads run this in
+    the extraction process pool (pdf_extractor.submit_extraction's
+    postprocess) and the API process only inserts the result.
+    """
+    page_rows, chunk_rows = build_document_index(pages)
+    return {
+        "pages":    page_rows,
+        "chunks":   chunk_rows,
+        "keywords": build_keyword_index("\n\n".join(p for p in pages if p)),
+    }
+
+
+def store_document_index(db: Session, document_id: int, pages: list, rows: dict = None):
+    """(Re)build the page, chunk and keyword rows for a document. Caller commits.
+
+    rows: build_index_rows(pages) if it was already built elsewhere.
+    """
+    rows = rows or build_index_rows(pages)
+    page_rows, chunk_rows, keyword_index = rows["pages"], rows["chunks"], rows["keywords"]
+    clear_document_index(db, document_id)
+    # The keyword row (unique per document) goes in first and doubles as the
+    # claim: a concurrent writer hits IntegrityError here, before adding any
+    # page or chunk rows, and its whole transaction is rolled back
+    db.add(models.DocumentKeywordIndex(document_id=document_id, **keyword_index))
+    db.flush()
+    db.bulk_insert_mappings(models.DocumentPage, [{**r, "document_id": document_id} for r in page_rows])
+    db.bulk_insert_mappings(models.DocumentChunk, [{**r, "document_id": document_id} for r in chunk_rows])
+    print(f"[DocIndex] doc_id={document_id}: {len(page_rows)} pages, {len(chunk_rows)} chunks, "
+          f"{len(keyword_index['terms'])} keywords")
+
+
+def copy_document_index(db: Session, from_document_id: int, to_document_id: int) -> bool:
+    """Reuse another document's index (same content hash → same offsets). Caller commits."""
+    pages = db.query(models.DocumentPage).filter(models.DocumentPage.document_id == from_document_id).all()
+    chunks = db.query(models.DocumentChunk).filter(models.DocumentChunk.document_id == from_document_id).all()
+    if not chunks:
+        return False
+    db.bulk_insert_mappings(models.DocumentPage, [{
+        "document_id": to_document_id, "page_number": p.page_number, "char_start": p.char_start,
+        "char_end": p.char_end, "token_count": p.token_count, "sentences": p.sentences,
+    } for p in pages])
+    db.bulk_insert_mappings(models.DocumentChunk, [{
+        "document_id": to_document_id, "chunk_index": c.chunk_index, "page_start": c.page_start,
+        "page_end": c.page_end, "char_start": c.char_start, "char_end": c.char_end,
+        "token_count": c.token_count, "sentence_count": c.sentence_count,
+    } for c in chunks])
+    keywords = db.query(models.DocumentKeywordIndex).filter(
+        models.DocumentKeywordIndex.document_id == from_document_id
+    ).first()
+    if keywords:
+        db.add(models.DocumentKeywordIndex(document_id=to_document_id, terms=keywords.terms,
+                                           neighbours=keywords.neighbours))
+    return True
+
+
+def clear_document_index(db: Session, document_id: int):
+    db.query(models.DocumentPage).filter(models.DocumentPage.document_id == document_id).delete(synchronize_session=False)
+    db.query(models.DocumentChunk).filter(models.DocumentChunk.document_id == document_id).delete(synchronize_session=False)
+    db.query(models.DocumentKeywordIndex).filter(models.DocumentKeywordIndex.document_id == document_id).delete(synchronize_session=False)
+
+
+def _ensure_index(db: Session, document_id: int) -> int:
+    """Chunk count, indexing legacy documents (uploaded before this table) on first use."""
+    count = db.query(func.count(models.DocumentChunk.id)).filter(
+        models.DocumentChunk.document_id == document_id
+    ).scalar()
+    if count:
+        return count
+    doc = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc or not doc.extracted_text:
+        return 0
+    rows = build_index_rows([doc.extracted_text])       # before any write
+    try:
+        store_document_index(db, document_id, [doc.extracted_text], rows=rows)
+        db.commit()
+    except IntegrityError:
+        db.rollback()                     # a concurrent request indexed it first
+    return db.query(func.count(models.DocumentChunk.id)).filter(
+        models.DocumentChunk.document_id == document_id
+    ).scalar()
+
+
+def get_document_chunks(db: Session, document_id: int, max_chunks: int = None) -> list:
+    """Chunk texts in reading order, fetched with substr() — never the full blob.
+
+    With max_chunks, picks that many chunks spread evenly over the whole
+    document instead of only the first pages.
+    """
+    total = _ensure_index(db, document_id)
+    if not total:
+        return []
+    q = db.query(
+        models.DocumentChunk.chunk_index,
+        func.substr(
+            models.Document.extracted_text,
+            models.DocumentChunk.char_start + 1,                       # SQL is 1-based
+            models.DocumentChunk.char_end - models.DocumentChunk.char_start,
+        ),
+    ).select_from(models.DocumentChunk).join(
+        models.Document, models.Document.id == models.DocumentChunk.document_id
+    ).filter(
+        models.DocumentChunk.document_id == document_id
+    )
+    if max_chunks and total > max_chunks:
+        wanted = sorted({round(i * (total - 1) / max(max_chunks - 1, 1)) for i in range(max_chunks)})
+        q = q.filter(models.DocumentChunk.chunk_index.in_(wanted))
+    return [text for _, text in q.order_by(models.DocumentChunk.chunk_index.asc()).all()]
+
+
+def get_page_text(db: Session, document_id: int, page_number: int) -> str | None:
+    row = db.query(
+        func.substr(
+            models.Document.extracted_text,
+            models.DocumentPage.char_start + 1,
+            models.DocumentPage.char_end - models.DocumentPage.char_start,
+        )
+    ).select_from(models.DocumentPage).join(
+        models.Document, models.Document.id == models.DocumentPage.document_id
+    ).filter(
+        models.DocumentPage.document_id == document_id,
+        models.DocumentPage.page_number == page_number,
+    ).first()
+    return row[0] if row else None
+
+
+def get_keyword_index(db: Session, document_id: int) -> dict | None:
+    """The stored keyword index, built from the text on first use for older documents."""
+    row = db.query(models.DocumentKeywordIndex).filter(
+        models.DocumentKeywordIndex.document_id == document_id
+    ).first()
+    if row:
+        return {"terms": row.terms, "neighbours": row.neighbours}
+    doc = db.query(models.Document).filter(models.Document.id == document_id).first()
+    if not doc or not doc.extracted_text:
+        return None
+    keyword_index = build_keyword_index(doc.extracted_text)
+    try:
+        db.add(models.DocumentKeywordIndex(document_id=document_id, **keyword_index))
+        db.commit()
+    except IntegrityError:
+        db.rollback()                     # a concurrent request stored it first
+    return keyword_index
@@ -0,0 +1,280 @@
+"""
+PadaiSathi — job_queue.py
+Durable, DB-backed job queue shared by every API/worker process.
+
+Jobs are rows in the `jobs` table. Workers claim a row with a
+compare-and-set UPDATE (works on PostgreSQL and SQLite alike), so any
+number of uvicorn workers or standalone `python -m app.worker` processes
+can pull from the same queue without double-running a job. Failed jobs are
+retried with exponential backoff; jobs whose worker died mid-run are
+reclaimed once their lock goes stale. Workers heartbeat the lock while a
+job runs, and only the current lock holder may complete or fail it, so a
+long render is never picked up a second time.
+"""
+import os
+import time
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# ── Config ────────────────────────────────────────────────────────────────────
+JOB_MAX_ATTEMPTS         = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS   = int(os.getenv("JOB_RETRY_BASE_SECONDS", "15"))
+JOB_LOCK_TIMEOUT_MINUTES = int(os.getenv("JOB_LOCK_TIMEOUT_MINUTES", "30"))
+JOB_POLL_SECONDS         = float(os.getenv("JOB_POLL_SECONDS", "2"))
+# Running jobs refresh locked_at this often, so only a dead worker's lock goes stale
+JOB_HEARTBEAT_SECONDS    = float(os.getenv("JOB_HEARTBEAT_SECONDS", "60"))
+
+ACTIVE_STATUSES = ("queued", "processing")
+
+_workers: list = []
+_stop_event = threading.Event()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Producer side (called from request handlers)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def enqueue_job(db: Session, kind: str, payload: dict,
+                user_id: int = None, summary_id: int = None,
+                max_attempts: int = JOB_MAX_ATTEMPTS) -> models.Job:
+    now = datetime.utcnow()
+    job = models.Job(
+        kind=kind,
+        status="queued",
+        payload=payload,
+        user_id=user_id,
+        summary_id=summary_id,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=now,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    print(f"[JobQueue] Enqueued {kind} job #{job.id}")
+    return job
+
+
+def find_active_job(db: Session, kind: str, summary_id: int) -> models.Job | None:
+    """A queued/processing job of this kind for the summary, if any."""
+    return db.query(models.Job).filter(
+        models.Job.kind == kind,
+        models.Job.summary_id == summary_id,
+        models.Job.status.in_(ACTIVE_STATUSES),
+    ).order_by(models.Job.id.desc()).first()
+
+
+def latest_job(db: Session, kind: str, summary_id: int) -> models.Job | None:
+    return db.query(models.Job).filter(
+        models.Job.kind == kind,
+        models.Job.summary_id == summary_id,
+    ).order_by(models.Job.id.desc()).first()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Consumer side (worker threads)
+# ─────────────────────────────────────────────────────────────────────────────
+
+def claim_job(kinds: list, worker_id: str) -> models.Job | None:
+    """Atomically claim the oldest runnable job of the given kinds.
+
+    Returns a detached Job snapshot, or None if nothing is runnable.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        stale = now - timedelta(minutes=JOB_LOCK_TIMEOUT_MINUTES)
+        candidates = db.query(models.Job.id, models.Job.status, models.Job.locked_at).filter(
+            models.Job.kind.in_(kinds),
+            (
+                ((models.Job.status == "queued") & (models.Job.run_after <= now)) |
+                ((models.Job.status == "processing") & (models.Job.locked_at < stale))
+            ),
+        ).order_by(models.Job.id.asc()).limit(5).all()
+
+        for job_id, status, locked_at in candidates:
+            # Compare-and-set: only succeeds if nobody claimed it in between
+            q = db.query(models.Job).filter(
+                models.Job.id == job_id,
+                models.Job.status == status,
+            )
+            q = q.filter(models.Job.locked_at == locked_at) if locked_at else q.filter(models.Job.locked_at.is_(None))
+            claimed = q.update({
+                models.Job.status:     "processing",
+                models.Job.locked_by:  worker_id,
+                models.Job.locked_at:  now,
+                models.Job.attempts:   models.Job.attempts + 1,
+                models.Job.updated_at: now,
+            }, synchronize_session=False)
+            db.commit()
+            if claimed == 1:
+                job = db.query(models.Job).filter(models.Job.id == job_id).first()
+                db.expunge(job)
+                if status == "processing":
+                    print(f"[JobQueue] Reclaimed stale job #{job_id} (worker died?)")
+                return job
+        return None
+    finally:
+        db.close()
+
+
+def record_job_progress(job_id: int, result: dict):
+    """Partial result for a job that is still running (e.g. stage timings)."""
+    db = SessionLocal()
+    try:
+        db.query(models.Job).filter(
+            models.Job.id == job_id,
+            models.Job.status == "processing",
+        ).update({
+            models.Job.result:     result,
+            models.Job.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def complete_job(job_id: int, result: dict, worker_id: str = None) -> bool:
+    """Mark done. With worker_id, only if that worker still holds the lock."""
+    db = SessionLocal()
+    try:
+        q = db.query(models.Job).filter(models.Job.id == job_id)
+        if worker_id:
+            q = q.filter(models.Job.locked_by == worker_id)
+        updated = q.update({
+            models.Job.status:     "done",
+            models.Job.result:     result,
+            models.Job.error:      None,
+            models.Job.locked_by:  None,
+            models.Job.locked_at:  None,
+            models.Job.updated_at: datetime.utcnow(),
+        }, synchronize_session=False)
+        db.commit()
+        if not updated:
+            print(f"[JobQueue] Job #{job_id} finished on {worker_id} after its lock was taken over — result dropped")
+        return updated == 1
+    finally:
+        db.close()
+
+
+def fail_job(job_id: int, error: str, worker_id: str = None):
+    """Requeue with exponential backoff, or mark as error once out of attempts.
+
+    With worker_id, nothing happens unless that worker still holds the lock.
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(models.Job).filter(models.Job.id == job_id).first()
+        if not job:
+            return
+        if worker_id and job.locked_by != worker_id:
+            print(f"[JobQueue] Job #{job_id} failed on {worker_id} after its lock was taken over — ignored")
+            return
+        now = datetime.utcnow()
+        job.error      = error
+        job.locked_by  = None
+        job.locked_at  = None
+        job.updated_at = now
+        if (job.attempts or 0) < (job.max_attempts or JOB_MAX_ATTEMPTS):
+            delay = JOB_RETRY_BASE_SECONDS * (2 ** max((job.attempts or 1) - 1, 0))
+            job.status    = "queued"
+            job.run_after = now + timedelta(seconds=delay)
+            print(f"[JobQueue] Job #{job_id} failed (attempt {job.attempts}) — retrying in {delay}s")
+        else:
+            job.status = "error"
+            print(f"[JobQueue] Job #{job_id} failed permanently after {job.attempts} attempts")
+        db.commit()
+    finally:
+        db.close()
+
+
+def _heartbeat(job_id: int, worker_id: str, stop: threading.Event):
+    """Keep the job's lock fresh while its handler runs."""
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            alive = db.query(models.Job).filter(
+                models.Job.id == job_id,
+                models.Job.locked_by == worker_id,
+                models.Job.status == "processing",
+            ).update({models.Job.locked_at: datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+            if not alive:
+                return
+        except Exception as e:
+            print(f"[JobQueue] Heartbeat failed for job #{job_id}: {e}")
+        finally:
+            db.close()
+
+
+def _worker_loop(handlers: dict, worker_id: str):
+    kinds = list(handlers)
+    print(f"[JobQueue] Worker {worker_id} polling for {kinds}")
+    while not _stop_event.is_set():
+        try:
+            job = claim_job(kinds, worker_id)
+        except Exception as e:
+            print(f"[JobQueue] Claim error on {worker_id}: {e}")
+            job = None
+        if job is None:
+            _stop_event.wait(JOB_POLL_SECONDS)
+            continue
+
+        print(f"[JobQueue] {worker_id} running {job.kind} job #{job.id} (attempt {job.attempts})")
+        beat_stop = threading.Event()
+        threading.Thread(target=_heartbeat, args=(job.id, worker_id, beat_stop),
+                         name=f"{worker_id}-heartbeat", daemon=True).start()
+        try:
+            result = handlers[job.kind](job.id, job.payload)
+            if complete_job(job.id, result or {}, worker_id):
+                print(f"[JobQueue] Job #{job.id} done ✅")
+        except Exception as e:
+            traceback.print_exc()
+            fail_job(job.id, str(e), worker_id)
+        finally:
+            beat_stop.set()
+
+
+def start_workers(handlers: dict, concurrency: int = 1, name: str = "worker") -> list:
+    """Start `concurrency` daemon threads that process jobs of the handled kinds.
+
+    handlers maps job kind → fn(job_id, payload) -> result dict.
+    Raising from a handler triggers retry with backoff.
+    """
+    threads = []
+    host = f"{socket.gethostname()}:{os.getpid()}"
+    for i in range(max(concurrency, 0)):
+        worker_id = f"{host}:{name}-{i + 1}"
+        t = threading.Thread(target=_worker_loop, args=(handlers, worker_id),
+                             name=worker_id, daemon=True)
+        t.start()
+        threads.append(t)
+    _workers.extend(threads)
+    return threads
+
+
+def stop_workers(timeout: float = 5.0):
+    _stop_event.set()
+    for t in _workers:
+        t.join(timeout=timeout)
+    _workers.clear()
+
+
+def run_forever(handlers: dict, concurrency: int = 1, name: str = "worker"):
+    """Blocking entry point for standalone worker processes."""
+    start_workers(handlers, concurrency, name)
+    try:
+        while not _stop_event.is_set():
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("[JobQueue] Shutting down workers...")
+        stop_workers()
@@ -3,10 +3,13 @@ PadaiSathi API v2.0
 Replaces backend/app/main.py
 Keeps all your working auth + adds summarize + video generation.
 """
-from fastapi import FastAPI, HTTPException, Form, UploadFile, File, Depends, BackgroundTasks, Request
+import time
+_BOOT_STARTED = time.monotonic()   # startup-time metric — see /api/ready
+
+from fastapi import FastAPI, HTTPException, Form, UploadFile, File, Depends, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -32,15 +35,17 @@ def _effective_streak(user) -> int:
         return 0
     return user.streak or 0
 from pathlib import Path
+from sqlalchemy import text as sql_text
 from sqlalchemy.orm import Session
 
 from . import models
-from .database import engine, get_db, Base
+from .database import engine, get_db, Base, SessionLocal, ensure_columns
 
 
 # google auth
 from starlette.requests import Request
-from starlette.responses import RedirectResponse, JSONResponse
+from starlette.responses import RedirectResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from .auth import oauth, create_access_token, GOOGLE_REDIRECT_URI, FRONTEND_URL
 import secrets
 import httpx
@@ -49,11 +54,32 @@ import json
 
 
 # ── AI modules ────────────────────────────────────────────────────────────────
-from .ai.pdf_extractor   import extract_text_from_pdf
-from .ai.summarizer      import summarize
-from .ai.video_generator import generate_video
+from .ai.pdf_extractor   import submit_extraction, shutdown_extraction_pool
+from .ai.summarizer      import summarize, stream_summarize
+from .ai.video_generator import generate_video, render_cache_key
+from .job_queue          import (enqueue_job, find_active_job, latest_job, start_workers, stop_workers,
+                               record_job_progress)
+from .document_index     import build_index_rows, store_document_index, copy_document_index, get_document_chunks, get_keyword_index
+from .summary_cache      import (summary_cache_key, get_cached_summary, store_cached_summary,
+                                 summary_cache_stats, chunk_summary_cache)
+from .render_cache       import (acquire_render, mark_rendered, mark_uploaded, release_render,
+                                 render_cache_stats)
+from .ai                 import model_registry
+from .ai.engine_pool     import pool_stats as engine_pool_stats
+from .ai.transcriber     import transcriber_stats
+from .ai.tts_cache       import tts_cache_stats
 # ── DB ────────────────────────────────────────────────────────────────────────
 Base.metadata.create_all(bind=engine)
+ensure_columns("documents", {
+    "content_hash":      "VARCHAR(64)",
+    "extraction_status": "VARCHAR(20)",
+    "extraction_error":  "TEXT",
+})
+for _table_name in ("videos", "summaries", "flashcards", "quizzes"):
+    ensure_columns(_table_name, {"job_id": "INTEGER"})
+for _table in (models.Document, models.Video, models.Summary, models.Flashcard, models.Quiz):
+    for _index in _table.__table__.indexes:
+        _index.create(bind=engine, checkfirst=True)
 
 limiter = Limiter(key_func=get_remote_address)
 app = FastAPI(title="PadaiSathi API", version="2.0")
@@ -78,6 +104,10 @@ app.mount("/videos", StaticFiles(directory=str(VIDEO_OUT_DIR)), name="videos")
 
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
+MAX_UPLOAD_MB      = int(os.getenv("MAX_UPLOAD_MB", "50"))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# How long a queued summarize job waits for its document to finish extracting
+EXTRACTION_WAIT_SECONDS = int(os.getenv("EXTRACTION_WAIT_SECONDS", "120"))
 
 # ── Password helpers (bcrypt with SHA256 backward compatibility) ──────────────
 def simple_hash_password(password: str) -> str:
@@ -98,8 +128,17 @@ def simple_verify_password(plain: str, hashed: str) -> bool:
         # Old SHA256 hash — still works for existing users
         return hashlib.sha256(plain.encode()).hexdigest() == hashed
 
-# ── Video job tracker (in-memory) ─────────────────────────────────────────────
-_video_jobs: dict = {}   # { summary_id: {status, video_url, error} }
+# ── Background jobs (DB-backed, shared across processes) ─────────────────────
+# VIDEO_WORKERS = render threads inside this API process. Set to 0 and run
+# `python -m app.worker` on separate machines to scale rendering on its own.
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", "1"))
+
+# ── Models (loaded lazily, see ai/model_registry.py) ─────────────────────────
+# MODEL_WARMUP = comma-separated models to load in a background thread right
+# after startup (e.g. "flan,whisper"). Readiness waits on these; anything not listed
+# loads on first use instead.
+MODEL_WARMUP = [m.strip() for m in os.getenv("MODEL_WARMUP", "").split(",") if m.strip()]
+_startup_seconds = None
 
 # badges definiations
 BADGE_DEFINITIONS = [
@@ -160,6 +199,7 @@ class SummarizeRequest(BaseModel):
     document_id: int
     user_email: str
     genz_style: bool = True
+    async_job: bool = False
 
 class VideoRequest(BaseModel):
     summary_id: int
@@ -198,9 +238,40 @@ def health(db: Session = Depends(get_db)):
         "documents": db.query(models.Document).count(),
         "summaries": db.query(models.Summary).count(),
         "videos":    db.query(models.Video).count(),
+        "summary_cache": summary_cache_stats(db),
+        "render_cache":  render_cache_stats(),
+        "models":    model_registry.status(),
+        "ai_engine_keys": engine_pool_stats(),
+        "transcriber": transcriber_stats(),
+        "tts_cache":   tts_cache_stats(),
+        "signed_urls": sas_cache_stats(),
+        "startup_seconds": _startup_seconds,
         "timestamp": datetime.now().isoformat()
     }
 
+
+@app.get("/api/ready")
+def ready(db: Session = Depends(get_db)):
+    """Readiness — 503 until the DB answers and every MODEL_WARMUP model is loaded.
+
+    /api/health stays the liveness check; it never waits on models.
+    """
+    checks = {"startup_complete": _startup_seconds is not None}
+    try:
+        db.execute(sql_text("SELECT 1"))
+        checks["database"] = True
+    except Exception:
+        checks["database"] = False
+    for name in MODEL_WARMUP:
+        checks[f"model:{name}"] = model_registry.is_ready(name)
+    body = {
+        "ready":  all(checks.values()),
+        "checks": checks,
+        "models": model_registry.status(),
+        "startup_seconds": _startup_seconds,
+    }
+    return JSONResponse(status_code=200 if body["ready"] else 503, content=body)
+
 # Add this import at the top of main.py with the other imports
 import re
 
@@ -316,11 +387,22 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
         (models.Friendship.receiver_id == user_id)
     ).delete(synchronize_session=False)
     db.query(models.Favorite).filter(models.Favorite.user_id == user_id).delete()
+    db.query(models.QuizAttempt).filter(models.QuizAttempt.user_id == user_id).delete()
     db.query(models.Quiz).filter(models.Quiz.user_id == user_id).delete()
     db.query(models.Flashcard).filter(models.Flashcard.user_id == user_id).delete()
     db.query(models.Video).filter(models.Video.user_id == user_id).delete()
+    # Jobs reference summaries (jobs.summary_id), so they go before them
+    summary_ids = db.query(models.Summary.id).filter(models.Summary.user_id == user_id)
+    db.query(models.Job).filter(
+        (models.Job.user_id == user_id) | models.Job.summary_id.in_(summary_ids)
+    ).delete(synchronize_session=False)
     db.query(models.Summary).filter(models.Summary.user_id == user_id).delete()
     db.query(models.Notebook).filter(models.Notebook.user_id == user_id).delete()
+    doc_ids = [d.id for d in db.query(models.Document.id).filter(models.Document.user_id == user_id)]
+    if doc_ids:
+        db.query(models.DocumentPage).filter(models.DocumentPage.document_id.in_(doc_ids)).delete(synchronize_session=False)
+        db.query(models.DocumentChunk).filter(models.DocumentChunk.document_id.in_(doc_ids)).delete(synchronize_session=False)
+        db.query(models.DocumentKeywordIndex).filter(models.DocumentKeywordIndex.document_id.in_(doc_ids)).delete(synchronize_session=False)
     db.query(models.Document).filter(models.Document.user_id == user_id).delete()
     db.delete(user)
     db.commit()
@@ -330,6 +412,98 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
 # ═════════════════════════════════════════════════════════════════════════════
 # Upload  now also extracts text and stores Document record
 # ═════════════════════════════════════════════════════════════════════════════
+# ── Upload helpers ───────────────────────────────────────────────────────────
+
+async def _save_upload(file: UploadFile, file_path: str) -> str:
+    """Stream the upload to disk in chunks, enforcing MAX_UPLOAD_MB.
+
+    Returns the sha256 of the file, computed on the fly. Disk writes go
+    through the threadpool so a big upload never blocks the event loop.
+    """
+    max_bytes = MAX_UPLOAD_MB * 1024 * 1024
+    hasher = hashlib.sha256()
+    size = 0
+    buffer = await run_in_threadpool(open, file_path, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File is larger than {MAX_UPLOAD_MB} MB")
+            hasher.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        await run_in_threadpool(_remove_quietly, file_path)
+        raise
+    await run_in_threadpool(buffer.close)
+    print(f"[Upload] Saved {file.filename} ({size} bytes)")
+    return hasher.hexdigest()
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _finish_extraction(doc_id: int, future):
+    """Done-callback of the extraction process pool: store the text on the document.
+
+    The text and status are committed first, so a failure while storing the
+    page/chunk index can't leave the document "extracting" (the index is
+    then built on first read, see document_index._ensure_index).
+    """
+    try:
+        extracted = future.result()
+        extracted_text, status, error = extracted["text"], "ready", None
+    except Exception as e:
+        extracted, extracted_text, status, error = None, "", "failed", str(e)
+        print(f"[Upload] Text extraction warning for doc_id={doc_id}: {e}")
+    db = SessionLocal()
+    try:
+        db.query(models.Document).filter(models.Document.id == doc_id).update({
+            models.Document.extracted_text:    extracted_text,
+            models.Document.extraction_status: status,
+            models.Document.extraction_error:  error,
+        }, synchronize_session=False)
+        db.commit()
+        pages = len(extracted["pages"]) if extracted else 0
+        print(f"[Upload] doc_id={doc_id} extraction {status} ({pages} pages, {len(extracted_text)} chars)")
+
+        if extracted and extracted.get("index"):
+            try:
+                # Rows were built in the extraction pool — only inserted here
+                store_document_index(db, doc_id, extracted["pages"], rows=extracted["index"])
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"[Upload] Could not store the index for doc_id={doc_id}: {e}")
+    except Exception as e:
+        # Exceptions in a done-callback are otherwise swallowed
+        print(f"[Upload] Could not save extraction for doc_id={doc_id}: {e}")
+    finally:
+        db.close()
+
+
+def _require_extracted_text(doc, db: Session, wait_seconds: float = 0):
+    """Make sure the document has finished extracting and has enough text to
+    work with. Requests fail fast with 409 while it is still extracting; only
+    background jobs pass wait_seconds to wait (bounded) for it."""
+    deadline = time.monotonic() + wait_seconds
+    while doc.extraction_status == "extracting" and time.monotonic() < deadline:
+        time.sleep(0.5)
+        db.refresh(doc)
+    if doc.extraction_status == "extracting":
+        raise HTTPException(status_code=409, detail="Document is still being processed. Try again shortly.",
+                            headers={"Retry-After": "2"})
+    if not doc.extracted_text or len(doc.extracted_text.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Document has no extractable text. Try re-uploading the PDF.")
+
+
 @app.post("/api/upload")
 async def upload_pdf(
     email: str = Form(...),
@@ -347,14 +521,13 @@ async def upload_pdf(
 
     safe_filename = str(uuid.uuid4()) + Path(file.filename).suffix.lower()
     file_path = str(UPLOAD_DIR / safe_filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    content_hash = await _save_upload(file, file_path)
 
-    try:
-        extracted_text = extract_text_from_pdf(file_path)
-    except Exception as e:
-        extracted_text = ""
-        print(f"[Upload] Text extraction warning: {e}")
+    # Same bytes uploaded before (re-upload, or a classmate's copy) → reuse its text
+    previous = db.query(models.Document).filter(
+        models.Document.content_hash == content_hash,
+        models.Document.extraction_status == "ready",
+    ).first()
 
     # Step 1: Save document FIRST and commit
     doc = models.Document(
@@ -363,12 +536,24 @@ async def upload_pdf(
         file_path=file_path,
         file_type=_ext.lstrip('.'),
         upload_date=datetime.utcnow(),
-        extracted_text=extracted_text,
+        extracted_text=previous.extracted_text if previous else None,
+        content_hash=content_hash,
+        extraction_status="ready" if previous else "extracting",
     )
     db.add(doc)
     db.commit()       # commit first
     db.refresh(doc)   #  doc.id 
 
+    if previous:
+        print(f"[Upload] Reusing extracted text of doc_id={previous.id} for doc_id={doc.id} ⚡")
+        if copy_document_index(db, previous.id, doc.id):
+            db.commit()
+    else:
+        # Extraction runs in the process pool; the document row is updated when it lands
+        submit_extraction(file_path, build_index_rows).add_done_callback(
+            lambda fut, doc_id=doc.id: _finish_extraction(doc_id, fut)
+        )
+
     # Step 2: Now create notebook with the real doc.id
     notebook = models.Notebook(
         user_id=user.id,
@@ -391,20 +576,59 @@ async def upload_pdf(
         "document_id": doc.id,
         "notebook_id": notebook.id,
         "file_path": file_path,
-        "extracted_chars": len(extracted_text or ""),
-        "status": "ready_to_summarize",
+        "extracted_chars": len(doc.extracted_text or ""),
+        "extraction_status": doc.extraction_status,
+        "status": "ready_to_summarize" if doc.extraction_status == "ready" else "extracting",
         "points_earned": 10,
         "total_points": user.points,
         "streak": user.streak,
         "newly_earned_badges": new_badges,
     }
-from .ai.quiz_generator import generate_only_flashcards, generate_only_quiz
+@app.get("/api/documents/{document_id}/status")
+def document_status(document_id: int, email: str, db: Session = Depends(get_db)):
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    doc = db.query(models.Document).filter(
+        models.Document.id == document_id,
+        models.Document.user_id == user.id
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "document_id":       doc.id,
+        "extraction_status": doc.extraction_status or "ready",
+        "extracted_chars":   len(doc.extracted_text or ""),
+        "error":             doc.extraction_error,
+    }
+
+from .ai.quiz_generator import generate_only_flashcards, generate_only_quiz, iter_study_pack, prepare_study_text
 class ContentRequest(BaseModel):
     summary_id: int
     user_email: str
+    async_job: bool = False   # True → return a job handle at once, poll /api/jobs/{id}
 
-@app.post("/api/generate-flashcards")
-def generate_flashcards(req: ContentRequest, db: Session = Depends(get_db)):
+# ── Async job mode ───────────────────────────────────────────────────────────
+# Summaries, quizzes and flashcards can take minutes of LLM time. With
+# async_job=True the request only enqueues a job; a small, bounded pool of
+# AI worker threads (separate from the request threadpool) does the work,
+# so cheap endpoints like /api/leaderboard keep responding under load.
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "4"))
+# Indexed chunks sampled across the document for each quiz / flashcard set
+STUDY_MAX_CHUNKS = int(os.getenv("STUDY_MAX_CHUNKS", "8"))
+
+
+def _job_handle(job) -> dict:
+    return {
+        "success":    True,
+        "job_id":     job.id,
+        "status":     job.status,
+        "poll_url":   f"/api/jobs/{job.id}",
+        "stream_url": f"/api/jobs/{job.id}/events",
+    }
+
+
+def _load_content_summary(req: ContentRequest, db: Session):
     user = db.query(models.User).filter(models.User.email == req.user_email).first()
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
@@ -415,30 +639,74 @@ def generate_flashcards(req: ContentRequest, db: Session = Depends(get_db)):
     ).first()
     if not summary:
         raise HTTPException(status_code=404, detail="Summary not found")
+    return user, summary
 
-    #  use original PDF text, not the summary
-    doc = db.query(models.Document).filter(
-        models.Document.id == summary.document_id
-    ).first()
-    text = doc.extracted_text if doc and doc.extracted_text else summary.summary_text
 
-    flashcards_list = generate_only_flashcards(text, n=8)
-
-    #  Save each flashcard to database
-    saved_flashcards = []
-    for card in flashcards_list:
-        flashcard = models.Flashcard(
-            summary_id=req.summary_id,
+def _add_flashcards(user, summary_id: int, cards: list, db: Session, job_id: int = None) -> list:
+    """Stage flashcard rows for the summary (caller commits)."""
+    for card in cards:
+        db.add(models.Flashcard(
+            summary_id=summary_id,
             user_id=user.id,
             question=card["question"],
             answer=card["answer"],
-            created_at=datetime.utcnow()
-        )
-        db.add(flashcard)
-        saved_flashcards.append(card)
+            created_at=datetime.utcnow(),
+            job_id=job_id,
+        ))
+    return list(cards)
 
-    user.points = (user.points or 0) + 10
-    db.commit()
+
+def _add_quiz_questions(user, summary_id: int, questions: list, db: Session, job_id: int = None) -> list:
+    """Stage quiz rows for the summary (caller commits)."""
+    for q in questions:
+        db.add(models.Quiz(
+            summary_id=summary_id,
+            user_id=user.id,
+            question=q["question"],
+            options=q["options"],
+            correct_answer=str(q["correct"]),
+            created_at=datetime.utcnow(),
+            job_id=job_id,
+        ))
+    return list(questions)
+
+
+def _study_input(document_id: int, fallback_text: str, db: Session) -> tuple:
+    """(text, prepared) for the quiz/flashcard generators, built from a few
+    indexed chunks spread over the document instead of the whole text, plus
+    the document's stored keyword index."""
+    chunks = get_document_chunks(db, document_id, max_chunks=STUDY_MAX_CHUNKS) if document_id else []
+    if not chunks:
+        return fallback_text, None
+    return "\n".join(chunks), prepare_study_text(chunks=chunks,
+                                                  keyword_index=get_keyword_index(db, document_id))
+
+
+def _job_rows(model, job_id: int, db: Session) -> list:
+    """Rows an earlier attempt of this AI job already committed (none for
+    synchronous requests)."""
+    if job_id is None:
+        return []
+    return db.query(model).filter(model.job_id == job_id).order_by(model.id.asc()).all()
+
+
+STUDY_ITEMS_PER_SET = 8   # cards / questions generated per set
+
+
+def _flashcards_for_summary(user, summary, db: Session, job_id: int = None) -> dict:
+    # A retried job whose cards were already committed returns them as-is
+    existing = _job_rows(models.Flashcard, job_id, db)
+    if existing:
+        saved_flashcards = [{"question": c.question, "answer": c.answer} for c in existing]
+    else:
+        #  use original PDF text, not the summary
+        text, prepared = _study_input(summary.document_id, summary.summary_text, db)
+
+        flashcards_list = generate_only_flashcards(text, n=STUDY_ITEMS_PER_SET, prepared=prepared)
+        saved_flashcards = _add_flashcards(user, summary.id, flashcards_list, db, job_id)
+
+        user.points = (user.points or 0) + 10
+        db.commit()
     update_streak(user.id, db)
 
    
@@ -446,61 +714,117 @@ def generate_flashcards(req: ContentRequest, db: Session = Depends(get_db)):
     return {
         "success": True,
         "flashcards": saved_flashcards,
-        "summary_id": req.summary_id,
+        "summary_id": summary.id,
         "streak": user.streak,
         "newly_earned_badges": new_badges,
     }
 
-@app.post("/api/generate-quiz")
-def generate_quiz(req: ContentRequest, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == req.user_email).first()
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-
-    summary = db.query(models.Summary).filter(
-        models.Summary.id == req.summary_id,
-        models.Summary.user_id == user.id
-    ).first()
-    if not summary:
-        raise HTTPException(status_code=404, detail="Summary not found")
-
-    
-    doc = db.query(models.Document).filter(
-        models.Document.id == summary.document_id
-    ).first()
-    text = doc.extracted_text if doc and doc.extracted_text else summary.summary_text 
-    quiz_list = generate_only_quiz(text, n=8)
 
-    #  Save each quiz question to database
-    saved_questions = []
-    for q in quiz_list:
-        quiz = models.Quiz(
-            summary_id=req.summary_id,
-            user_id=user.id,
-            question=q["question"],
-            options=q["options"],
-            correct_answer=str(q["correct"]),
-            created_at=datetime.utcnow()
-        )
-        db.add(quiz)
-        saved_questions.append(q)
+def _quiz_for_summary(user, summary, db: Session, job_id: int = None) -> dict:
+    existing = _job_rows(models.Quiz, job_id, db)
+    if existing:
+        saved_questions = [{"question": q.question, "options": q.options,
+                            "correct": int(q.correct_answer) if q.correct_answer.isdigit() else q.correct_answer}
+                           for q in existing]
+    else:
+        text, prepared = _study_input(summary.document_id, summary.summary_text, db)
+        quiz_list = generate_only_quiz(text, n=STUDY_ITEMS_PER_SET, prepared=prepared)
+        saved_questions = _add_quiz_questions(user, summary.id, quiz_list, db, job_id)
 
-    user.points = (user.points or 0) + 10
-    db.commit()
+        user.points = (user.points or 0) + 10
+        db.commit()
     update_streak(user.id, db) 
     
     new_badges = _check_and_award_badges(user.id, db)
     return {
         "success": True,
         "questions": saved_questions,
-        "summary_id": req.summary_id,
+        "summary_id": summary.id,
         "streak": user.streak,
         "newly_earned_badges": new_badges, 
     }
+
+
+@app.post("/api/generate-flashcards")
+def generate_flashcards(req: ContentRequest, db: Session = Depends(get_db)):
+    user, summary = _load_content_summary(req, db)
+    if req.async_job:
+        job = enqueue_job(db, "flashcards", {"summary_id": summary.id, "user_id": user.id},
+                          user_id=user.id, summary_id=summary.id)
+        return JSONResponse(_job_handle(job), status_code=202)
+    return _flashcards_for_summary(user, summary, db)
+
+@app.post("/api/generate-quiz")
+def generate_quiz(req: ContentRequest, db: Session = Depends(get_db)):
+    user, summary = _load_content_summary(req, db)
+    if req.async_job:
+        job = enqueue_job(db, "quiz", {"summary_id": summary.id, "user_id": user.id},
+                          user_id=user.id, summary_id=summary.id)
+        return JSONResponse(_job_handle(job), status_code=202)
+    return _quiz_for_summary(user, summary, db)
 # ═════════════════════════════════════════════════════════════════════════════
 # AI Summarization  (Sprint 3)
 # ═════════════════════════════════════════════════════════════════════════════
 
+def _summary_result(text: str, genz_style: bool, db: Session, doc_id: int = None) -> tuple:
+    """(result, cached) — identical text (re-summarise, or the same PDF from a
+    classmate) comes straight from the summary cache."""
+    cache_key = summary_cache_key(text, genz_style)
+    result = get_cached_summary(db, cache_key)
+    if result is not None:
+        print(f"[Summarize] Cache hit for doc_id={doc_id} ⚡")
+        return result, True
+
+    print(f"[Summarize] Running jeshmin mistral on doc_id={doc_id} ({len(text)} chars)…")
+    result = summarize(text, genz_style=genz_style, chunk_cache=chunk_summary_cache)
+    store_cached_summary(db, cache_key, result)
+    return result, False
+
+
+def _summarize_for_document(user, doc, genz_style: bool, db: Session, job_id: int = None) -> dict:
+    existing = _job_rows(models.Summary, job_id, db)
+    if existing:
+        # Retried job — the summary was already saved and the points awarded
+        summary_record = existing[0]
+        result = {
+            "formal_summary": summary_record.summary_text,
+            "genz_summary":   summary_record.slang_version_text,
+            "word_count":     len((summary_record.summary_text or "").split()),
+        }
+        cached = True
+    else:
+        try:
+            result, cached = _summary_result(doc.extracted_text, genz_style, db, doc.id)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+
+        summary_record = models.Summary(
+            document_id=doc.id,
+            user_id=user.id,
+            summary_text=result["formal_summary"],
+            slang_version_text=result["genz_summary"],
+            generated_at=datetime.utcnow(),
+            job_id=job_id,
+        )
+        db.add(summary_record)
+        user.points = (user.points or 0) + 20
+        db.commit(); db.refresh(summary_record)
+    update_streak(user.id, db) 
+    new_badges = _check_and_award_badges(user.id, db)
+    return {
+        "success": True,
+        "summary_id":     summary_record.id,
+        "formal_summary": result["formal_summary"],
+        "genz_summary":   result["genz_summary"],
+        "word_count":     result["word_count"],
+        "cached":         cached,
+        "points_earned":  0 if existing else 20,
+        "total_points":   user.points,
+        "streak":         user.streak,
+        "newly_earned_badges": new_badges,
+    }
+
+
 @app.post("/api/summarize")
 def summarize_document(req: SummarizeRequest, db: Session = Depends(get_db)):
     user = db.query(models.User).filter(models.User.email == req.user_email).first()
@@ -514,41 +838,386 @@ def summarize_document(req: SummarizeRequest, db: Session = Depends(get_db)):
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if not doc.extracted_text or len(doc.extracted_text.strip()) < 50:
-        raise HTTPException(status_code=400, detail="Document has no extractable text. Try re-uploading the PDF.")
+    if not (req.async_job and doc.extraction_status == "extracting"):
+        _require_extracted_text(doc, db)   # async jobs wait for extraction themselves
+
+    if req.async_job:
+        job = enqueue_job(db, "summarize",
+                          {"document_id": doc.id, "user_id": user.id, "genz_style": req.genz_style},
+                          user_id=user.id)
+        return JSONResponse(_job_handle(job), status_code=202)
+
+    return _summarize_for_document(user, doc, req.genz_style, db)
+
+
+@app.post("/api/summarize/stream")
+def summarize_document_stream(req: SummarizeRequest, db: Session = Depends(get_db)):
+    """Same as /api/summarize, but relays the summary as server-sent events:
+    `section` when a new part starts, `delta` for each piece of text, `reset`
+    if the stream broke off and the text so far must be discarded, and a
+    final `done` event with the same body /api/summarize returns."""
+    user = db.query(models.User).filter(models.User.email == req.user_email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    doc = db.query(models.Document).filter(
+        models.Document.id == req.document_id,
+        models.Document.user_id == user.id
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    _require_extracted_text(doc, db)
+
+    user_id, doc_id, text = user.id, doc.id, doc.extracted_text
+
+    def _sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def _events():
+        from .database import SessionLocal
+        sdb = SessionLocal()
+        try:
+            cache_key = summary_cache_key(text, req.genz_style)
+            result = get_cached_summary(sdb, cache_key)
+            cached = result is not None
+            if cached:
+                for name, key in (("formal", "formal_summary"), ("breakdown", "genz_summary")):
+                    yield _sse("section", {"section": name})
+                    yield _sse("delta", {"section": name, "text": result[key]})
+            else:
+                print(f"[Summarize] Streaming doc_id={doc_id} ({len(text)} chars)…")
+                for event in stream_summarize(text, genz_style=req.genz_style,
+                                               chunk_cache=chunk_summary_cache):
+                    if event["type"] == "result":
+                        result = event["result"]
+                    else:
+                        yield _sse(event["type"], event)
+                store_cached_summary(sdb, cache_key, result)
+
+            s_user = sdb.query(models.User).filter(models.User.id == user_id).first()
+            summary_record = models.Summary(
+                document_id=doc_id,
+                user_id=user_id,
+                summary_text=result["formal_summary"],
+                slang_version_text=result["genz_summary"],
+                generated_at=datetime.utcnow(),
+            )
+            sdb.add(summary_record)
+            s_user.points = (s_user.points or 0) + 20
+            sdb.commit(); sdb.refresh(summary_record)
+            update_streak(user_id, sdb)
+            new_badges = _check_and_award_badges(user_id, sdb)
+            yield _sse("done", {
+                "success": True,
+                "summary_id":     summary_record.id,
+                "formal_summary": result["formal_summary"],
+                "genz_summary":   result["genz_summary"],
+                "word_count":     result["word_count"],
+                "cached":         cached,
+                "points_earned":  20,
+                "total_points":   s_user.points,
+                "streak":         s_user.streak,
+                "newly_earned_badges": new_badges,
+            })
+        except Exception as e:
+            print(f"[Summarize] Stream failed: {e}")
+            yield _sse("error", {"success": False, "error": f"Summarization failed: {str(e)}"})
+        finally:
+            sdb.close()
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ── Study pack: summary + flashcards + quiz in one parallel request ──────────
+
+class StudyPackRequest(BaseModel):
+    document_id: int
+    user_email: str
+    include_summary: bool = True   # False → attach cards to the latest existing summary
+    genz_style: bool = True
+    n_flashcards: int = Field(STUDY_ITEMS_PER_SET, ge=1, le=STUDY_ITEMS_PER_SET)
+    n_quiz: int = Field(STUDY_ITEMS_PER_SET, ge=1, le=STUDY_ITEMS_PER_SET)
+
 
-    print(f"[Summarize] Running jeshmin mistral on doc_id={doc.id} ({len(doc.extracted_text)} chars)…")
+def _latest_summary_id(db: Session, user_id: int, doc_id: int) -> int | None:
+    latest = db.query(models.Summary.id).filter(
+        models.Summary.document_id == doc_id,
+        models.Summary.user_id == user_id,
+    ).order_by(models.Summary.id.desc()).first()
+    return latest.id if latest else None
 
+
+def _load_study_pack(req: StudyPackRequest, db: Session) -> tuple:
+    user = db.query(models.User).filter(models.User.email == req.user_email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    doc = db.query(models.Document).filter(
+        models.Document.id == req.document_id,
+        models.Document.user_id == user.id
+    ).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    _require_extracted_text(doc, db)
+
+    summary_id = None
+    if not req.include_summary:
+        summary_id = _latest_summary_id(db, user.id, doc.id)
+        if summary_id is None:
+            raise HTTPException(status_code=400, detail="No summary yet — set include_summary or summarize first")
+    return user.id, doc.id, doc.extracted_text, summary_id
+
+
+def _study_pack_events(req: StudyPackRequest, user_id: int, doc_id: int, text: str, summary_id: int):
+    """Yield ("part", {...}) as each part finishes, then one ("done", {...}).
+
+    Generation runs on its own threads; everything is saved in one commit at
+    the end so flashcards and quiz questions can link to the new summary.
+    If the summary part fails they are attached to the document's latest
+    existing summary instead. With no summary to attach to, they can't be
+    saved: card/quiz part events carry "saved": None while that is still
+    open, and are re-sent as failed ("saved": False) once it's decided.
+    """
+    from .database import SessionLocal
+
+    def _summary_part():
+        # Own session — SQLAlchemy sessions must not cross threads
+        sdb = SessionLocal()
+        try:
+            result, cached = _summary_result(text, req.genz_style, sdb, doc_id)
+            return {**result, "cached": cached}
+        finally:
+            sdb.close()
+
+    extra = {"summary": _summary_part} if req.include_summary else {}
+    started = time.monotonic()
+    idb = SessionLocal()
     try:
-        result = summarize(doc.extracted_text, genz_style=req.genz_style)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+        study_text, prepared = _study_input(doc_id, text, idb)
+        fallback_id = _latest_summary_id(idb, user_id, doc_id) if req.include_summary else None
+    finally:
+        idb.close()
+    parts, errors, pending = {}, {}, []
+    for part, result, error in iter_study_pack(study_text, req.n_flashcards, req.n_quiz, extra, prepared):
+        elapsed = round(time.monotonic() - started, 2)
+        if error:
+            errors[part] = error
+            yield "part", {"part": part, "success": False, "error": error, "seconds": elapsed}
+            if part == "summary" and fallback_id is None:
+                # Nothing to attach the cards / quiz to — say so for the ones already sent
+                for p in pending:
+                    yield "part", {"part": p, "success": False, "saved": False, "seconds": elapsed,
+                                   "error": "Not saved — the summary failed and this document has no earlier summary"}
+            continue
+        parts[part] = result
+        if part == "summary":
+            data = {k: result[k] for k in ("formal_summary", "genz_summary", "word_count", "cached")}
+            yield "part", {"part": part, "success": True, "data": data, "seconds": elapsed}
+            continue
+        # Saved if there is (or will certainly be) a summary to attach it to
+        saved = (True if summary_id is not None or fallback_id is not None or "summary" in parts
+                 else False if "summary" in errors else None)
+        if saved is None:
+            pending.append(part)
+        yield "part", {"part": part, "success": True, "saved": saved, "data": result, "seconds": elapsed}
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        points = 0
+        if "summary" in parts:
+            summary_record = models.Summary(
+                document_id=doc_id,
+                user_id=user_id,
+                summary_text=parts["summary"]["formal_summary"],
+                slang_version_text=parts["summary"]["genz_summary"],
+                generated_at=datetime.utcnow(),
+            )
+            db.add(summary_record)
+            db.flush()
+            summary_id = summary_record.id
+            points += 20
+        elif summary_id is None and fallback_id is not None:
+            summary_id = fallback_id        # summary failed — keep the cards on the last one
+        unsaved = [p for p in ("flashcards", "quiz") if parts.get(p)] if summary_id is None else []
+        if summary_id is not None:
+            if parts.get("flashcards"):
+                _add_flashcards(user, summary_id, parts["flashcards"], db)
+                points += 10
+            if parts.get("quiz"):
+                _add_quiz_questions(user, summary_id, parts["quiz"], db)
+                points += 10
+        user.points = (user.points or 0) + points
+        db.commit()
+        update_streak(user_id, db)
+        new_badges = _check_and_award_badges(user_id, db)
+        yield "done", {
+            "success":       summary_id is not None and not errors,
+            "summary_id":    summary_id,
+            "flashcards":    parts.get("flashcards", []),
+            "questions":     parts.get("quiz", []),
+            "errors":        errors,
+            "unsaved":       unsaved,
+            "summary_fallback": "summary" in errors and summary_id is not None,
+            "points_earned": points,
+            "total_points":  user.points,
+            "streak":        user.streak,
+            "newly_earned_badges": new_badges,
+            "seconds":       round(time.monotonic() - started, 2),
+        }
+    finally:
+        db.close()
+
+
+@app.post("/api/generate-study-pack")
+def generate_study_pack(req: StudyPackRequest, db: Session = Depends(get_db)):
+    """Summary, flashcards and quiz generated concurrently; one combined response."""
+    user_id, doc_id, text, summary_id = _load_study_pack(req, db)
+    body = {}
+    for event, data in _study_pack_events(req, user_id, doc_id, text, summary_id):
+        if event == "part" and data["part"] == "summary" and data["success"]:
+            body["formal_summary"] = data["data"]["formal_summary"]
+            body["genz_summary"]   = data["data"]["genz_summary"]
+            body["cached"]         = data["data"]["cached"]
+        elif event == "done":
+            body.update(data)
+    if body.get("summary_id") is None:
+        unsaved = f"; not saved: {', '.join(body['unsaved'])}" if body.get("unsaved") else ""
+        raise HTTPException(status_code=500, detail=f"Study pack failed: {body.get('errors')}{unsaved}")
+    return body
+
+
+@app.post("/api/generate-study-pack/stream")
+def generate_study_pack_stream(req: StudyPackRequest, db: Session = Depends(get_db)):
+    """Same as /api/generate-study-pack, as server-sent events: one `part`
+    event per part in the order they finish, then a final `done` event."""
+    user_id, doc_id, text, summary_id = _load_study_pack(req, db)
+
+    def _events():
+        try:
+            for event, data in _study_pack_events(req, user_id, doc_id, text, summary_id):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            print(f"[StudyPack] Stream failed: {e}")
+            yield f"event: error\ndata: {json.dumps({'success': False, 'error': str(e)})}\n\n"
 
-    summary_record = models.Summary(
-        document_id=doc.id,
-        user_id=user.id,
-        summary_text=result["formal_summary"],
-        slang_version_text=result["genz_summary"],
-        generated_at=datetime.utcnow(),
-    )
-    db.add(summary_record)
-    user.points = (user.points or 0) + 20
-    db.commit(); db.refresh(summary_record)
-    update_streak(user.id, db) 
-    new_badges = _check_and_award_badges(user.id, db)
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ── AI job handlers (run on the AI worker pool, never on request threads) ────
+
+def _run_ai_job(job_id: int, payload: dict, work) -> dict:
+    from .database import SessionLocal
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == payload["user_id"]).first()
+        if not user:
+            raise RuntimeError("User no longer exists")
+        return work(user, db)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+    finally:
+        db.close()
+
+
+def _summarize_job(job_id: int, payload: dict) -> dict:
+    def work(user, db):
+        doc = db.query(models.Document).filter(models.Document.id == payload["document_id"]).first()
+        if not doc:
+            raise RuntimeError("Document no longer exists")
+        _require_extracted_text(doc, db, wait_seconds=EXTRACTION_WAIT_SECONDS)
+        return _summarize_for_document(user, doc, payload.get("genz_style", True), db, job_id)
+    return _run_ai_job(job_id, payload, work)
+
+
+def _flashcards_job(job_id: int, payload: dict) -> dict:
+    def work(user, db):
+        summary = db.query(models.Summary).filter(models.Summary.id == payload["summary_id"]).first()
+        if not summary:
+            raise RuntimeError("Summary no longer exists")
+        return _flashcards_for_summary(user, summary, db, job_id)
+    return _run_ai_job(job_id, payload, work)
+
+
+def _quiz_job(job_id: int, payload: dict) -> dict:
+    def work(user, db):
+        summary = db.query(models.Summary).filter(models.Summary.id == payload["summary_id"]).first()
+        if not summary:
+            raise RuntimeError("Summary no longer exists")
+        return _quiz_for_summary(user, summary, db, job_id)
+    return _run_ai_job(job_id, payload, work)
+
+
+AI_JOB_HANDLERS = {
+    "summarize":  _summarize_job,
+    "flashcards": _flashcards_job,
+    "quiz":       _quiz_job,
+}
+
+
+def _job_status(job) -> dict:
     return {
-        "success": True,
-        "summary_id":     summary_record.id,
-        "formal_summary": result["formal_summary"],
-        "genz_summary":   result["genz_summary"],
-        "word_count":     result["word_count"],
-        "points_earned":  20,
-        "total_points":   user.points,
-        "streak":         user.streak,
-        "newly_earned_badges": new_badges,
+        "job_id":   job.id,
+        "kind":     job.kind,
+        "status":   job.status,
+        "attempts": job.attempts,
+        "result":   job.result if job.status == "done" else None,
+        "error":    job.error if job.status == "error" else None,
     }
 
 
+def _load_user_job(job_id: int, email: str, db: Session):
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    job = db.query(models.Job).filter(
+        models.Job.id == job_id,
+        models.Job.user_id == user.id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+def job_status(job_id: int, email: str, db: Session = Depends(get_db)):
+    return _job_status(_load_user_job(job_id, email, db))
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def job_events(job_id: int, email: str):
+    """Server-sent events: one `status` event per change, ending at done/error."""
+    from .database import SessionLocal
+    import asyncio
+
+    def _snapshot():
+        db = SessionLocal()
+        try:
+            return _job_status(_load_user_job(job_id, email, db))
+        finally:
+            db.close()
+
+    first = await run_in_threadpool(_snapshot)   # 401/404 before the stream opens
+
+    async def _stream():
+        last, snap = None, first
+        while True:
+            if snap["status"] != last:
+                last = snap["status"]
+                yield f"event: status\ndata: {json.dumps(snap)}\n\n"
+            if snap["status"] in ("done", "error"):
+                return
+            await asyncio.sleep(1.0)
+            snap = await run_in_threadpool(_snapshot)
+
+    return StreamingResponse(_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
 # ═════════════════════════════════════════════════════════════════════════════
 # Video Generation  (Sprint 4/5)
 # ═════════════════════════════════════════════════════════════════════════════
@@ -556,7 +1225,6 @@ def summarize_document(req: SummarizeRequest, db: Session = Depends(get_db)):
 @app.post("/api/generate-video")
 def generate_video_endpoint(
     req: VideoRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
 ):
     user = db.query(models.User).filter(models.User.email == req.user_email).first()
@@ -570,82 +1238,202 @@ def generate_video_endpoint(
     if not summary:
         raise HTTPException(status_code=404, detail="Summary not found  generate a summary first")
 
-    _video_jobs[req.summary_id] = {"status": "queued", "video_url": None, "error": None}
-
-    background_tasks.add_task(
-        _run_video_pipeline,
-        summary_id=req.summary_id,
-        genz_text=summary.slang_version_text or summary.summary_text,
-        theme=req.theme,
-        user_id=user.id,
-    )
+    # Double-clicks / retries attach to the job that's already in flight
+    job = find_active_job(db, "video", req.summary_id)
+    if not job:
+        job = enqueue_job(
+            db, "video",
+            payload={
+                "summary_id": req.summary_id,
+                "genz_text":  summary.slang_version_text or summary.summary_text,
+                "theme":      req.theme,
+                "user_id":    user.id,
+            },
+            user_id=user.id,
+            summary_id=req.summary_id,
+        )
 
     return {
         "success": True,
         "message": "Video generation started",
         "summary_id": req.summary_id,
-        "status": "queued",
+        "job_id": job.id,
+        "status": job.status,
         "poll_url": f"/api/video-status/{req.summary_id}",
     }
 
 
-from .minio_storage import upload_video, get_video_url, get_signed_url_from_path
+from .minio_storage import (upload_video, video_exists, get_video_url, get_signed_url_from_path,
+                            get_signed_urls_from_paths, sas_cache_stats)
 
-def _run_video_pipeline(summary_id: int, genz_text: str, theme: str, user_id: int):
+def _run_video_pipeline(job_id: int, payload: dict) -> dict:
+    """Job handler for kind="video". Raising here makes the queue retry with backoff."""
     from .database import SessionLocal
+    summary_id = payload["summary_id"]
+    theme      = payload["theme"]
+    user_id    = payload["user_id"]
+
+    # A retry after the records were committed must not add a second video
+    # or award the points again
+    db = SessionLocal()
     try:
-        _video_jobs[summary_id]["status"] = "processing"
+        existing = db.query(models.Video).filter(models.Video.job_id == job_id).first()
+        if existing:
+            print(f"[VideoGen] Job #{job_id} already saved video #{existing.id} — nothing to redo")
+            return {"video_path": existing.s3_path, "filename": existing.s3_path.split("/")[-1],
+                    "stage_timings": {}, "render_cache": "job"}
+    finally:
+        db.close()
+
+    filename = f"video_{summary_id}_{int(datetime.utcnow().timestamp())}.mp4"
+
+    # Per-stage timings, saved on the job as each stage finishes
+    stage_timings = {}
+
+    def _save_progress(stage, timing):
+        record_job_progress(job_id, {"stage_timings": dict(stage_timings)})
+
+    # Same script + voice + theme + captions → same video: reuse it, or wait
+    # for the job that is already rendering it
+    render_key = render_cache_key(payload["genz_text"], theme)
+    owner      = f"video-job-{job_id}"
+    reuse      = {}
+
+    def _usable(entry):
+        reuse.clear()
+        if entry["blob_url"] and video_exists(entry["filename"]):
+            reuse["from"] = "blob"
+        elif entry["local_path"] and os.path.exists(entry["local_path"]):
+            reuse["from"] = "file"
+        return bool(reuse)
+
+    cached = acquire_render(render_key, owner, usable=_usable)
+    try:
+        if cached:
+            filename, video_path = cached["filename"], cached["local_path"]
+            print(f"[RenderCache] ✅ Reusing {filename} ({reuse['from']})")
+        else:
+            # Generate video (this is the slow part — no DB connection held open)
+            video_path = generate_video(
+                summary_text=payload["genz_text"],
+                output_filename=filename,
+                theme=theme,
+                stage_timings=stage_timings,
+                on_stage=_save_progress,
+            )
+            mark_rendered(render_key, owner, filename, video_path)
+    except Exception:
+        release_render(render_key, owner)
+        raise
 
-        filename = f"video_{summary_id}_{int(datetime.utcnow().timestamp())}.mp4"
+    # Upload to Azure (parallel block upload, see minio_storage.py)
+    if cached and reuse["from"] == "blob":
+        video_url = cached["blob_url"]
+    else:
+        upload_started = time.monotonic()
+        try:
+            video_url = upload_video(video_path, filename)
+        except Exception:
+            release_render(render_key, owner)
+            raise
+        stage_timings["upload"] = {"start": None, "seconds": round(time.monotonic() - upload_started, 3),
+                                   "status": "done"}
+        print(f"[Azure] ✅ Uploaded: {video_url}")
+        mark_uploaded(render_key, owner, video_url)
 
-        # Generate video (this is the slow part — no DB connection held open)
-        video_path = generate_video(
-            summary_text=genz_text,
-            output_filename=filename,
-            theme=theme,
-        )
+    # ── Open a FRESH DB connection here, after all the slow work is done ──
+    # Render and upload both run without one, so no connection sits idle in
+    # a transaction while they do.
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        db.add(models.Video(
+            summary_id=summary_id,
+            user_id=user_id,
+            s3_path=video_url,
+            background_theme=theme,
+            generated_at=datetime.utcnow(),
+            job_id=job_id,
+        ))
+        if user:
+            user.points = (user.points or 0) + 15
+        db.commit()
+        update_streak(user_id, db)
+        _check_and_award_badges(user_id, db)
+    finally:
+        db.close()
 
-        # Upload to Azure
-        video_url = upload_video(video_path, filename)
-        print(f"[Azure] ✅ Uploaded: {video_url}")
+    print(f"[VideoGen] ✅ Done: {filename}")
+    return {"video_path": video_url, "filename": filename, "stage_timings": stage_timings,
+            "render_cache": reuse.get("from", "miss")}
 
-        # ── Open a FRESH DB connection here, after all the slow work is done ──
-        # The old connection would have timed out during Whisper + video render.
-        db = SessionLocal()
-        try:
-            video_record = models.Video(
-                summary_id=summary_id,
-                user_id=user_id,
-                s3_path=video_url,
-                background_theme=theme,
-                generated_at=datetime.utcnow(),
-            )
-            db.add(video_record)
-            user = db.query(models.User).filter(models.User.id == user_id).first()
-            if user:
-                user.points = (user.points or 0) + 15
-            db.commit()
-            update_streak(user_id, db)
-            _check_and_award_badges(user_id, db)
-        finally:
-            db.close()
 
-        _video_jobs[summary_id]["status"] = "done"
-        _video_jobs[summary_id]["video_url"] = get_video_url(filename)  # signed URL for playback
-        print(f"[VideoGen] ✅ Done: {filename}")
+# job kind → handler, shared with the standalone worker (app/worker.py)
+JOB_HANDLERS = {
+    "video": _run_video_pipeline,
+    **AI_JOB_HANDLERS,
+}
+
+
+def _resume_extractions():
+    """Re-submit documents left "extracting" by a restart — their pool future
+    died with the old process. Documents whose upload is gone are marked failed."""
+    db = SessionLocal()
+    try:
+        stuck = db.query(models.Document).filter(models.Document.extraction_status == "extracting").all()
+        for doc in stuck:
+            if doc.file_path and os.path.exists(doc.file_path):
+                submit_extraction(doc.file_path, build_index_rows).add_done_callback(
+                    lambda fut, doc_id=doc.id: _finish_extraction(doc_id, fut)
+                )
+            else:
+                doc.extraction_status = "failed"
+                doc.extraction_error  = "Uploaded file is missing — please upload it again"
+        db.commit()
+        if stuck:
+            print(f"[Startup] Resumed extraction for {len(stuck)} document(s)")
+    finally:
+        db.close()
+
+
+@app.on_event("startup")
+def _start_job_workers():
+    global _startup_seconds
+    _resume_extractions()
+    if VIDEO_WORKERS > 0:
+        start_workers({"video": _run_video_pipeline}, concurrency=VIDEO_WORKERS, name="video")
+    if AI_JOB_WORKERS > 0:
+        start_workers(AI_JOB_HANDLERS, concurrency=AI_JOB_WORKERS, name="ai")
+    if MODEL_WARMUP:
+        model_registry.warm_up(MODEL_WARMUP)
+    _startup_seconds = round(time.monotonic() - _BOOT_STARTED, 2)
+    print(f"[Startup] API ready to serve in {_startup_seconds}s (models warming: {MODEL_WARMUP or 'none'})")
+
+
+@app.on_event("shutdown")
+def _stop_job_workers():
+    stop_workers()
+    shutdown_extraction_pool()
 
-    except Exception as e:
-        _video_jobs[summary_id]["status"] = "error"
-        _video_jobs[summary_id]["error"] = str(e)
-        print(f"[VideoGen] ❌ Failed: {e}")
 
-        
 @app.get("/api/video-status/{summary_id}")
-def video_status(summary_id: int):
-    job = _video_jobs.get(summary_id)
+def video_status(summary_id: int, db: Session = Depends(get_db)):
+    job = latest_job(db, "video", summary_id)
     if not job:
         raise HTTPException(status_code=404, detail="No video job found for this summary_id")
-    return job
+    video_url = None
+    if job.status == "done" and job.result:
+        # Sign at read time so the playback URL is always fresh
+        video_url = get_signed_url_from_path(job.result["video_path"])
+    return {
+        "status":    job.status,
+        "video_url": video_url,
+        "error":     job.error if job.status == "error" else None,
+        "job_id":    job.id,
+        "attempts":  job.attempts,
+        # Seconds per pipeline stage — filled in while the job is processing
+        "stage_timings": (job.result or {}).get("stage_timings"),
+    }
 
 @app.get("/api/my-documents")
 def my_documents(email: str, db: Session = Depends(get_db)):
@@ -727,7 +1515,8 @@ def get_notebook_detail(notebook_id: int, email: str, db: Session = Depends(get_
         "summary":    summary.to_dict() if summary else None,
         "flashcards": [f.to_dict() for f in flashcards],
         "quizzes":    [q.to_dict() for q in quizzes],
-        "videos":     [{**v.to_dict(), "s3_path": get_signed_url_from_path(v.s3_path)} for v in videos],
+        "videos":     [{**v.to_dict(), "s3_path": url}
+                       for v, url in zip(videos, get_signed_urls_from_paths([v.s3_path for v in videos]))],
     }
 # ═══════════════════════════════════════════════════════════════════════════
 # ADD THESE TWO ROUTES to main.py  (paste anywhere after the existing routes)
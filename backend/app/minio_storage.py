@@ -1,40 +1,195 @@
 # backend/app/storage.py
 import os
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime, timezone, timedelta
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
+from azure.storage.blob import BlobServiceClient, BlobBlock, ContentSettings, generate_blob_sas, BlobSasPermissions
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Works with the Azurite emulator too: AZURE_STORAGE_CONNECTION_STRING=UseDevelopmentStorage=true
 CONNECTION_STRING = os.getenv("AZURE_STORAGE_CONNECTION_STRING")
 CONTAINER_NAME = os.getenv("AZURE_CONTAINER_NAME", "padaisathi-videos")
 
+# ── Upload tuning ─────────────────────────────────────────────────────────────
+UPLOAD_BLOCK_SIZE_MB = float(os.getenv("UPLOAD_BLOCK_SIZE_MB", "4"))
+UPLOAD_CONCURRENCY   = int(os.getenv("UPLOAD_CONCURRENCY", "4"))     # blocks in flight per upload
+UPLOAD_MAX_RETRIES   = int(os.getenv("UPLOAD_MAX_RETRIES", "3"))     # per block
+
 blob_service_client = BlobServiceClient.from_connection_string(CONNECTION_STRING)
 
+
+def _block_id(fingerprint: str, index: int) -> str:
+    # Same length for every block of a blob (Azure requires it), and stable
+    # across retries so already-staged blocks can be recognised
+    return base64.b64encode(f"{fingerprint}-{index:06d}".encode()).decode()
+
+
+def _stage_with_retry(blob_client, block_id: str, data: bytes):
+    for attempt in range(1, UPLOAD_MAX_RETRIES + 1):
+        try:
+            blob_client.stage_block(block_id, data, length=len(data), validate_content=True)
+            return
+        except Exception as e:
+            if attempt == UPLOAD_MAX_RETRIES:
+                raise
+            print(f"[Azure] Block {block_id} failed (attempt {attempt}): {e} — retrying")
+            time.sleep(2 ** (attempt - 1))
+
+
+def upload_blocks(blob_client, video_path: str,
+                  block_size: int = None, concurrency: int = None) -> str:
+    """Block upload of a file; returns the blob URL.
+
+    Blocks are staged in parallel (each with its own transactional MD5)
+    while the whole-file MD5 is computed from the same stream, then
+    committed with that MD5 as the blob's Content-MD5. Blocks already staged
+    by an earlier, failed attempt at the same file are skipped, so a retry
+    resumes instead of starting over.
+
+    blob_client only needs stage_block / get_block_list / commit_block_list
+    / url, so a fake client can stand in for Azure in tests.
+    """
+    block_size  = block_size or int(UPLOAD_BLOCK_SIZE_MB * 1024 * 1024)
+    concurrency = max(concurrency or UPLOAD_CONCURRENCY, 1)
+    st = os.stat(video_path)
+    fingerprint = hashlib.sha256(
+        f"{os.path.basename(video_path)}|{st.st_size}|{st.st_mtime_ns}|{block_size}".encode()
+    ).hexdigest()[:16]
+
+    try:
+        _, uncommitted = blob_client.get_block_list("uncommitted")
+        staged = {b.id: b.size for b in uncommitted}
+    except Exception:
+        staged = {}                                  # blob doesn't exist yet
+
+    md5, block_ids, pending, skipped = hashlib.md5(), [], set(), 0
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="upload-block") as pool:
+        with open(video_path, "rb") as f:
+            index = 0
+            while True:
+                data = f.read(block_size)
+                if not data:
+                    break
+                md5.update(data)
+                block_id = _block_id(fingerprint, index)
+                block_ids.append(block_id)
+                index += 1
+                if staged.get(block_id) == len(data):
+                    skipped += 1
+                    continue
+                # Bound the blocks held in memory to what's actually uploading
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        fut.result()
+                pending.add(pool.submit(_stage_with_retry, blob_client, block_id, data))
+        for fut in pending:
+            fut.result()
+
+    blob_client.commit_block_list(
+        [BlobBlock(block_id=b) for b in block_ids],
+        content_settings=ContentSettings(content_type="video/mp4", content_md5=bytearray(md5.digest())),
+    )
+    print(f"[Azure] Uploaded {len(block_ids)} blocks ({skipped} resumed) of "
+          f"{st.st_size / 1024 / 1024:.1f} MB in {time.time() - started:.1f}s")
+    return blob_client.url
+
+
 def upload_video(video_path: str, filename: str) -> str:
     """Upload video to Azure Blob Storage and return the URL."""
     blob_client = blob_service_client.get_blob_client(
         container=CONTAINER_NAME, blob=filename
     )
-    with open(video_path, "rb") as f:
-        blob_client.upload_blob(f, overwrite=True)
-    return blob_client.url
+    return upload_blocks(blob_client, video_path)
 
-def get_video_url(filename: str) -> str:
-    """Get a signed URL valid for 1 hour."""
-    account_name = blob_service_client.account_name
-    account_key = blob_service_client.credential.account_key
-    sas_token = generate_blob_sas(
-        account_name=account_name,
-        container_name=CONTAINER_NAME,
-        blob_name=filename,
-        account_key=account_key,
-        permission=BlobSasPermissions(read=True),
-        expiry=datetime.now(timezone.utc) + timedelta(hours=1)
+
+def video_exists(filename: str) -> bool:
+    """True if the blob is still in the container."""
+    blob_client = blob_service_client.get_blob_client(
+        container=CONTAINER_NAME, blob=filename
     )
-    return f"https://{account_name}.blob.core.windows.net/{CONTAINER_NAME}/{filename}?{sas_token}"
+    return blob_client.exists()
+
+# ── Signed URLs ───────────────────────────────────────────────────────────────
+# A 1-hour read SAS per blob, cached and reused until it has less than
+# SAS_REFRESH_MINUTES left, so listings don't HMAC-sign every video on every view.
+SAS_TTL_MINUTES     = int(os.getenv("SAS_TTL_MINUTES", "60"))
+SAS_REFRESH_MINUTES = int(os.getenv("SAS_REFRESH_MINUTES", "15"))
+SAS_CACHE_MAX       = int(os.getenv("SAS_CACHE_MAX", "5000"))
+
+_sas_cache = OrderedDict()              # blob name → (signed url, expiry)
+_sas_lock = threading.Lock()
+_sas_stats = {"hits": 0, "signed": 0}
+
+
+def _blob_name(s3_path: str) -> str:
+    return s3_path.split('/')[-1].split('?')[0]
+
+
+def get_video_urls(filenames: list) -> list:
+    """Signed URLs for many blobs in one pass — cached ones are reused, the
+    rest are signed with one shared expiry. Same order as filenames."""
+    now = datetime.now(timezone.utc)
+    fresh_until = now + timedelta(minutes=SAS_REFRESH_MINUTES)
+    urls, missing = {}, []
+    with _sas_lock:
+        for name in dict.fromkeys(filenames):
+            cached = _sas_cache.get(name)
+            if cached and cached[1] > fresh_until:
+                _sas_cache.move_to_end(name)
+                urls[name] = cached[0]
+                _sas_stats["hits"] += 1
+            else:
+                missing.append(name)
+
+    if missing:
+        account_name = blob_service_client.account_name
+        account_key = blob_service_client.credential.account_key
+        base = f"{blob_service_client.url.rstrip('/')}/{CONTAINER_NAME}"
+        expiry = now + timedelta(minutes=SAS_TTL_MINUTES)
+        permission = BlobSasPermissions(read=True)
+        signed = {}
+        for name in missing:
+            sas_token = generate_blob_sas(
+                account_name=account_name,
+                container_name=CONTAINER_NAME,
+                blob_name=name,
+                account_key=account_key,
+                permission=permission,
+                expiry=expiry,
+            )
+            signed[name] = f"{base}/{name}?{sas_token}"
+        with _sas_lock:
+            for name, url in signed.items():
+                _sas_cache[name] = (url, expiry)
+                _sas_cache.move_to_end(name)
+            while len(_sas_cache) > SAS_CACHE_MAX:
+                _sas_cache.popitem(last=False)
+            _sas_stats["signed"] += len(signed)
+        urls.update(signed)
+
+    return [urls[name] for name in filenames]
+
+
+def get_video_url(filename: str) -> str:
+    """Get a signed URL valid for at least SAS_REFRESH_MINUTES (up to 1 hour)."""
+    return get_video_urls([filename])[0]
 
 def get_signed_url_from_path(s3_path: str) -> str:
-    """Extract filename from stored Azure URL and return a fresh signed URL."""
-    filename = s3_path.split('/')[-1].split('?')[0]
-    return get_video_url(filename)
+    """Extract filename from stored Azure URL and return a signed URL."""
+    return get_video_url(_blob_name(s3_path))
+
+def get_signed_urls_from_paths(s3_paths: list) -> list:
+    """get_signed_url_from_path for a whole listing, signed in one batch."""
+    return get_video_urls([_blob_name(p) for p in s3_paths])
+
+def sas_cache_stats() -> dict:
+    with _sas_lock:
+        return {**_sas_stats, "size": len(_sas_cache)}
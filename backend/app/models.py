@@ -51,6 +51,10 @@ class Document(Base):
     file_type      = Column(String(50), default="pdf")
     upload_date    = Column(DateTime, default=datetime.utcnow)
     extracted_text = Column(Text, nullable=True)
+    # sha256 of the uploaded bytes — identical files reuse an earlier extraction
+    content_hash      = Column(String(64), nullable=True, index=True)
+    extraction_status = Column(String(20), nullable=True)   # extracting | ready | failed (NULL = legacy, ready)
+    extraction_error  = Column(Text, nullable=True)
 
     user      = relationship("User",     back_populates="documents")
     summaries = relationship("Summary",  back_populates="document")
@@ -64,9 +68,58 @@ class Document(Base):
             "file_type":   self.file_type,
             "upload_date": self.upload_date.isoformat(),
             "has_text":    bool(self.extracted_text),
+            "extraction_status": self.extraction_status or "ready",
         }
 
 
+class DocumentPage(Base):
+    """One page (PDF page / PPTX slide) as offsets into Document.extracted_text."""
+    __tablename__ = "document_pages"
+
+    id          = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    page_number = Column(Integer, nullable=False)          # 1-based
+    char_start  = Column(Integer, nullable=False)
+    char_end    = Column(Integer, nullable=False)
+    token_count = Column(Integer, default=0)
+    sentences   = Column(JSON, nullable=True)              # [[start, end], ...] absolute offsets
+
+    def to_dict(self):
+        return {
+            "page_number": self.page_number,
+            "char_start":  self.char_start,
+            "char_end":    self.char_end,
+            "token_count": self.token_count,
+            "sentences":   len(self.sentences or []),
+        }
+
+
+class DocumentChunk(Base):
+    """Sentence-aligned slice of a document, sized for the generation prompts."""
+    __tablename__ = "document_chunks"
+
+    id             = Column(Integer, primary_key=True, index=True)
+    document_id    = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    chunk_index    = Column(Integer, nullable=False)       # 0-based, in reading order
+    page_start     = Column(Integer, nullable=False)
+    page_end       = Column(Integer, nullable=False)
+    char_start     = Column(Integer, nullable=False)
+    char_end       = Column(Integer, nullable=False)
+    token_count    = Column(Integer, default=0)
+    sentence_count = Column(Integer, default=0)
+
+
+class DocumentKeywordIndex(Base):
+    """Top terms of a document and their co-occurrence neighbours (quiz distractors)."""
+    __tablename__ = "document_keyword_index"
+
+    id          = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, unique=True, index=True)
+    terms       = Column(JSON, nullable=False)             # ranked, best first
+    neighbours  = Column(JSON, nullable=False)             # {term: [close terms]}
+    created_at  = Column(DateTime, default=datetime.utcnow)
+
+
 class Summary(Base):
     __tablename__ = "summaries"
 
@@ -76,6 +129,7 @@ class Summary(Base):
     summary_text       = Column(Text, nullable=False)
     slang_version_text = Column(Text, nullable=True)
     generated_at       = Column(DateTime, default=datetime.utcnow)
+    job_id             = Column(Integer, nullable=True, index=True)   # AI job that created it (retry guard)
 
     document   = relationship("Document",  back_populates="summaries")
     user       = relationship("User",      back_populates="summaries")
@@ -102,6 +156,7 @@ class Video(Base):
     s3_path          = Column(String(500), nullable=False)
     background_theme = Column(String(50), nullable=True)
     generated_at     = Column(DateTime, default=datetime.utcnow)
+    job_id           = Column(Integer, nullable=True, index=True)   # video job that created it (retry guard)
 
     summary = relationship("Summary", back_populates="videos")
     user    = relationship("User",    back_populates="videos")
@@ -147,6 +202,7 @@ class Flashcard(Base):
     question   = Column(Text, nullable=False)
     answer     = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    job_id     = Column(Integer, nullable=True, index=True)   # AI job that created it (retry guard)
 
     summary = relationship("Summary", back_populates="flashcards")
     user    = relationship("User",    back_populates="flashcards")
@@ -171,6 +227,7 @@ class Quiz(Base):
     options        = Column(JSON, nullable=False)
     correct_answer = Column(Text, nullable=False)
     created_at     = Column(DateTime, default=datetime.utcnow)
+    job_id         = Column(Integer, nullable=True, index=True)   # AI job that created it (retry guard)
 
     summary = relationship("Summary", back_populates="quizzes")
     user    = relationship("User",    back_populates="quizzes")
@@ -276,4 +333,73 @@ class PasswordResetToken(Base):
     expires_at = Column(DateTime, nullable=False)
     used       = Column(Integer, default=0)   # 0 = unused, 1 = used
 
-    user = relationship("User", backref="reset_tokens")
\ No newline at end of file
+    user = relationship("User", backref="reset_tokens")
+
+class SummaryCache(Base):
+    __tablename__ = "summary_cache"
+
+    id           = Column(Integer, primary_key=True, index=True)
+    cache_key    = Column(String(64), unique=True, nullable=False, index=True)  # sha256 of text + engine version
+    result       = Column(JSON, nullable=False)
+    hits         = Column(Integer, default=0)
+    created_at   = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id":           self.id,
+            "cache_key":    self.cache_key,
+            "hits":         self.hits,
+            "created_at":   self.created_at.isoformat(),
+            "last_used_at": self.last_used_at.isoformat() if self.last_used_at else None,
+        }
+
+
+class RenderedVideo(Base):
+    """Content-addressed render cache — one row per unique narrated video."""
+    __tablename__ = "rendered_videos"
+
+    id           = Column(Integer, primary_key=True, index=True)
+    render_key   = Column(String(64), unique=True, nullable=False, index=True)  # sha256 of script + voice + theme asset + captions
+    status       = Column(String(20), nullable=False, default="rendering")   # rendering | rendered | uploaded
+    filename     = Column(String(255), nullable=True)
+    local_path   = Column(String(500), nullable=True)
+    blob_url     = Column(String(500), nullable=True)
+    claimed_by   = Column(String(100), nullable=True)                        # worker rendering it
+    claimed_at   = Column(DateTime, nullable=True)
+    hits         = Column(Integer, default=0)
+    created_at   = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id          = Column(Integer, primary_key=True, index=True)
+    kind        = Column(String(30), nullable=False, index=True)          # "video", ...
+    status      = Column(String(20), default="queued", index=True)        # queued | processing | done | error
+    payload     = Column(JSON, nullable=False)
+    result      = Column(JSON, nullable=True)
+    error       = Column(Text, nullable=True)
+    user_id     = Column(Integer, ForeignKey("users.id"), nullable=True)
+    summary_id  = Column(Integer, ForeignKey("summaries.id"), nullable=True, index=True)
+    attempts    = Column(Integer, default=0)
+    max_attempts= Column(Integer, default=3)
+    run_after   = Column(DateTime, default=datetime.utcnow)              # retry backoff
+    locked_by   = Column(String(100), nullable=True)                     # worker that claimed it
+    locked_at   = Column(DateTime, nullable=True)
+    created_at  = Column(DateTime, default=datetime.utcnow)
+    updated_at  = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id":         self.id,
+            "kind":       self.kind,
+            "status":     self.status,
+            "result":     self.result,
+            "error":      self.error,
+            "summary_id": self.summary_id,
+            "attempts":   self.attempts,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
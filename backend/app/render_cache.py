@@ -0,0 +1,188 @@
+"""
+PadaiSathi — render_cache.py
+Content-addressed cache of rendered videos.
+
+Keyed on video_generator.render_cache_key() — a hash of the exact narration
+script, the voice, the theme clip's bytes and the caption settings — so a
+retry, a double click, or another student generating a video from the same
+summary reuses the finished MP4 / Azure blob instead of rendering again.
+
+Rows in `rendered_videos` double as a claim: the first worker to insert a
+key renders it, and every other job for that key waits for that render
+instead of starting its own. Claims are compare-and-set updates (like
+job_queue.claim_job) and are taken over once they go stale, so a worker
+that dies mid-render never blocks the key for good.
+"""
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from . import models
+from .database import SessionLocal
+
+# ── Config ────────────────────────────────────────────────────────────────────
+RENDER_CLAIM_TIMEOUT_MINUTES = int(os.getenv("RENDER_CLAIM_TIMEOUT_MINUTES", "30"))
+RENDER_POLL_SECONDS          = float(os.getenv("RENDER_POLL_SECONDS", "2"))
+
+# Per-process counters — surfaced in /api/health
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "coalesced": 0, "takeovers": 0}
+
+
+def _bump(name: str, n: int = 1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def _entry(row: models.RenderedVideo) -> dict:
+    return {
+        "render_key": row.render_key,
+        "status":     row.status,
+        "filename":   row.filename,
+        "local_path": row.local_path,
+        "blob_url":   row.blob_url,
+    }
+
+
+def _try_claim(db, row: models.RenderedVideo, owner: str, values: dict) -> bool:
+    """Compare-and-set on the row's current claim."""
+    q = db.query(models.RenderedVideo).filter(models.RenderedVideo.id == row.id)
+    q = (q.filter(models.RenderedVideo.claimed_by == row.claimed_by) if row.claimed_by
+         else q.filter(models.RenderedVideo.claimed_by.is_(None)))
+    now = datetime.utcnow()
+    claimed = q.update({
+        **values,
+        models.RenderedVideo.claimed_by:   owner,
+        models.RenderedVideo.claimed_at:   now,
+        models.RenderedVideo.last_used_at: now,
+    }, synchronize_session=False)
+    db.commit()
+    return claimed == 1
+
+
+def acquire_render(key: str, owner: str, usable) -> dict | None:
+    """Reuse or claim the render for key.
+
+    Returns the cached entry when a finished render can be reused —
+    usable(entry) decides (e.g. the blob or local file still exists). An
+    entry with status "uploaded" is free to use; any other entry comes back
+    claimed by owner, to be finished with mark_uploaded()/release_render().
+    Returns None when owner must render it (the key is then claimed).
+    While another worker holds a live claim on the key, this waits.
+    """
+    waited = False
+    while True:
+        db = SessionLocal()
+        try:
+            row = db.query(models.RenderedVideo).filter(
+                models.RenderedVideo.render_key == key
+            ).first()
+
+            if row is None:
+                now = datetime.utcnow()
+                try:
+                    db.add(models.RenderedVideo(
+                        render_key=key, status="rendering", claimed_by=owner, claimed_at=now,
+                        hits=0, created_at=now, last_used_at=now,
+                    ))
+                    db.commit()
+                except IntegrityError:
+                    db.rollback()           # another worker claimed it first
+                    continue
+                _bump("misses")
+                return None
+
+            stale = datetime.utcnow() - timedelta(minutes=RENDER_CLAIM_TIMEOUT_MINUTES)
+            live_claim = (row.claimed_by and row.claimed_by != owner
+                          and row.claimed_at and row.claimed_at >= stale)
+            if live_claim:
+                if not waited:
+                    print(f"[RenderCache] {key[:12]} is being rendered by {row.claimed_by} — waiting")
+                    _bump("coalesced")
+                    waited = True
+                time.sleep(RENDER_POLL_SECONDS)
+                continue
+
+            entry = _entry(row)
+            if row.status != "rendering" and usable(entry):
+                if row.status == "uploaded":
+                    row.hits = (row.hits or 0) + 1
+                    row.last_used_at = datetime.utcnow()
+                    db.commit()
+                    _bump("hits")
+                    return entry
+                # Rendered but never uploaded — claim it to finish the upload
+                if _try_claim(db, row, owner, {}):
+                    _bump("hits")
+                    return entry
+                continue
+
+            # Stale claim, or the cached files are gone — render it again
+            if _try_claim(db, row, owner, {
+                models.RenderedVideo.status:     "rendering",
+                models.RenderedVideo.local_path: None,
+                models.RenderedVideo.blob_url:   None,
+            }):
+                _bump("takeovers" if row.status == "rendering" else "misses")
+                return None
+        finally:
+            db.close()
+
+
+def _update(key: str, owner: str, values: dict):
+    db = SessionLocal()
+    try:
+        db.query(models.RenderedVideo).filter(
+            models.RenderedVideo.render_key == key,
+            models.RenderedVideo.claimed_by == owner,
+        ).update(values, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def mark_rendered(key: str, owner: str, filename: str, local_path: str):
+    """The MP4 exists locally; owner keeps the claim until it is uploaded."""
+    _update(key, owner, {
+        models.RenderedVideo.status:     "rendered",
+        models.RenderedVideo.filename:   filename,
+        models.RenderedVideo.local_path: local_path,
+    })
+
+
+def mark_uploaded(key: str, owner: str, blob_url: str):
+    _update(key, owner, {
+        models.RenderedVideo.status:     "uploaded",
+        models.RenderedVideo.blob_url:   blob_url,
+        models.RenderedVideo.claimed_by: None,
+        models.RenderedVideo.claimed_at: None,
+    })
+
+
+def release_render(key: str, owner: str):
+    """Give up owner's claim after a failure so a waiting or retried job can proceed."""
+    db = SessionLocal()
+    try:
+        q = db.query(models.RenderedVideo).filter(
+            models.RenderedVideo.render_key == key,
+            models.RenderedVideo.claimed_by == owner,
+        )
+        q.filter(models.RenderedVideo.status == "rendering").delete(synchronize_session=False)
+        q.update({
+            models.RenderedVideo.claimed_by: None,
+            models.RenderedVideo.claimed_at: None,
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def render_cache_stats() -> dict:
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
@@ -0,0 +1,180 @@
+"""
+PadaiSathi — summary_cache.py
+Content-addressed cache for AI summaries.
+
+Keyed on a sha256 of the normalised extracted text plus the summarizer's
+SUMMARY_ENGINE_VERSION, so re-summarising the same lecture (or the same PDF
+uploaded by another student in the class) skips the AI engines entirely.
+Rows live in the `summary_cache` table and are evicted by TTL and LRU.
+"""
+import os
+import re
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+
+from . import models
+from .database import SessionLocal
+from .ai.summarizer import SUMMARY_ENGINE_VERSION
+
+# ── Config ────────────────────────────────────────────────────────────────────
+SUMMARY_CACHE_TTL_DAYS    = int(os.getenv("SUMMARY_CACHE_TTL_DAYS", "30"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "2000"))
+
+# Per-process counters — surfaced in /api/health
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+_notes_stats = {"hits": 0, "misses": 0, "stores": 0}    # section notes, counted apart
+
+
+def _bump(name: str, n: int = 1, stats: dict = _stats):
+    with _stats_lock:
+        stats[name] += n
+
+
+def summary_cache_key(text: str, genz_style: bool = True,
+                      version: str = SUMMARY_ENGINE_VERSION) -> str:
+    """Hash of whitespace-normalised text + engine version + style flag."""
+    normalized = re.sub(r"\s+", " ", text or "").strip()
+    h = hashlib.sha256()
+    h.update(version.encode("utf-8"))
+    h.update(b"|genz" if genz_style else b"|formal")
+    h.update(b"\x00")
+    h.update(normalized.encode("utf-8"))
+    return h.hexdigest()
+
+
+def get_cached_summary(db: Session, cache_key: str) -> dict | None:
+    """Return the cached result dict, or None on miss / expired entry."""
+    return _get(db, cache_key, _stats)
+
+
+def _get(db: Session, cache_key: str, stats: dict) -> dict | None:
+    row = db.query(models.SummaryCache).filter(
+        models.SummaryCache.cache_key == cache_key
+    ).first()
+    if not row:
+        _bump("misses", stats=stats)
+        return None
+
+    now = datetime.utcnow()
+    if row.created_at < now - timedelta(days=SUMMARY_CACHE_TTL_DAYS):
+        db.delete(row)
+        db.commit()
+        _bump("misses", stats=stats)
+        _bump("evictions")
+        return None
+
+    row.hits = (row.hits or 0) + 1
+    row.last_used_at = now
+    db.commit()
+    _bump("hits", stats=stats)
+    return dict(row.result)
+
+
+def store_cached_summary(db: Session, cache_key: str, result: dict):
+    """Save a summary result. Last-resort fallback output is never cached."""
+    if result.get("engine") == "fallback":
+        return
+    _put(db, cache_key, result, _stats)
+
+
+def _put(db: Session, cache_key: str, result: dict, stats: dict):
+    now = datetime.utcnow()
+    try:
+        db.add(models.SummaryCache(
+            cache_key=cache_key,
+            result=result,
+            hits=0,
+            created_at=now,
+            last_used_at=now,
+        ))
+        db.commit()
+    except IntegrityError:
+        # Another worker stored the same key first — theirs is just as good
+        db.rollback()
+        return
+    _bump("stores", stats=stats)
+    _evict(db)
+
+
+def _evict(db: Session):
+    """Drop expired rows, then trim least-recently-used rows over the cap."""
+    cutoff = datetime.utcnow() - timedelta(days=SUMMARY_CACHE_TTL_DAYS)
+    expired = db.query(models.SummaryCache).filter(
+        models.SummaryCache.created_at < cutoff
+    ).delete(synchronize_session=False)
+
+    overflow = db.query(models.SummaryCache).count() - SUMMARY_CACHE_MAX_ENTRIES
+    trimmed = 0
+    if overflow > 0:
+        stale_ids = [
+            r.id for r in db.query(models.SummaryCache.id)
+            .order_by(models.SummaryCache.last_used_at.asc())
+            .limit(overflow).all()
+        ]
+        trimmed = db.query(models.SummaryCache).filter(
+            models.SummaryCache.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+    if expired or trimmed:
+        db.commit()
+        _bump("evictions", expired + trimmed)
+        print(f"[SummaryCache] Evicted {expired} expired + {trimmed} LRU entries")
+
+
+# ── Section notes (map-reduce) ────────────────────────────────────────────────
+class ChunkSummaryCache:
+    """get/set store for the summarizer's per-section map notes.
+
+    Keys are already content hashes (see summarizer._map_section). Rows share
+    the summary_cache table and its TTL/LRU eviction, stored as
+    {"notes": ...} under a rehash of "notes:" + key so they fit the 64-char
+    cache_key column and never collide with a whole-summary key. Lookups are
+    counted in their own stats. Called from the map worker threads, so each
+    call opens its own session.
+    """
+
+    PREFIX = "notes:"
+
+    def _row_key(self, key: str) -> str:
+        return hashlib.sha256((self.PREFIX + key).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        db = SessionLocal()
+        try:
+            result = _get(db, self._row_key(key), _notes_stats)
+            return result.get("notes") if result else None
+        except Exception as e:
+            print(f"[SummaryCache] Section notes lookup failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def set(self, key: str, notes: str):
+        db = SessionLocal()
+        try:
+            _put(db, self._row_key(key), {"notes": notes}, _notes_stats)
+        except Exception as e:
+            print(f"[SummaryCache] Section notes store failed: {e}")
+        finally:
+            db.close()
+
+
+chunk_summary_cache = ChunkSummaryCache()
+
+
+def summary_cache_stats(db: Session) -> dict:
+    with _stats_lock:
+        stats, notes = dict(_stats), dict(_notes_stats)
+    for counts in (stats, notes):
+        lookups = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / lookups, 3) if lookups else 0.0
+    stats["section_notes"] = notes
+    stats["entries"] = db.query(models.SummaryCache).count()
+    stats["max_entries"] = SUMMARY_CACHE_MAX_ENTRIES
+    stats["ttl_days"] = SUMMARY_CACHE_TTL_DAYS
+    return stats
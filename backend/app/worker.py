@@ -0,0 +1,35 @@
+"""
+PadaiSathi — standalone job worker
+
+Runs the same job handlers as the API process, but on its own so video
+rendering can scale separately from the web dynos:
+
+    cd backend
+    VIDEO_WORKERS=0 uvicorn app.main:app ...      # API only, no rendering
+    WORKER_CONCURRENCY=2 python -m app.worker     # one or more render boxes
+
+WORKER_KINDS picks which job kinds this process handles (default: all).
+Workers that render videos load Whisper and prepare the background clips up
+front so the first job doesn't pay for them.
+"""
+import os
+
+from .main import JOB_HANDLERS
+from .job_queue import run_forever
+from .ai import model_registry
+from .ai.video_generator import ASSET_DIR
+from .ai.background_cache import warm_background_cache
+
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "1"))
+WORKER_KINDS       = [k.strip() for k in os.getenv("WORKER_KINDS", "").split(",") if k.strip()]
+
+
+if __name__ == "__main__":
+    handlers = {k: fn for k, fn in JOB_HANDLERS.items() if not WORKER_KINDS or k in WORKER_KINDS}
+    print("=" * 60)
+    print(f"🛠️  PadaiSathi worker — kinds={list(handlers)} concurrency={WORKER_CONCURRENCY}")
+    print("=" * 60)
+    if "video" in handlers:
+        model_registry.warm_up(["whisper"])
+        warm_background_cache(ASSET_DIR)
+    run_forever(handlers, concurrency=WORKER_CONCURRENCY, name="worker")
@@ -5,7 +5,8 @@ load_dotenv('../.env')
 from app.main import simple_hash_password
 from app.auth import create_access_token
 from app.ai.pdf_extractor import _extract_pptx
-from app.ai.summarizer import _parse_output, _chunk_text
+from app.ai.summarizer import _parse_output
+from app.ai.chunker import chunk_text, count_tokens
 
 # Test 11
 result = simple_hash_password("MySecret@123")
@@ -190,24 +191,25 @@ print("=" * 55)
 
 # Test 24
 long_text = ("Photosynthesis is the process by which plants make food. " * 30)
-chunks = _chunk_text(long_text, chunk_size=800)
-all_under_limit = all(len(c) <= 900 for c in chunks)
+chunks = chunk_text(long_text, max_tokens=100)
+all_under_limit = all(count_tokens(c) <= 100 for c in chunks)
+nothing_dropped = "".join(chunks).replace(" ", "") == long_text.replace(" ", "")
 print("=" * 55)
-print("TEST 2: _chunk_text() — Splits long text into chunks")
+print("TEST 2: chunk_text() — Splits long text into token-budget chunks")
 print("=" * 55)
 print(f"Input length             : {len(long_text)} chars")
 print(f"Number of chunks         : {len(chunks)}")
 print(f"All chunks under limit   : {all_under_limit}")
-print(f"Max 8 chunks enforced    : {len(chunks) <= 8}")
-print(f"Result                   : {'PASS' if all_under_limit and len(chunks) <= 8 else 'FAIL'}")
+print(f"No text dropped          : {nothing_dropped}")
+print(f"Result                   : {'PASS' if all_under_limit and nothing_dropped else 'FAIL'}")
 print("=" * 55)
 
 # Test 27
 short_text = "Mitochondria are membrane-bound organelles found in most eukaryotic cells.They are responsible for producing energy in the form of ATP through cellular respiration.Mitochondria have their own DNA and are often referred to as the “powerhouse of the cell.” "
-short_chunks = _chunk_text(short_text, chunk_size=800)
+short_chunks = chunk_text(short_text, max_tokens=200)
 single_ok = len(short_chunks) == 1
 print("=" * 55)
-print("TEST 25: _chunk_text() — Short text returns single chunk")
+print("TEST 25: chunk_text() — Short text returns single chunk")
 print("=" * 55)
 print(f"Input                    : '{short_text}'")
 print(f"Number of chunks         : {len(short_chunks)}")
@@ -0,0 +1,312 @@
+import os, tempfile
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+load_dotenv('../.env')
+
+# Throwaway SQLite database with foreign keys enforced, like PostgreSQL
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test_unit_db.sqlite")
+
+from sqlalchemy import event
+from app.database import Base, engine, SessionLocal
+from app import models
+
+
+@event.listens_for(engine, "connect")
+def _fk_on(conn, _):
+    conn.execute("PRAGMA foreign_keys=ON")
+
+
+Base.metadata.create_all(bind=engine)
+
+from app.job_queue import enqueue_job, claim_job, complete_job, fail_job
+
+# Test J1
+db = SessionLocal()
+job = enqueue_job(db, "video", {"summary_id": 0})
+db.close()
+claimed = claim_job(["video"], "worker-a")
+# Simulate worker-a stalling past the lock timeout and worker-b reclaiming it
+db = SessionLocal()
+db.query(models.Job).filter(models.Job.id == job.id).update(
+    {models.Job.locked_at: datetime.utcnow() - timedelta(days=1)})
+db.commit()
+db.close()
+reclaimed = claim_job(["video"], "worker-b")
+late_complete = complete_job(job.id, {"by": "a"}, "worker-a")
+fail_job(job.id, "late failure", "worker-a")
+db = SessionLocal()
+row = db.query(models.Job).filter(models.Job.id == job.id).first()
+owner_ok = (claimed is not None and reclaimed is not None and not late_complete
+            and row.status == "processing" and row.locked_by == "worker-b")
+db.close()
+print("=" * 55)
+print("TEST J1: complete_job()/fail_job() — only the lock holder finishes a job")
+print("=" * 55)
+print(f"Reclaimed by worker-b    : {reclaimed is not None}")
+print(f"Late complete by a       : {late_complete} (expected False)")
+print(f"Status / locked_by       : {row.status} / {row.locked_by}")
+print(f"Result                   : {'PASS' if owner_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J2
+on_time = complete_job(job.id, {"by": "b"}, "worker-b")
+db = SessionLocal()
+row = db.query(models.Job).filter(models.Job.id == job.id).first()
+done_ok = on_time and row.status == "done" and row.result == {"by": "b"}
+db.close()
+print("=" * 55)
+print("TEST J2: complete_job() — lock holder completes the job")
+print("=" * 55)
+print(f"Completed                : {on_time}")
+print(f"Status / result          : {row.status} / {row.result}")
+print(f"Result                   : {'PASS' if done_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J3
+import app.main as main_mod
+main_mod._study_input = lambda doc_id, text, db: (text, None)
+calls_j3 = []
+def _fake_flashcards(text, n=8, prepared=None):
+    calls_j3.append(text)
+    return [{"question": "What is ATP?", "answer": "Energy currency"}]
+main_mod.generate_only_flashcards = _fake_flashcards
+
+db = SessionLocal()
+user_j3 = models.User(username="retry_user", email="retry@test.local", password_hash="x", points=0)
+db.add(user_j3); db.commit()
+doc_j3 = models.Document(user_id=user_j3.id, file_name="cells.pdf", file_path="cells.pdf",
+                        extracted_text="Cells make ATP.")
+db.add(doc_j3); db.commit()
+summary_j3 = models.Summary(document_id=doc_j3.id, user_id=user_j3.id, summary_text="Cells make ATP.")
+db.add(summary_j3); db.commit()
+payload_j3 = {"summary_id": summary_j3.id, "user_id": user_j3.id}
+summary_id_j3, user_id_j3 = summary_j3.id, user_j3.id
+db.close()
+
+first = main_mod._flashcards_job(777, payload_j3)
+second = main_mod._flashcards_job(777, payload_j3)   # retry of the same job
+db = SessionLocal()
+n_cards = db.query(models.Flashcard).filter(models.Flashcard.summary_id == summary_id_j3).count()
+points = db.query(models.User).filter(models.User.id == user_id_j3).first().points
+db.close()
+retry_ok = n_cards == 1 and points == 10 and len(calls_j3) == 1 and second["flashcards"] == first["flashcards"]
+print("=" * 55)
+print("TEST J3: flashcards job — a retry reuses the saved cards")
+print("=" * 55)
+print(f"Flashcard rows           : {n_cards} (expected 1)")
+print(f"User points              : {points} (expected 10)")
+print(f"Generator calls          : {len(calls_j3)} (expected 1)")
+print(f"Result                   : {'PASS' if retry_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J4
+import time
+from fastapi import HTTPException
+db = SessionLocal()
+doc_j4 = models.Document(user_id=user_id_j3, file_name="gone.pdf", file_path="/nonexistent/gone.pdf",
+                         extraction_status="extracting")
+db.add(doc_j4); db.commit()
+t0 = time.monotonic()
+try:
+    main_mod._require_extracted_text(doc_j4, db)
+    status_j4 = None
+except HTTPException as e:
+    status_j4 = e.status_code
+waited = time.monotonic() - t0
+doc_id_j4 = doc_j4.id
+db.close()
+main_mod._resume_extractions()   # its upload is gone → marked failed instead of stuck
+db = SessionLocal()
+after = db.query(models.Document).filter(models.Document.id == doc_id_j4).first().extraction_status
+db.close()
+extract_ok = status_j4 == 409 and waited < 1 and after == "failed"
+print("=" * 55)
+print("TEST J4: extracting documents — fast 409, stuck rows resolved at startup")
+print("=" * 55)
+print(f"Request status           : {status_j4} after {waited:.2f}s (expected 409, no wait)")
+print(f"Status after startup     : {after} (expected failed)")
+print(f"Result                   : {'PASS' if extract_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J5
+db = SessionLocal()
+user_j5 = models.User(username="leaving_user", email="leaving@test.local", password_hash="x", points=0)
+db.add(user_j5); db.commit()
+doc_j5 = models.Document(user_id=user_j5.id, file_name="bio.pdf", file_path="bio.pdf", extracted_text="Cells.")
+db.add(doc_j5); db.commit()
+summary_j5 = models.Summary(document_id=doc_j5.id, user_id=user_j5.id, summary_text="Cells.")
+db.add(summary_j5); db.commit()
+enqueue_job(db, "video", {"summary_id": summary_j5.id}, user_id=user_j5.id, summary_id=summary_j5.id)
+user_id_j5 = user_j5.id
+try:
+    main_mod.delete_user(user_id_j5, db)
+    delete_error = None
+except Exception as e:
+    delete_error = e
+db.close()
+db = SessionLocal()
+gone = db.query(models.User).filter(models.User.id == user_id_j5).first() is None
+jobs_left = db.query(models.Job).filter(models.Job.user_id == user_id_j5).count()
+db.close()
+delete_ok = delete_error is None and gone and jobs_left == 0
+print("=" * 55)
+print("TEST J5: delete_user() — user with a video job, foreign keys enforced")
+print("=" * 55)
+print(f"Error                    : {delete_error}")
+print(f"User deleted             : {gone}")
+print(f"Jobs left                : {jobs_left} (expected 0)")
+print(f"Result                   : {'PASS' if delete_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J6
+from app.summary_cache import chunk_summary_cache, summary_cache_stats
+import hashlib
+section_key = hashlib.sha256(b"mitochondria section").hexdigest()
+miss = chunk_summary_cache.get(section_key)
+chunk_summary_cache.set(section_key, "- Mitochondria make ATP")
+hit = chunk_summary_cache.get(section_key)
+db = SessionLocal()
+stats = summary_cache_stats(db)
+key_lengths = {len(r.cache_key) for r in db.query(models.SummaryCache).all()}
+db.close()
+notes_ok = (miss is None and hit == "- Mitochondria make ATP" and key_lengths == {64}
+            and stats["section_notes"]["hits"] == 1 and stats["section_notes"]["misses"] == 1
+            and stats["hits"] == 0 and stats["misses"] == 0)
+print("=" * 55)
+print("TEST J6: ChunkSummaryCache — 64-char keys, stats kept apart")
+print("=" * 55)
+print(f"Stored notes             : {hit}")
+print(f"cache_key lengths        : {key_lengths} (expected {{64}})")
+print(f"Notes hits / misses      : {stats['section_notes']['hits']} / {stats['section_notes']['misses']}")
+print(f"Summary hits / misses    : {stats['hits']} / {stats['misses']} (expected 0 / 0)")
+print(f"Result                   : {'PASS' if notes_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J7
+import threading
+from app import render_cache
+from app.render_cache import acquire_render, mark_rendered, mark_uploaded, release_render
+render_cache.RENDER_POLL_SECONDS = 0.05
+renders, outcomes = [], {}
+def _video_worker(owner):
+    entry = acquire_render("render-key-j7", owner, usable=lambda e: True)
+    if entry is None:                      # this worker renders
+        renders.append(owner)
+        time.sleep(0.3)
+        mark_rendered("render-key-j7", owner, "j7.mp4", "/tmp/j7.mp4")
+        mark_uploaded("render-key-j7", owner, "https://blob/j7.mp4")
+        entry = {"blob_url": "https://blob/j7.mp4"}
+    outcomes[owner] = entry["blob_url"]
+workers = [threading.Thread(target=_video_worker, args=(f"video-job-{i}",)) for i in range(3)]
+for w in workers:
+    w.start()
+for w in workers:
+    w.join()
+coalesce_ok = len(renders) == 1 and set(outcomes.values()) == {"https://blob/j7.mp4"} and len(outcomes) == 3
+print("=" * 55)
+print("TEST J7: acquire_render() — concurrent jobs share one render")
+print("=" * 55)
+print(f"Renders                  : {renders} (expected exactly one)")
+print(f"Blob per job             : {sorted(outcomes.values())}")
+print(f"Result                   : {'PASS' if coalesce_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J8
+first_claim = acquire_render("render-key-j8", "video-job-10", usable=lambda e: True)
+release_render("render-key-j8", "video-job-10")          # render failed
+after_release = acquire_render("render-key-j8", "video-job-11", usable=lambda e: True)
+# video-job-11 stalls past the claim timeout; video-job-12 takes the key over
+db = SessionLocal()
+db.query(models.RenderedVideo).filter(models.RenderedVideo.render_key == "render-key-j8").update(
+    {models.RenderedVideo.claimed_at: datetime.utcnow() - timedelta(days=1)})
+db.commit()
+db.close()
+after_stale = acquire_render("render-key-j8", "video-job-12", usable=lambda e: True)
+db = SessionLocal()
+holder = db.query(models.RenderedVideo).filter(models.RenderedVideo.render_key == "render-key-j8").first().claimed_by
+db.close()
+takeover_ok = first_claim is None and after_release is None and after_stale is None and holder == "video-job-12"
+print("=" * 55)
+print("TEST J8: acquire_render() — released and stale claims are taken over")
+print("=" * 55)
+print(f"Claim holder             : {holder} (expected video-job-12)")
+print(f"Result                   : {'PASS' if takeover_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J9
+def _pack_with_failed_summary(text, n_flashcards, n_quiz, extra, prepared):
+    yield "flashcards", [{"question": "What is ATP?", "answer": "Energy currency"}], None
+    yield "summary", None, "AI engines down"
+    yield "quiz", [{"question": "ATP is?", "options": ["a", "b", "c", "d"], "correct": 0}], None
+main_mod.iter_study_pack = _pack_with_failed_summary
+main_mod._study_input = lambda doc_id, text, db: (text, None)
+
+db = SessionLocal()
+user_j9 = models.User(username="pack_user", email="pack@test.local", password_hash="x", points=0)
+db.add(user_j9); db.commit()
+new_doc = models.Document(user_id=user_j9.id, file_name="new.pdf", file_path="new.pdf", extracted_text="x" * 60)
+old_doc = models.Document(user_id=user_j9.id, file_name="old.pdf", file_path="old.pdf", extracted_text="x" * 60)
+db.add_all([new_doc, old_doc]); db.commit()
+old_summary = models.Summary(document_id=old_doc.id, user_id=user_j9.id, summary_text="Earlier summary")
+db.add(old_summary); db.commit()
+ids_j9 = (user_j9.id, new_doc.id, old_doc.id, old_summary.id)
+db.close()
+
+req_j9 = main_mod.StudyPackRequest(document_id=ids_j9[1], user_email="pack@test.local")
+events_new = list(main_mod._study_pack_events(req_j9, ids_j9[0], ids_j9[1], "x" * 60, None))
+events_old = list(main_mod._study_pack_events(req_j9, ids_j9[0], ids_j9[2], "x" * 60, None))
+done_new, done_old = events_new[-1][1], events_old[-1][1]
+unsaved_parts = [d for e, d in events_new if e == "part" and d.get("saved") is False]
+db = SessionLocal()
+kept = db.query(models.Flashcard).filter(models.Flashcard.summary_id == ids_j9[3]).count()
+db.close()
+pack_ok = (done_new["summary_id"] is None and done_new["unsaved"] == ["flashcards", "quiz"]
+           and {d["part"] for d in unsaved_parts} == {"flashcards", "quiz"}
+           and done_old["summary_id"] == ids_j9[3] and done_old["summary_fallback"]
+           and done_old["unsaved"] == [] and kept == 1)
+print("=" * 55)
+print("TEST J9: study pack — cards survive a failed summary part")
+print("=" * 55)
+print(f"No earlier summary       : unsaved={done_new['unsaved']}")
+print(f"Parts reported unsaved   : {sorted(d['part'] for d in unsaved_parts)}")
+print(f"With earlier summary     : summary_id={done_old['summary_id']} fallback={done_old['summary_fallback']}")
+print(f"Cards on earlier summary : {kept} (expected 1)")
+print(f"Result                   : {'PASS' if pack_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test J10
+from concurrent.futures import ThreadPoolExecutor
+from app.ai import pdf_extractor
+from app.ai.pdf_extractor import submit_extraction, shutdown_extraction_pool
+# Threads stand in for the spawn process pool, which would re-run this script
+pdf_extractor._get_pool = lambda pool=ThreadPoolExecutor(max_workers=2): pool
+upload_j10 = os.path.join(tempfile.mkdtemp(), "notes.txt")
+with open(upload_j10, "w") as f:
+    f.write("Mitochondria make ATP for the cell. Ribosomes build proteins from amino acids. " * 20)
+db = SessionLocal()
+docs_j10 = [models.Document(user_id=user_id_j3, file_name="notes.txt", file_path=upload_j10,
+                            extraction_status="extracting") for _ in range(2)]
+db.add_all(docs_j10); db.commit()
+indexed_id, broken_id = docs_j10[0].id, docs_j10[1].id
+db.close()
+main_mod._finish_extraction(indexed_id, submit_extraction(upload_j10, main_mod.build_index_rows))
+real_store = main_mod.store_document_index
+def _failing_store(*args, **kwargs):
+    raise RuntimeError("keyword index blew up")
+main_mod.store_document_index = _failing_store
+main_mod._finish_extraction(broken_id, submit_extraction(upload_j10, main_mod.build_index_rows))
+main_mod.store_document_index = real_store
+shutdown_extraction_pool()
+db = SessionLocal()
+status_indexed = db.query(models.Document).filter(models.Document.id == indexed_id).first().extraction_status
+status_broken = db.query(models.Document).filter(models.Document.id == broken_id).first().extraction_status
+chunks_indexed = db.query(models.DocumentChunk).filter(models.DocumentChunk.document_id == indexed_id).count()
+db.close()
+extract_index_ok = status_indexed == "ready" and chunks_indexed > 0 and status_broken == "ready"
+print("=" * 55)
+print("TEST J10: extraction — index built in the pool, failures don't strand docs")
+print("=" * 55)
+print(f"Indexed doc              : {status_indexed}, {chunks_indexed} chunks")
+print(f"Index store failed       : {status_broken} (expected ready)")
+print(f"Result                   : {'PASS' if extract_index_ok else 'FAIL'}")
+print("=" * 55)
@@ -0,0 +1,175 @@
+import os, time, base64, hashlib, tempfile, threading
+from types import SimpleNamespace
+from dotenv import load_dotenv
+load_dotenv('../.env')
+os.environ.setdefault("AZURE_STORAGE_CONNECTION_STRING", "UseDevelopmentStorage=true")
+
+from app.ai.stages import run_stages
+from app.ai.tts_cache import split_sentences
+from app import minio_storage
+
+# Test V1
+order = []
+def _stage(name, seconds, value):
+    def fn(results):
+        order.append(("start", name))
+        time.sleep(seconds)
+        order.append(("end", name))
+        return value(results)
+    return fn
+
+t0 = time.monotonic()
+results_v1, timings_v1 = run_stages({
+    "tts":        ((),                      _stage("tts", 0.3, lambda r: 4.8)),
+    "background": ((),                      _stage("background", 0.3, lambda r: "bg.mp4")),
+    "transcribe": (("tts",),                _stage("transcribe", 0.1, lambda r: r["tts"] * 2)),
+    "render":     (("transcribe", "background"),
+                   _stage("render", 0.1, lambda r: f"{r['background']}@{r['transcribe']}")),
+})
+elapsed_v1 = time.monotonic() - t0
+overlapped = order.index(("start", "background")) < order.index(("end", "tts"))
+deps_first = order.index(("end", "transcribe")) < order.index(("start", "render"))
+stages_ok = (results_v1["render"] == "bg.mp4@9.6" and overlapped and deps_first
+             and elapsed_v1 < 0.8 and all(timings_v1[n]["status"] == "done" for n in results_v1)
+             and timings_v1["total"]["status"] == "done")
+print("=" * 55)
+print("TEST V1: run_stages() — independent stages overlap, deps run first")
+print("=" * 55)
+print(f"Render result  : {results_v1['render']}")
+print(f"tts ∥ background: {overlapped}")
+print(f"Elapsed        : {elapsed_v1:.2f}s (serial would be 0.8s)")
+print(f"Result         : {'PASS' if stages_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test V2
+def _boom(results):
+    raise RuntimeError("tts down")
+
+seen_v2, timings_v2 = [], {}
+try:
+    run_stages({
+        "tts":        ((),        _boom),
+        "background": ((),        lambda r: time.sleep(0.2) or "bg.mp4"),
+        "render":     (("tts", "background"), lambda r: "never"),
+    }, on_stage=lambda name, t: seen_v2.append((name, t["status"])), timings=timings_v2)
+    error_v2 = None
+except RuntimeError as e:
+    error_v2 = str(e)
+failure_ok = (error_v2 == "tts down" and timings_v2["tts"]["status"] == "error"
+              and timings_v2["background"]["status"] == "done"
+              and timings_v2["render"]["status"] == "skipped"
+              and timings_v2["total"]["status"] == "error"
+              and ("tts", "error") in seen_v2)
+print("=" * 55)
+print("TEST V2: run_stages() — a failed stage is re-raised, dependents skipped")
+print("=" * 55)
+print(f"Raised         : {error_v2}")
+print(f"Statuses       : { {n: t['status'] for n, t in timings_v2.items()} }")
+print(f"Result         : {'PASS' if failure_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test V3
+try:
+    run_stages({"a": (("b",), lambda r: 1), "b": (("a",), lambda r: 2)})
+    cycle_error = None
+except ValueError as e:
+    cycle_error = str(e)
+print("=" * 55)
+print("TEST V3: run_stages() — dependency cycle rejected up front")
+print("=" * 55)
+print(f"Error          : {cycle_error}")
+print(f"Result         : {'PASS' if cycle_error and 'cycle' in cycle_error else 'FAIL'}")
+print("=" * 55)
+
+# Test V4
+cases_v4 = [
+    ("Pi is 3.14 approx. E.g. mitosis",              ["Pi is 3.14 approx. E.g. mitosis"]),
+    ("The cell grows 2.5 times. Then it splits!",    ["The cell grows 2.5 times.", "Then it splits!"]),
+    ("Dr. Rao says hi. Wait... what? Okay",          ["Dr. Rao says hi.", "Wait... what?", "Okay"]),
+    ("She said \"Stop.\" Then left.",                ["She said \"Stop.\"", "Then left."]),
+    ("Chapter 3. 4 cells form in the U.S.A. lab.",   ["Chapter 3. 4 cells form in the U.S.A. lab."]),
+]
+failed_v4 = [(text, split_sentences(text)) for text, expected in cases_v4 if split_sentences(text) != expected]
+print("=" * 55)
+print("TEST V4: split_sentences() — decimals and abbreviations stay whole")
+print("=" * 55)
+for text, _ in cases_v4:
+    print(f"{text!r:48} → {split_sentences(text)}")
+print(f"Result         : {'PASS' if not failed_v4 else 'FAIL'}")
+print("=" * 55)
+
+# Test V5
+class FakeBlobClient:
+    """Just enough of azure BlobClient for upload_blocks()."""
+    def __init__(self, fail_block=None):
+        self.staged, self.committed, self.md5 = {}, None, None
+        self.fail_block, self.stage_calls, self.lock = fail_block, 0, threading.Lock()
+    def get_block_list(self, block_list_type):
+        return [], [SimpleNamespace(id=k, size=len(v)) for k, v in self.staged.items()]
+    def stage_block(self, block_id, data, length=None, validate_content=False):
+        with self.lock:
+            self.stage_calls += 1
+        if self.fail_block is not None and base64.b64decode(block_id).decode().endswith(f"{self.fail_block:06d}"):
+            raise IOError("connection reset")
+        self.staged[block_id] = bytes(data)
+    def commit_block_list(self, blocks, content_settings=None):
+        self.committed = b"".join(self.staged[b.id] for b in blocks)
+        self.md5 = bytes(content_settings.content_md5)
+    url = "https://fake.blob.core.windows.net/videos/v5.mp4"
+
+minio_storage.UPLOAD_MAX_RETRIES = 1
+video_bytes = os.urandom(5 * 1024 * 1024 + 123)
+video_file = os.path.join(tempfile.mkdtemp(), "v5.mp4")
+with open(video_file, "wb") as f:
+    f.write(video_bytes)
+client = FakeBlobClient(fail_block=3)
+try:
+    minio_storage.upload_blocks(client, video_file, block_size=512 * 1024, concurrency=3)
+    first_error = None
+except IOError as e:
+    first_error = str(e)
+staged_before = len(client.staged)
+client.fail_block, client.stage_calls = None, 0
+url_v5 = minio_storage.upload_blocks(client, video_file, block_size=512 * 1024, concurrency=3)
+total_blocks = -(-len(video_bytes) // (512 * 1024))
+upload_ok = (first_error is not None and url_v5 == client.url
+             and client.stage_calls == total_blocks - staged_before
+             and client.committed == video_bytes and client.md5 == hashlib.md5(video_bytes).digest())
+print("=" * 55)
+print("TEST V5: upload_blocks() — resumes staged blocks, commits exact bytes")
+print("=" * 55)
+print(f"First attempt  : {first_error} ({staged_before}/{total_blocks} blocks staged)")
+print(f"Resume staged  : {client.stage_calls} blocks")
+print(f"Bytes match    : {client.committed == video_bytes}")
+print(f"MD5 match      : {client.md5 == hashlib.md5(video_bytes).digest()}")
+print(f"Result         : {'PASS' if upload_ok else 'FAIL'}")
+print("=" * 55)
+
+# Test V6
+from app.ai import tts_cache
+cache_dir = tempfile.mkdtemp()
+tts_cache.TTS_CACHE_DIR = tts_cache.Path(cache_dir)
+for name in ("old", "pinned", "recent"):
+    with open(os.path.join(cache_dir, f"{name}.mp3"), "wb") as f:
+        f.write(b"\0" * 1024)
+    with open(os.path.join(cache_dir, f"{name}.json"), "w") as f:
+        f.write("{}")
+hour_ago = time.time() - 3600
+for name in ("old", "pinned"):
+    for ext in ("mp3", "json"):
+        os.utime(os.path.join(cache_dir, f"{name}.{ext}"), (hour_ago, hour_ago))
+tts_cache.TTS_CACHE_MAX_MB, tts_cache.TTS_EVICT_GRACE_SECONDS = 0.0001, 600
+tts_cache._pin({"pinned"}, 1)
+tts_cache._evict()
+left_v6 = sorted(n[:-4] for n in os.listdir(cache_dir) if n.endswith(".mp3"))
+tts_cache._pin({"pinned"}, -1)
+tts_cache._evict()
+after_v6 = sorted(n[:-4] for n in os.listdir(cache_dir) if n.endswith(".mp3"))
+evict_ok = left_v6 == ["pinned", "recent"] and after_v6 == ["recent"]
+print("=" * 55)
+print("TEST V6: tts_cache._evict() — keeps pinned and recently used sentences")
+print("=" * 55)
+print(f"While pinned   : {left_v6}")
+print(f"After unpin    : {after_v6}")
+print(f"Result         : {'PASS' if evict_ok else 'FAIL'}")
+print("=" * 55)
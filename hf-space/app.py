@@ -10,14 +10,16 @@ Free ZeroGPU on HuggingFace Spaces handles the GPU automatically.
 
 import re
 import os
+import json
 import random
+from threading import Thread
 import torch
 import spaces
 import gradio as gr
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from peft import PeftModel
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, TextIteratorStreamer
 
 # ── Config ─────────────────────────────────────────────────────────────────────
 HF_TOKEN   = os.getenv("HF_TOKEN", "")
@@ -100,6 +102,47 @@ def generate_summary(lecture_text: str, max_tokens: int = 800) -> str:
     torch.cuda.empty_cache()
     return raw
 
+# ── Streaming variant — yields text pieces as soon as they're decoded ─────────
+@spaces.GPU
+def generate_summary_stream(lecture_text: str, max_tokens: int = 800):
+    torch.cuda.empty_cache()
+    model.to("cuda")
+
+    prompt = build_prompt(lecture_text)
+    inputs = tokenizer(
+        prompt,
+        return_tensors="pt",
+        truncation=True,
+        max_length=2048,
+    ).to("cuda")
+
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    gen_kwargs = dict(
+        **inputs,
+        streamer=streamer,
+        max_new_tokens=max_tokens,
+        temperature=0.7,
+        top_p=0.9,
+        do_sample=True,
+        repetition_penalty=1.1,
+        pad_token_id=tokenizer.eos_token_id,
+    )
+
+    def _generate():
+        with torch.no_grad():
+            model.generate(**gen_kwargs)
+
+    thread = Thread(target=_generate)
+    thread.start()
+    try:
+        for piece in streamer:
+            if piece:
+                yield piece
+    finally:
+        thread.join()
+        model.to("cpu")
+        torch.cuda.empty_cache()
+
 # ── Parser — exact same as Kaggle notebook ─────────────────────────────────────
 OPENERS = [
     "Hey besties!", "Okay real talk...", "Here's the tea!",
@@ -221,6 +264,35 @@ async def summarize(request: Request):
         print(f"[API] Error: {e}")
         return JSONResponse({"success": False, "error": str(e)}, status_code=500)
 
+@fastapi_app.post("/summarize/stream")
+async def summarize_stream(request: Request):
+    """SSE: `token` events while generating, then one `done` event with the
+    parsed sections (same keys as /summarize)."""
+    body       = await request.json()
+    text       = body.get("text", "")
+    max_tokens = body.get("max_tokens", 800)
+
+    def _sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def _events():
+        raw = ""
+        try:
+            print(f"[API] Streaming summary for {len(text)} chars...")
+            for piece in generate_summary_stream(text, max_tokens):
+                raw += piece
+                yield _sse("token", {"text": piece})
+            result = parse_output(raw)
+            result["word_count"] = len(text.split())
+            print(f"[API] Stream done! {len(raw)} chars")
+            yield _sse("done", {"success": True, **result})
+        except Exception as e:
+            print(f"[API] Stream error: {e}")
+            yield _sse("error", {"success": False, "error": str(e)})
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # ── Gradio UI (required for ZeroGPU spaces) ───────────────────────────────────
 def gradio_summarize(text: str) -> dict:
     raw    = generate_summary(text, 800)